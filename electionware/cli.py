@@ -0,0 +1,266 @@
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Union
+
+_CLI_IMPORT_TIME: float = time.perf_counter()
+
+from electionware.configuration import (  # noqa: E402
+    ConfigurationError, compile_configuration, load_configuration)
+
+_PACKAGE_IMPORT_TIME: float = time.perf_counter()
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    argument_parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog='electionware',
+        description='Convert Electionware PDFs to OpenElections-style CSVs.')
+    argument_parser.add_argument(
+        'configurations', nargs='*', metavar='CONFIG',
+        help='JSON or YAML configuration file')
+    argument_parser.add_argument(
+        '-o', '--output',
+        help='output csv path (default: derived from election_description); '
+             'only valid with a single configuration')
+    argument_parser.add_argument(
+        '--timing', action='store_true',
+        help='report the time spent in each startup phase on stderr')
+    argument_parser.add_argument(
+        '--aggregate', action='store_true',
+        help='also write county-level totals next to the precinct csv and '
+             'report rows that do not add up to the totals stated in the PDF')
+    argument_parser.add_argument(
+        '--precinct', action='append', metavar='NAME',
+        help='only convert the given precinct (may be repeated); uses a '
+             'sidecar page index, built on first use')
+    argument_parser.add_argument(
+        '--diff', nargs=2, metavar=('OLD_PDF', 'NEW_PDF'),
+        help='instead of converting, write the rows that differ between two '
+             'versions of the PDF to the --output csv (requires --output); a '
+             'second CONFIG, if given, is used for NEW_PDF')
+    argument_parser.add_argument(
+        '--sqlite', metavar='DATABASE',
+        help='load the rows into a table of this SQLite database instead of '
+             'writing a csv; the table is named after the csv file')
+    argument_parser.add_argument(
+        '--threads', type=int, metavar='N',
+        help='parse pages with N threads (see electionware.threaded); '
+             'scales on free-threaded Python builds')
+    argument_parser.add_argument(
+        '--preflight', type=int, nargs='?', const=10, metavar='PAGES',
+        help='before converting, check the page structure of a sample of '
+             'PAGES pages (default 10) per PDF and stop on any mismatch')
+    queue_arguments = argument_parser.add_argument_group(
+        'distributed mode', 'split conversions into page-range tasks in a shared '
+                            'SQLite job queue (see electionware.job_queue)')
+    queue_arguments.add_argument('--queue', metavar='PATH', help='job queue file')
+    queue_arguments.add_argument(
+        '--enqueue', action='store_true',
+        help='add the tasks of a single CONFIG to the queue')
+    queue_arguments.add_argument(
+        '--pages-per-task', type=int, default=25, metavar='N',
+        help='pages per task when enqueuing (default 25)')
+    queue_arguments.add_argument(
+        '--work', action='store_true', help='run queued tasks until none are left')
+    queue_arguments.add_argument(
+        '--lease', type=float, default=300.0, metavar='SECONDS',
+        help='how long a task stays leased to a silent worker (default 300)')
+    queue_arguments.add_argument(
+        '--stitch', action='store_true',
+        help='combine the finished tasks into the output csv (or --output)')
+    server_arguments = argument_parser.add_argument_group(
+        'server mode', 'keep warm worker processes and accept conversion jobs '
+                       '(see electionware.server)')
+    server_arguments.add_argument(
+        '--serve', action='store_true', help='run as a conversion server')
+    server_arguments.add_argument('--socket', help='Unix socket path to listen on')
+    server_arguments.add_argument(
+        '--port', type=int, help='localhost TCP port to listen on')
+    server_arguments.add_argument(
+        '--workers', type=int, help='worker processes (default: cpu count)')
+    server_arguments.add_argument(
+        '--memory-limit', type=int, metavar='MB',
+        help='total memory cap shared by all workers')
+    return argument_parser
+
+
+def format_startup_timing(configuration_start_time: float, import_start_time: float,
+                          end_time: float) -> str:
+    """
+    Given perf_counter times taken in main, describe how long each startup
+    phase took: interpreter start (until this module was imported; only
+    known where the process start time can be read), package import,
+    configuration loading, and parser import.
+    """
+    phases: List[str] = []
+    process_age: Optional[float] = _process_age()
+    if process_age is not None:
+        # the process start time only has clock tick resolution
+        interpreter_start_time: float = \
+            max(process_age - (time.perf_counter() - _CLI_IMPORT_TIME), 0.0)
+        phases.append(f'interpreter start: {interpreter_start_time * 1000:.1f} ms')
+    for phase, start_time, phase_end_time in (
+            ('package import', _CLI_IMPORT_TIME, _PACKAGE_IMPORT_TIME),
+            ('configuration loading', configuration_start_time, import_start_time),
+            ('parser import', import_start_time, end_time)):
+        phases.append(f'{phase}: {(phase_end_time - start_time) * 1000:.1f} ms')
+    return ', '.join(phases)
+
+
+def _process_age() -> Optional[float]:
+    # seconds since this process started, from /proc where there is one;
+    # the start time is counted in clock ticks since boot
+    try:
+        with open('/proc/self/stat') as f_in:
+            stat: str = f_in.read()
+        with open('/proc/uptime') as f_in:
+            uptime: float = float(f_in.read().split()[0])
+    except (OSError, ValueError):
+        return None
+    # the command name in parentheses may contain spaces
+    start_ticks: int = int(stat[stat.rindex(')') + 2:].split()[19])
+    return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Console entry point (python -m electionware). Only the standard library
+    and the lightweight configuration modules are imported at startup; the
+    parser, and with it pdfreader, is imported once configurations have been
+    loaded, so that invocations that fail early never pay for it.
+    """
+    argument_parser: argparse.ArgumentParser = build_argument_parser()
+    arguments: argparse.Namespace = argument_parser.parse_args(argv)
+    if arguments.serve:
+        return serve(arguments)
+    if arguments.queue:
+        return distribute(arguments)
+    if not arguments.configurations:
+        argument_parser.print_usage(sys.stderr)
+        return 2
+    if arguments.diff:
+        if not arguments.output:
+            print('--diff requires --output', file=sys.stderr)
+            return 2
+        if len(arguments.configurations) > 2:
+            print('--diff takes one configuration, or one per PDF', file=sys.stderr)
+            return 2
+    elif arguments.output and len(arguments.configurations) > 1:
+        print('--output requires a single configuration', file=sys.stderr)
+        return 2
+    if arguments.sqlite and (arguments.aggregate or arguments.precinct):
+        print('--sqlite cannot be combined with --aggregate or --precinct', file=sys.stderr)
+        return 2
+    if arguments.precinct and arguments.aggregate:
+        # county totals of a few precincts would not be the county's totals
+        print('--precinct cannot be combined with --aggregate', file=sys.stderr)
+        return 2
+    configuration_start_time: float = time.perf_counter()
+    try:
+        configurations: List[Dict[str, Union[Dict, List]]] = \
+            [load_configuration(path) for path in arguments.configurations]
+        for configuration in configurations:
+            if arguments.threads:
+                configuration['threads'] = arguments.threads
+            compile_configuration(configuration)
+    except ConfigurationError as e:
+        print(f'invalid configuration: {e}', file=sys.stderr)
+        return 2
+    import_start_time: float = time.perf_counter()
+    from electionware.csv import convert_electionware_pdf_to_csv, get_output_file_path
+    if arguments.timing:
+        print(format_startup_timing(configuration_start_time, import_start_time,
+                                    time.perf_counter()), file=sys.stderr)
+    if arguments.diff:
+        return diff(configurations, arguments)
+    if arguments.preflight:
+        from electionware.preflight import PreflightMismatch, preflight
+        for configuration in configurations:
+            mismatches: List[PreflightMismatch] = \
+                preflight(configuration, arguments.preflight)
+            for mismatch in mismatches:
+                print(mismatch, file=sys.stderr)
+            if mismatches:
+                return 1
+    for configuration in configurations:
+        output_file_path: str = arguments.output or \
+            get_output_file_path(configuration['election_description'])
+        if arguments.precinct:
+            from electionware.csv import get_output_header, parse_rows, write_rows_to_csv
+            write_rows_to_csv(output_file_path,
+                              get_output_header(configuration['table_processing']),
+                              parse_rows(configuration, precincts=arguments.precinct))
+            continue
+        if arguments.sqlite:
+            from electionware.database import convert_electionware_pdf_to_sqlite
+            row_count: int = convert_electionware_pdf_to_sqlite(configuration, arguments.sqlite)
+            print(f'loaded {row_count} rows into {arguments.sqlite}', file=sys.stderr)
+            continue
+        for discrepancy in convert_electionware_pdf_to_csv(
+                configuration, output_file_path, arguments.aggregate):
+            print(f'discrepancy: {discrepancy}', file=sys.stderr)
+    return 0
+
+
+def diff(configurations: List[Dict[str, Union[Dict, List]]],
+         arguments: argparse.Namespace) -> int:
+    from electionware.csv import get_output_header
+    from electionware.data_source import FileSource
+    from electionware.diff import CONTENT_FINGERPRINT, STRINGS_FINGERPRINT, RowChange, \
+        diff_data_sources, write_row_changes_to_csv
+    old_path, new_path = arguments.diff
+    old_configuration, new_configuration = configurations[0], configurations[-1]
+    # differing page headers or footers change every content stream, so
+    # pages are then matched by their rendered strings instead
+    fingerprint: str = STRINGS_FINGERPRINT if any(
+        old_configuration['page_structure'][field] != new_configuration['page_structure'][field]
+        for field in ('expected_header', 'expected_footer')) else CONTENT_FINGERPRINT
+    changes: List[RowChange] = diff_data_sources(
+        old_configuration, FileSource(old_path), FileSource(new_path), fingerprint,
+        new_configuration)
+    write_row_changes_to_csv(arguments.output,
+                             get_output_header(new_configuration['table_processing']), changes)
+    print(f'{len(changes)} changed rows', file=sys.stderr)
+    return 0
+
+
+def distribute(arguments: argparse.Namespace) -> int:
+    from electionware.job_queue import JobQueueError, enqueue, run_worker, stitch
+    if arguments.enqueue and len(arguments.configurations) != 1:
+        print('--enqueue requires a single configuration', file=sys.stderr)
+        return 2
+    try:
+        if arguments.enqueue:
+            task_count: int = enqueue(arguments.queue, arguments.configurations[0],
+                                      arguments.pages_per_task)
+            print(f'{task_count} tasks queued', file=sys.stderr)
+        if arguments.work:
+            completed: int = run_worker(arguments.queue, lease_seconds=arguments.lease)
+            print(f'{completed} tasks completed', file=sys.stderr)
+        if arguments.stitch:
+            print(f'wrote {stitch(arguments.queue, arguments.output)}', file=sys.stderr)
+    except ConfigurationError as e:
+        print(f'invalid configuration: {e}', file=sys.stderr)
+        return 2
+    except JobQueueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def serve(arguments: argparse.Namespace) -> int:
+    from electionware.server import WorkerPool, create_server
+    worker_pool: WorkerPool = WorkerPool(
+        arguments.workers,
+        arguments.memory_limit * 1024 * 1024 if arguments.memory_limit else None)
+    server = create_server(worker_pool, arguments.socket, arguments.port)
+    print(f'listening on {server.server_address}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        worker_pool.close()
+    return 0
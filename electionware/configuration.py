@@ -0,0 +1,244 @@
+import json
+import os
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+from electionware.data_source import DataSource, FileSource, get_stdin_source
+from electionware.row_filters import RowFilter, DEFAULT_ROW_FILTERS
+from electionware.row_transformers import RowTransformer, DefaultRowTransformer
+
+YAML_EXTENSIONS: tuple = ('.yaml', '.yml')
+STDIN_DATA_SOURCE: str = '-'
+REQUIRED_KEYS: Dict[str, Tuple[str, ...]] = {
+    'election_description': ('county',),
+    'page_structure': ('expected_header', 'expected_footer', 'table_headers',
+                       'has_vote_percent_column'),
+    'table_processing': ('extra_row_transformers', 'extra_row_filters',
+                         'raw_office_to_office_and_district',
+                         'openelections_mapped_header'),
+}
+BASE_OUTPUT_HEADER: list = ['county', 'precinct', 'office',
+                            'district', 'party', 'candidate']
+DETERMINISTIC_MODE: str = 'deterministic'
+SAMPLING_MODE: str = 'sampling'
+# the settings of the profiling (see profiling.PageProfiler) and
+# render_watchdog (see watchdog.RenderWatchdog) entries, with the types
+# that their values must have
+SETTING_TYPES: Dict[str, Dict[str, Tuple[type, ...]]] = {
+    'profiling': {'output_directory': (str,), 'mode': (str,),
+                  'sampling_interval': (int, float), 'pages': (list,),
+                  'slowest': (int,), 'tracemalloc': (bool,)},
+    'render_watchdog': {'timeout': (int, float), 'memory_limit': (int,),
+                        'fallback': (bool,), 'report': (str,)},
+}
+POSITIVE_SETTINGS: Tuple[str, ...] = ('sampling_interval', 'slowest', 'timeout', 'memory_limit')
+# entries that parsing with threads (see threaded.py) cannot honour
+UNSUPPORTED_WITH_THREADS: Tuple[str, ...] = ('profiling', 'render_watchdog')
+
+
+class ConfigurationError(ValueError):
+    """
+    Raised when a configuration dictionary is missing required entries
+    or contains values of the wrong type.
+    """
+
+
+class ConversionPlan(NamedTuple):
+    """
+    An immutable, precomputed form of a configuration dictionary. It is
+    compiled once per conversion and shared by every PageParser and
+    TableParser, so that no per-page or per-table setup is needed.
+    """
+    county: str
+    expected_header: Tuple[str, ...]
+    expected_footer: str
+    expected_table_headers: Tuple[str, ...]
+    expected_table_header_length: int
+    has_vote_percent_column: bool
+    openelections_mapped_header: Tuple[str, ...]
+    row_transformers: Tuple[RowTransformer, ...]
+    row_filters: Tuple[RowFilter, ...]
+
+
+def compile_configuration(configuration: Dict[str, Union[Dict, List]]) -> ConversionPlan:
+    """
+    Given a configuration dictionary, validate it and provide the
+    equivalent ConversionPlan.
+    """
+    _validate_configuration(configuration)
+    election_description: Dict[str, str] = configuration['election_description']
+    page_structure: Dict[str, Union[List, str, bool]] = configuration['page_structure']
+    table_processing: Dict[str, Union[Dict, List]] = configuration['table_processing']
+    expected_table_headers: Tuple[str, ...] = \
+        tuple(' '.join(header) for header in page_structure['table_headers'])
+    try:
+        default_row_transformer: RowTransformer = DefaultRowTransformer(
+            table_processing['raw_office_to_office_and_district'],
+            table_processing.get('office_patterns', ()))
+    except ValueError as e:
+        raise ConfigurationError(str(e))
+    return ConversionPlan(
+        county=election_description['county'],
+        expected_header=tuple(page_structure['expected_header']),
+        expected_footer=page_structure['expected_footer'],
+        expected_table_headers=expected_table_headers,
+        expected_table_header_length=len(expected_table_headers[0]),
+        has_vote_percent_column=bool(page_structure['has_vote_percent_column']),
+        openelections_mapped_header=tuple(table_processing['openelections_mapped_header']),
+        row_transformers=(default_row_transformer,) +
+        tuple(table_processing['extra_row_transformers']),
+        row_filters=tuple(DEFAULT_ROW_FILTERS) +
+        tuple(table_processing['extra_row_filters']))
+
+
+def get_output_header(table_processing: Dict[str, List[str]]) -> List[str]:
+    """
+    Given a table_processing dictionary, provide the header for the csv file that
+    will be written. This includes standard details on the office, candidate, and
+    location of the vote, custom vote-type columns, and the total votes for the
+    given office and candidate.
+    """
+    mapped_header: List[str] = table_processing['openelections_mapped_header']
+    header_suffix: List[str] = [x for x in mapped_header if x != 'votes'] + ['votes']
+    return BASE_OUTPUT_HEADER + header_suffix
+
+
+def _validate_configuration(configuration: Dict[str, Union[Dict, List]]) -> None:
+    for section, keys in REQUIRED_KEYS.items():
+        if not isinstance(configuration.get(section), dict):
+            raise ConfigurationError(f'configuration is missing {section!r}')
+        missing: List[str] = [key for key in keys if key not in configuration[section]]
+        if missing:
+            raise ConfigurationError(f'{section!r} is missing {", ".join(missing)}')
+    if not configuration['page_structure']['table_headers']:
+        raise ConfigurationError("'table_headers' must not be empty")
+    if not configuration['table_processing']['openelections_mapped_header']:
+        raise ConfigurationError("'openelections_mapped_header' must not be empty")
+    table_processing: Dict[str, Union[Dict, List]] = configuration['table_processing']
+    for key, cls in (('extra_row_transformers', RowTransformer),
+                     ('extra_row_filters', RowFilter)):
+        for item in table_processing[key]:
+            if not isinstance(item, cls):
+                raise ConfigurationError(
+                    f'{key!r} must contain {cls.__name__} instances, got {item!r}')
+    output_order: List[str] = configuration.get('output_order') or []
+    output_header: List[str] = get_output_header(table_processing)
+    unknown_fields: List[str] = [field for field in output_order if field not in output_header]
+    if unknown_fields:
+        raise ConfigurationError(
+            f"'output_order' has unknown fields: {', '.join(map(str, unknown_fields))}")
+    for entry in SETTING_TYPES:
+        if configuration.get(entry):
+            _validate_settings(entry, configuration[entry])
+    if configuration.get('threads'):
+        validate_threaded_configuration(configuration)
+
+
+def _validate_settings(entry: str, settings: Dict[str, object]) -> None:
+    if not isinstance(settings, dict):
+        raise ConfigurationError(f'{entry!r} must be a mapping, got {settings!r}')
+    setting_types: Dict[str, Tuple[type, ...]] = SETTING_TYPES[entry]
+    for key, value in settings.items():
+        if key not in setting_types:
+            raise ConfigurationError(f'{entry!r} has an unknown setting {key!r}')
+        types: Tuple[type, ...] = setting_types[key]
+        # bool is an int, but True is no valid timeout
+        if not isinstance(value, types) or isinstance(value, bool) != (bool in types):
+            raise ConfigurationError(
+                f'{entry!r} setting {key!r} must be of type '
+                f'{" or ".join(t.__name__ for t in types)}, got {value!r}')
+        if key in POSITIVE_SETTINGS and value <= 0:
+            raise ConfigurationError(f'{entry!r} setting {key!r} must be positive, got {value!r}')
+    if entry != 'profiling':
+        return
+    if settings.get('mode', DETERMINISTIC_MODE) not in (DETERMINISTIC_MODE, SAMPLING_MODE):
+        raise ConfigurationError(f'unknown profiling mode: {settings["mode"]}')
+    pages: List[int] = settings.get('pages', [1, 1])
+    if len(pages) != 2 or not all(isinstance(page, int) and page >= 1 for page in pages) or \
+            pages[0] > pages[1]:
+        raise ConfigurationError(
+            f"'pages' must be the first and last page to profile, got {pages!r}")
+
+
+def validate_threaded_configuration(configuration: Dict[str, Union[Dict, List]]) -> None:
+    unsupported: List[str] = [entry for entry in UNSUPPORTED_WITH_THREADS
+                              if configuration.get(entry)]
+    if unsupported:
+        raise ConfigurationError(
+            f'{", ".join(map(repr, unsupported))} cannot be used with threads')
+
+
+def load_configuration(path: str) -> Dict[str, Union[Dict, List]]:
+    """
+    Given the path to a JSON or YAML configuration file, provide the
+    equivalent configuration dictionary as described in the README.
+    Data sources are given as file paths (relative paths are resolved
+    against the configuration file's directory, and - reads the PDF from
+    standard input), and extra row transformers and filters are given by
+    class name.
+    """
+    try:
+        with open(path) as f_in:
+            if path.lower().endswith(YAML_EXTENSIONS):
+                raw_configuration: Dict = _load_yaml(f_in)
+            else:
+                raw_configuration = json.load(f_in)
+    except OSError as e:
+        raise ConfigurationError(f'cannot read {path}: {e.strerror}')
+    except json.JSONDecodeError as e:
+        raise ConfigurationError(f'cannot parse {path}: {e}')
+    base_directory: str = os.path.dirname(os.path.abspath(path))
+    return build_configuration(raw_configuration, base_directory)
+
+
+def build_configuration(raw_configuration: Dict[str, Union[Dict, List]],
+                        base_directory: str = '') -> Dict[str, Union[Dict, List]]:
+    """
+    Given a configuration dictionary containing only plain data (as read
+    from a JSON or YAML file), provide a configuration dictionary with
+    DataSource, RowTransformer, and RowFilter instances in place of their
+    names.
+    """
+    # imported here, as the registry raises ConfigurationError
+    from electionware.registry import get_row_filter, get_row_transformer
+    if not isinstance(raw_configuration, dict):
+        raise ConfigurationError('configuration must be a mapping')
+    for key in ('data_source', 'table_processing'):
+        if key not in raw_configuration:
+            raise ConfigurationError(f'configuration is missing {key!r}')
+    configuration: Dict[str, Union[Dict, List]] = dict(raw_configuration)
+    configuration['data_source'] = [
+        _build_data_source(data_source, base_directory)
+        for data_source in raw_configuration['data_source']]
+    table_processing: Dict[str, Union[Dict, List]] = \
+        dict(raw_configuration['table_processing'])
+    table_processing['extra_row_transformers'] = [
+        get_row_transformer(name)
+        for name in table_processing.get('extra_row_transformers', [])]
+    table_processing['extra_row_filters'] = [
+        get_row_filter(name)
+        for name in table_processing.get('extra_row_filters', [])]
+    table_processing['raw_office_to_office_and_district'] = {
+        raw_office: tuple(office_and_district) for raw_office, office_and_district
+        in table_processing.get('raw_office_to_office_and_district', {}).items()}
+    configuration['table_processing'] = table_processing
+    return configuration
+
+
+def _build_data_source(data_source: Union[str, DataSource],
+                       base_directory: str) -> DataSource:
+    if isinstance(data_source, DataSource):
+        return data_source
+    if data_source == STDIN_DATA_SOURCE:
+        return get_stdin_source()
+    return FileSource(os.path.join(base_directory, data_source))
+
+
+def _load_yaml(f_in) -> Dict:
+    try:
+        import yaml
+    except ImportError:
+        raise ConfigurationError('PyYAML is required to read YAML configuration files')
+    try:
+        return yaml.safe_load(f_in)
+    except yaml.YAMLError as e:
+        raise ConfigurationError(f'cannot parse {f_in.name}: {e}')
@@ -1,12 +1,18 @@
 import csv
 import os
-from typing import Dict, List, Union
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Union
 
+from electionware.configuration import BASE_OUTPUT_HEADER, get_output_header  # noqa: F401
+from electionware.index import parse_precincts
 from electionware.parser import DataSourceParser
+from electionware.row_observers import CountyTotalsObserver, RowObserver, \
+    VoteDiscrepancy, VoteReconciliationObserver
+from electionware.sorting import ExternalRowSorter
+from electionware.threaded import ThreadedDataSourceParser
 
 OUTPUT_FILE_FORMAT: str = '{}__{}__{}__{}__precinct.csv'
-BASE_OUTPUT_HEADER: list = ['county', 'precinct', 'office',
-                            'district', 'party', 'candidate']
+PRECINCT_SUFFIX: str = '__precinct.csv'
+COUNTY_SUFFIX: str = '__county.csv'
 
 
 def get_output_file_path(election_description: Dict[str, str]) -> str:
@@ -24,33 +30,87 @@ def get_output_file_path(election_description: Dict[str, str]) -> str:
     return os.path.join('..', yyyymmdd[:4], output_file)
 
 
-def get_output_header(table_processing: Dict[str, List[str]]) -> List[str]:
+def get_county_output_file_path(output_file_path: str) -> str:
     """
-    Given a table_processing dictionary, provide the header for the csv file that
-    will be written. This includes standard details on the office, candidate, and
-    location of the vote, custom vote-type columns, and the total votes for the
-    given office and candidate.
+    Given the file path of a precinct-level csv, provide the file path that the
+    county-level csv will be written to, i.e. with the __precinct.csv suffix
+    replaced by __county.csv.
     """
-    mapped_header: List[str] = table_processing['openelections_mapped_header']
-    header_suffix: List[str] = [x for x in mapped_header if x != 'votes'] + ['votes']
-    return BASE_OUTPUT_HEADER + header_suffix
+    if output_file_path.endswith(PRECINCT_SUFFIX):
+        output_file_path = output_file_path[:-len(PRECINCT_SUFFIX)]
+    else:
+        output_file_path = os.path.splitext(output_file_path)[0]
+    return output_file_path + COUNTY_SUFFIX
 
 
-def write_electionware_pdf_to_csv(configuration: Dict[str, Union[Dict, List]]) -> None:
+def write_electionware_pdf_to_csv(configuration: Dict[str, Union[Dict, List]],
+                                  aggregate: bool = False) -> List[VoteDiscrepancy]:
     """
     Given a configuration dictionary, convert a PDF or collection of PDFs into
     a single csv file written in a standard OpenElections format.
+    If aggregate is set, the same pass also writes county-level totals next to
+    the precinct file and reconciles the rows against the totals stated in the
+    PDF, returning any discrepancies found.
     """
     output_file_path: str = get_output_file_path(configuration['election_description'])
+    return convert_electionware_pdf_to_csv(configuration, output_file_path, aggregate)
+
+
+def convert_electionware_pdf_to_csv(configuration: Dict[str, Union[Dict, List]],
+                                    output_file_path: str,
+                                    aggregate: bool = False) -> List[VoteDiscrepancy]:
+    """
+    As write_electionware_pdf_to_csv, but writing to the given file path.
+    If the configuration has an output_order entry (a list of output fields,
+    e.g. ['precinct', 'office', 'candidate']), rows are sorted on those
+    fields with an external merge sort before being written. If it has a
+    threads entry, pages are parsed by that many threads (see
+    threaded.ThreadedDataSourceParser).
+    """
+    output_header: List[str] = get_output_header(configuration['table_processing'])
+    if not aggregate:
+        write_rows_to_csv(output_file_path, output_header, parse_rows(configuration))
+        return []
+    vote_fields: List[str] = configuration['table_processing']['openelections_mapped_header']
+    county_totals: CountyTotalsObserver = CountyTotalsObserver(vote_fields)
+    reconciliation: VoteReconciliationObserver = VoteReconciliationObserver(vote_fields)
+    write_rows_to_csv(output_file_path, output_header,
+                      parse_rows(configuration, (county_totals, reconciliation)))
+    county_output_header: List[str] = \
+        [field for field in output_header if field != 'precinct']
+    write_rows_to_csv(get_county_output_file_path(output_file_path),
+                      county_output_header, county_totals.rows())
+    return reconciliation.discrepancies()
+
+
+def parse_rows(configuration: Dict[str, Union[Dict, List]],
+               row_observers: Sequence[RowObserver] = (),
+               precincts: Optional[Collection[str]] = None) -> Iterable[Dict[str, str]]:
+    """
+    Given a configuration dictionary, provide its rows as they are written
+    to the csv: parsed by threads if it has a threads entry, and sorted if
+    it has an output_order entry. Row observers, if given, see every row
+    as it is parsed. If precincts are given, only the rows of those
+    precincts are parsed (see index.parse_precincts), without threads.
+    """
+    rows: Iterable[Dict[str, str]]
+    if precincts is not None:
+        rows = parse_precincts(configuration, precincts, row_observers)
+    elif configuration.get('threads'):
+        rows = ThreadedDataSourceParser(configuration, row_observers,
+                                        workers=configuration['threads'])
+    else:
+        rows = DataSourceParser(configuration, row_observers)
+    if not configuration.get('output_order'):
+        return rows
     output_header: List[str] = get_output_header(configuration['table_processing'])
-    parser: DataSourceParser = DataSourceParser(configuration)
-    _write_electionware_pdf_to_csv(output_file_path, output_header, parser)
+    return ExternalRowSorter(output_header, configuration['output_order']).sort(rows)
 
 
-def _write_electionware_pdf_to_csv(output_file_path: str, output_header: List[str],
-                                   parser: DataSourceParser) -> None:
+def write_rows_to_csv(output_file_path: str, output_header: List[str],
+                      rows: Iterable[Dict[str, str]]) -> None:
     with open(output_file_path, 'w', newline='') as f_out:
         csv_writer: csv.DictWriter = csv.DictWriter(f_out, output_header)
         csv_writer.writeheader()
-        for row in parser:
+        for row in rows:
             csv_writer.writerow(row)
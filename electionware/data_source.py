@@ -1,5 +1,14 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
 from abc import abstractmethod
-from typing import IO
+from typing import IO, Dict, List, NamedTuple, Optional
+
+DEFAULT_SPOOL_THRESHOLD: int = 64 << 20
+DEFAULT_CHUNK_SIZE: int = 1 << 20
 
 
 class DataSource:
@@ -20,3 +29,178 @@ class FileSource(DataSource):
 
     def get_file_like_object(self) -> IO:
         return open(self._filename, 'rb')
+
+
+class StreamMetrics(NamedTuple):
+    bytes_read: int
+    seconds: float
+    spooled_to_disk: bool
+    complete: bool
+
+    def get_throughput(self) -> float:
+        """
+        Bytes read per second.
+        """
+        return self.bytes_read / self.seconds if self.seconds else 0.0
+
+
+class StreamSource(DataSource):
+    """
+    Loader of a PDF from any readable binary stream, e.g. a pipe, stdin,
+    or an HTTP response, which need not be seekable. pdfreader has to jump
+    to the cross-reference table at the end of a PDF, so the stream is
+    spooled: into memory up to spool_threshold bytes, then into a
+    temporary file. Every call to get_file_like_object provides a new
+    seekable reader of the spooled content.
+
+    No page can be read before the stream has ended, so by default the
+    stream is read on a background thread from construction on, which
+    overlaps reading it with the processing of earlier data sources;
+    get_file_like_object blocks until the stream has been read. Read
+    progress and throughput are available from get_metrics().
+
+    A StreamSource can be pickled (e.g. to be sent to preflight worker
+    processes) once its stream has been read; the copies share the spool
+    file, which only the original removes.
+    """
+    def __init__(self, stream: IO, name: str = '<stream>',
+                 spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, prefetch: bool = True):
+        self._stream: IO = stream
+        self._name: str = name
+        self._spool_threshold: int = spool_threshold
+        self._chunk_size: int = chunk_size
+        self._spool_lock: threading.Lock = threading.Lock()
+        self._metrics_lock: threading.Lock = threading.Lock()
+        self._spooled: bool = False
+        self._content: bytes = b''
+        self._spool_path: Optional[str] = None
+        self._error: Optional[BaseException] = None
+        self._bytes_read: int = 0
+        self._start_time: Optional[float] = None
+        self._end_time: Optional[float] = None
+        self._reader: Optional[threading.Thread] = None
+        self._owns_spool_file: bool = True
+        if prefetch:
+            self._reader = threading.Thread(
+                target=self._spool, name=f'StreamSource {name}', daemon=True)
+            self._reader.start()
+
+    def get_file_like_object(self) -> IO:
+        if self._reader is not None:
+            self._reader.join()
+        else:
+            with self._spool_lock:
+                if not self._spooled:
+                    self._spool()
+        if self._error is not None:
+            raise self._error
+        if self._spool_path is None:
+            return _NamedBytesIO(self._content, self._name)
+        return _NamedBufferedReader(io.FileIO(self._spool_path), self._name)
+
+    def get_metrics(self) -> StreamMetrics:
+        with self._metrics_lock:
+            if self._start_time is None:
+                return StreamMetrics(0, 0.0, False, False)
+            end_time: float = self._end_time or time.perf_counter()
+            return StreamMetrics(self._bytes_read, end_time - self._start_time,
+                                 self._spool_path is not None,
+                                 self._end_time is not None and self._error is None)
+
+    def close(self) -> None:
+        """
+        Remove the temporary spool file, if any. Readers that are still
+        open keep working until they are closed.
+        """
+        if self._reader is not None:
+            self._reader.join()
+        if self._owns_spool_file and self._spool_path is not None and \
+                os.path.exists(self._spool_path):
+            os.remove(self._spool_path)
+
+    def __del__(self) -> None:
+        spool_path: Optional[str] = getattr(self, '_spool_path', None)
+        if getattr(self, '_owns_spool_file', False) and spool_path is not None \
+                and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    def __getstate__(self) -> Dict[str, object]:
+        self.get_file_like_object().close()
+        state: Dict[str, object] = dict(self.__dict__)
+        for unpicklable in ('_stream', '_spool_lock', '_metrics_lock', '_reader'):
+            state[unpicklable] = None
+        state['_owns_spool_file'] = False
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._spool_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+
+    def _spool(self) -> None:
+        with self._metrics_lock:
+            self._start_time = time.perf_counter()
+        chunks: List[bytes] = []
+        spool_file: Optional[IO] = None
+        bytes_read: int = 0
+        try:
+            for chunk in iter(lambda: self._stream.read(self._chunk_size), b''):
+                if spool_file is None and bytes_read + len(chunk) > self._spool_threshold:
+                    file_descriptor, spool_path = tempfile.mkstemp(
+                        prefix='electionware-', suffix='.pdf')
+                    spool_file = open(file_descriptor, 'wb')
+                    spool_file.writelines(chunks)
+                    chunks = []
+                    with self._metrics_lock:
+                        self._spool_path = spool_path
+                if spool_file is None:
+                    chunks.append(chunk)
+                else:
+                    spool_file.write(chunk)
+                bytes_read += len(chunk)
+                with self._metrics_lock:
+                    self._bytes_read = bytes_read
+            self._content = b''.join(chunks)
+        except Exception as e:
+            self._error = e
+        finally:
+            if spool_file is not None:
+                spool_file.close()
+            self._spooled = True
+            with self._metrics_lock:
+                self._end_time = time.perf_counter()
+
+
+def get_stdin_source() -> StreamSource:
+    """
+    Provide the StreamSource of standard input. It is shared by every
+    configuration that reads standard input, and only starts reading it
+    when a reader is first requested, so that loading a configuration
+    (e.g. to validate it) never consumes standard input.
+    """
+    global _stdin_source
+    with _stdin_source_lock:
+        if _stdin_source is None:
+            _stdin_source = StreamSource(sys.stdin.buffer, '<stdin>', prefetch=False)
+        return _stdin_source
+
+
+_stdin_source: Optional[StreamSource] = None
+_stdin_source_lock: threading.Lock = threading.Lock()
+
+
+class _NamedBytesIO(io.BytesIO):
+    def __init__(self, initial_bytes: bytes, name: str):
+        super().__init__(initial_bytes)
+        self.name: str = name
+
+
+class _NamedBufferedReader(io.BufferedReader):
+    def __init__(self, raw: io.RawIOBase, name: str):
+        super().__init__(raw)
+        self._name: str = name
+
+    @property
+    def name(self) -> str:
+        return self._name
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from electionware.csv import BASE_OUTPUT_HEADER, get_output_file_path, get_output_header, \
+    parse_rows
+
+DEFAULT_BATCH_SIZE: int = 50000
+INDEXED_FIELDS: Tuple[str, ...] = ('precinct', 'office')
+LOADING_SUFFIX: str = '__loading'
+BULK_LOAD_PRAGMAS: Tuple[str, ...] = ('PRAGMA synchronous = OFF',
+                                      'PRAGMA temp_store = MEMORY',
+                                      'PRAGMA cache_size = -65536')
+
+
+def get_table_name(election_description: Dict[str, str]) -> str:
+    """
+    Given an election_description dictionary, provide the name of the table
+    the rows are loaded into, i.e. the csv file name without its extension,
+    e.g. 20201103__pa__general__adams__precinct.
+    """
+    output_file_path: str = get_output_file_path(election_description)
+    return os.path.splitext(os.path.basename(output_file_path))[0]
+
+
+def convert_electionware_pdf_to_sqlite(configuration: Dict[str, Union[Dict, List]],
+                                       database_path: str, table_name: str = None,
+                                       batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    As convert_electionware_pdf_to_csv, but loading the rows into a table
+    of a SQLite database instead of writing a csv. The table is named after
+    the csv file by default and replaces any previous table of that name.
+    Provides the number of rows loaded.
+    """
+    output_header: List[str] = get_output_header(configuration['table_processing'])
+    rows: Iterable[Dict[str, str]] = parse_rows(configuration)
+    return _write_rows_to_sqlite(
+        database_path, table_name or get_table_name(configuration['election_description']),
+        output_header, rows, batch_size)
+
+
+def _write_rows_to_sqlite(database_path: str, table_name: str, output_header: List[str],
+                          rows: Iterable[Dict[str, str]],
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    # rows are loaded into a staging table in batches of batch_size rows per
+    # transaction, with syncing relaxed for the duration of the load; the
+    # journal mode is left as it is, so that a WAL database stays in WAL
+    # mode and a crashed load can be rolled back. Syncing is restored
+    # before the staging table replaces the previous table and the indexes
+    # are built, in a single durable transaction
+    loading_table_name: str = table_name + LOADING_SUFFIX
+    connection: sqlite3.Connection = sqlite3.connect(database_path, isolation_level=None)
+    try:
+        synchronous: int = connection.execute('PRAGMA synchronous').fetchone()[0]
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.execute(pragma)
+        connection.execute(f'DROP TABLE IF EXISTS {_quote(loading_table_name)}')
+        connection.execute(f'CREATE TABLE {_quote(loading_table_name)} '
+                           f'({", ".join(_column_definitions(output_header))})')
+        insert: str = (f'INSERT INTO {_quote(loading_table_name)} '
+                       f'VALUES ({", ".join("?" for _ in output_header)})')
+        records: Iterator[Tuple] = (tuple(row.get(field) for field in output_header)
+                                    for row in rows)
+        row_count: int = 0
+        while True:
+            batch: List[Tuple] = list(islice(records, batch_size))
+            if not batch:
+                break
+            connection.execute('BEGIN')
+            connection.executemany(insert, batch)
+            connection.execute('COMMIT')
+            row_count += len(batch)
+        connection.execute(f'PRAGMA synchronous = {synchronous}')
+        connection.execute('BEGIN')
+        connection.execute(f'DROP TABLE IF EXISTS {_quote(table_name)}')
+        connection.execute(f'ALTER TABLE {_quote(loading_table_name)} '
+                           f'RENAME TO {_quote(table_name)}')
+        for field in INDEXED_FIELDS:
+            connection.execute(f'CREATE INDEX {_quote(f"{table_name}__{field}")} '
+                               f'ON {_quote(table_name)} ({_quote(field)})')
+        connection.execute('COMMIT')
+    finally:
+        connection.close()
+    return row_count
+
+
+def _column_definitions(output_header: List[str]) -> List[str]:
+    # district values mix ints and strings, so that column has no type
+    # affinity and keeps both as they are
+    definitions: List[str] = []
+    for field in output_header:
+        if field == 'district':
+            definitions.append(_quote(field))
+        elif field in BASE_OUTPUT_HEADER:
+            definitions.append(f'{_quote(field)} TEXT')
+        else:
+            definitions.append(f'{_quote(field)} INTEGER')
+    return definitions
+
+
+def _quote(identifier: str) -> str:
+    return '"{}"'.format(identifier.replace('"', '""'))
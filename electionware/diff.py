@@ -0,0 +1,210 @@
+import csv
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from electionware.configuration import ConversionPlan, compile_configuration
+from electionware.data_source import DataSource
+from electionware.parser import ElectionwareStringIterator, PageParser
+from electionware.pdf import PDFPageIterator, PDFStrings
+from electionware.watchdog import RenderedPage, extract_content_strings
+
+KEY_FIELDS: Tuple[str, ...] = ('precinct', 'office', 'district', 'party', 'candidate')
+CONTENT_FINGERPRINT: str = 'content'
+STRINGS_FINGERPRINT: str = 'strings'
+
+RowKey = Tuple
+
+
+class RowChange(NamedTuple):
+    """
+    A row-level difference between two versions of a results PDF. change
+    is 'added', 'removed' or 'changed'; old_row is None for added rows
+    and new_row is None for removed rows.
+    The key is (precinct, office, district, party, candidate, occurrence),
+    where occurrence numbers the parsed rows that share the same other
+    fields, in document order.
+    """
+    change: str
+    key: RowKey
+    old_row: Optional[Dict[str, str]]
+    new_row: Optional[Dict[str, str]]
+
+
+def fingerprint_page(page: PDFStrings, fingerprint: str = CONTENT_FINGERPRINT,
+                     plan: Optional[ConversionPlan] = None) -> str:
+    """
+    Given a page, provide a digest that is equal for identical pages. The
+    content fingerprint hashes the page's raw content stream; the strings
+    fingerprint hashes the strings shown by the content stream's text
+    operators (see watchdog.extract_content_strings), which is unaffected
+    by how the text is positioned. Neither renders the page. Given the plan
+    the page is parsed with, the strings fingerprint leaves out the page
+    header and footer, so that pages of versions whose headers differ (e.g.
+    UNOFFICIAL and OFFICIAL RESULTS) can still match.
+    """
+    if fingerprint == STRINGS_FINGERPRINT:
+        return _fingerprint_strings(extract_content_strings(page.get_content_stream()), plan)
+    return hashlib.sha256(page.get_content_stream()).hexdigest()
+
+
+def fingerprint_pages(data_source: DataSource, fingerprint: str = CONTENT_FINGERPRINT,
+                      plan: Optional[ConversionPlan] = None) -> List[str]:
+    return [page_fingerprint for page_fingerprint, _
+            in _fingerprint_pages(data_source, fingerprint, plan)]
+
+
+def diff_data_sources(configuration: Dict[str, Union[Dict, List]],
+                      old_data_source: DataSource, new_data_source: DataSource,
+                      fingerprint: str = CONTENT_FINGERPRINT,
+                      new_configuration: Optional[Dict[str, Union[Dict, List]]] = None
+                      ) -> List[RowChange]:
+    """
+    Given a configuration dictionary and two versions of the same results PDF
+    (e.g. unofficial and official results), provide the rows that were added,
+    removed, or whose votes changed. Pages are fingerprinted first, and only
+    the pages whose fingerprint does not appear in the other version are
+    parsed; unchanged pages are never rendered. With the strings
+    fingerprint, no page is rendered at all: the changed pages are parsed
+    from the strings extracted for their fingerprints.
+
+    If the new version needs a different configuration, e.g. because its
+    expected_header or expected_footer differ, pass it as new_configuration.
+    Differing headers or footers change every page's content stream, so
+    use the strings fingerprint then to still skip the unchanged pages.
+
+    Rows are matched by (precinct, office, district, party, candidate):
+    among the parsed rows that share these fields, rows with identical
+    votes are paired first and the rest are paired in document order, so
+    a repeated key split across changed and unchanged pages does not show
+    up as a spurious addition and removal.
+    """
+    old_plan: ConversionPlan = compile_configuration(configuration)
+    new_plan: ConversionPlan = compile_configuration(new_configuration) \
+        if new_configuration is not None else old_plan
+    old_pages: List[Tuple[str, Optional[List[str]]]] = \
+        list(_fingerprint_pages(old_data_source, fingerprint, old_plan))
+    new_pages: List[Tuple[str, Optional[List[str]]]] = \
+        list(_fingerprint_pages(new_data_source, fingerprint, new_plan))
+    old_fingerprints: List[str] = [page_fingerprint for page_fingerprint, _ in old_pages]
+    new_fingerprints: List[str] = [page_fingerprint for page_fingerprint, _ in new_pages]
+    old_rows: Dict[RowKey, List[Dict[str, str]]] = _parse_keyed_rows(
+        old_plan, old_data_source, _changed_pages(old_fingerprints, new_fingerprints),
+        [strings for _, strings in old_pages])
+    new_rows: Dict[RowKey, List[Dict[str, str]]] = _parse_keyed_rows(
+        new_plan, new_data_source, _changed_pages(new_fingerprints, old_fingerprints),
+        [strings for _, strings in new_pages])
+    changes: List[RowChange] = []
+    removals: List[RowChange] = []
+    for key in dict.fromkeys(list(new_rows) + list(old_rows)):
+        key_changes, key_removals = _diff_rows(
+            key, old_rows.get(key, []), new_rows.get(key, []),
+            new_plan.openelections_mapped_header)
+        changes += key_changes
+        removals += key_removals
+    return changes + removals
+
+
+def write_row_changes_to_csv(output_file_path: str, output_header: Sequence[str],
+                             changes: Sequence[RowChange]) -> None:
+    """
+    Write row changes as csv: a change column, the fields of the new row (or
+    of the old row, for removed rows), and previous_* columns with the old
+    vote counts.
+    """
+    vote_fields: List[str] = [field for field in output_header if field not in KEY_FIELDS
+                              and field != 'county']
+    header: List[str] = ['change'] + list(output_header) + \
+        [f'previous_{field}' for field in vote_fields]
+    with open(output_file_path, 'w', newline='') as f_out:
+        csv_writer: csv.DictWriter = csv.DictWriter(f_out, header)
+        csv_writer.writeheader()
+        for change in changes:
+            row: Dict[str, str] = dict(change.new_row or change.old_row, change=change.change)
+            if change.old_row is not None:
+                row.update((f'previous_{field}', change.old_row[field])
+                           for field in vote_fields if field in change.old_row)
+            csv_writer.writerow(row)
+
+
+def _fingerprint_pages(data_source: DataSource, fingerprint: str,
+                       plan: Optional[ConversionPlan]
+                       ) -> Iterator[Tuple[str, Optional[List[str]]]]:
+    # each page's fingerprint, with the strings it was computed from for the
+    # strings fingerprint, so that changed pages need not be rendered
+    with data_source.get_file_like_object() as f_obj:
+        for page in PDFPageIterator(f_obj=f_obj):
+            if fingerprint == STRINGS_FINGERPRINT:
+                strings: List[str] = extract_content_strings(page.get_content_stream())
+                yield _fingerprint_strings(strings, plan), strings
+            else:
+                yield fingerprint_page(page, fingerprint, plan), None
+
+
+def _fingerprint_strings(strings: List[str], plan: Optional[ConversionPlan]) -> str:
+    if plan is not None:
+        strings = _strip_header_and_footer(plan, strings)
+    return hashlib.sha256('\0'.join(strings).encode()).hexdigest()
+
+
+def _strip_header_and_footer(plan: ConversionPlan, strings: List[str]) -> List[str]:
+    header_length: int = len(plan.expected_header) \
+        if tuple(strings[:len(plan.expected_header)]) == plan.expected_header else 0
+    return [s for s in strings[header_length:]
+            if not s.startswith(plan.expected_footer)
+            and not s.startswith(ElectionwareStringIterator.ELECTIONWARE_FOOTER)]
+
+
+def _changed_pages(fingerprints: List[str], other_fingerprints: List[str]) -> List[int]:
+    # a page is unchanged if an identical page is left in the other version,
+    # so that a duplicated page counts as changed
+    unmatched: Counter = Counter(other_fingerprints)
+    page_numbers: List[int] = []
+    for page_number, page_fingerprint in enumerate(fingerprints, 1):
+        if unmatched[page_fingerprint]:
+            unmatched[page_fingerprint] -= 1
+        else:
+            page_numbers.append(page_number)
+    return page_numbers
+
+
+def _parse_keyed_rows(plan: ConversionPlan, data_source: DataSource, page_numbers: List[int],
+                      page_strings: Sequence[Optional[List[str]]]
+                      ) -> Dict[RowKey, List[Dict[str, str]]]:
+    rows: Dict[RowKey, List[Dict[str, str]]] = {}
+    if not page_numbers:
+        return rows
+    with data_source.get_file_like_object() as f_obj:
+        pages: Iterable[PDFStrings] = PDFPageIterator(f_obj=f_obj, page_numbers=page_numbers) \
+            if page_strings[page_numbers[0] - 1] is None else \
+            (RenderedPage(page_number, page_strings[page_number - 1], b'')
+             for page_number in page_numbers)
+        for page in pages:
+            for row in PageParser(plan, page):
+                rows.setdefault(tuple(row[field] for field in KEY_FIELDS), []).append(row)
+    return rows
+
+
+def _diff_rows(key: RowKey, old_rows: List[Dict[str, str]], new_rows: List[Dict[str, str]],
+               vote_fields: Sequence[str]) -> Tuple[List[RowChange], List[RowChange]]:
+    # the same key can legitimately appear more than once (e.g. a contest
+    # continued on the next page); unchanged rows are paired up first, then
+    # the remaining rows in order of appearance
+    unmatched_old_rows: List[Tuple[int, Dict[str, str]]] = list(enumerate(old_rows))
+    unmatched_new_rows: List[Tuple[int, Dict[str, str]]] = []
+    for occurrence, new_row in enumerate(new_rows):
+        for i, (_, old_row) in enumerate(unmatched_old_rows):
+            if all(old_row.get(field) == new_row.get(field) for field in vote_fields):
+                del unmatched_old_rows[i]
+                break
+        else:
+            unmatched_new_rows.append((occurrence, new_row))
+    changes: List[RowChange] = [
+        RowChange('changed', key + (occurrence,), old_row, new_row)
+        for (_, old_row), (occurrence, new_row) in zip(unmatched_old_rows, unmatched_new_rows)]
+    changes += [RowChange('added', key + (occurrence,), None, new_row)
+                for occurrence, new_row in unmatched_new_rows[len(unmatched_old_rows):]]
+    removals: List[RowChange] = [
+        RowChange('removed', key + (occurrence,), old_row, None)
+        for occurrence, old_row in unmatched_old_rows[len(unmatched_new_rows):]]
+    return changes, removals
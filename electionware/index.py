@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+from typing import Collection, Dict, Iterator, List, Sequence, Tuple, Union
+
+from electionware.configuration import ConversionPlan, compile_configuration
+from electionware.data_source import DataSource
+from electionware.parser import PageParser
+from electionware.pdf import PDFPageIterator
+from electionware.row_observers import RowObserver
+
+DEFAULT_INDEX_DIRECTORY: str = '.electionware_index'
+HASH_CHUNK_SIZE: int = 1 << 20
+# the configuration sections that decide which precinct and offices a
+# page is indexed under
+INDEXED_SECTIONS: Tuple[str, ...] = ('page_structure', 'table_processing')
+
+
+def hash_data_source(data_source: DataSource) -> str:
+    """
+    Given a DataSource, provide the SHA-256 hex digest of its contents,
+    which identifies the PDF independently of its file name.
+    """
+    digest = hashlib.sha256()
+    with data_source.get_file_like_object() as f_obj:
+        for chunk in iter(lambda: f_obj.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_configuration(configuration: Dict[str, Union[Dict, List]]) -> str:
+    """
+    Given a configuration dictionary, provide the SHA-256 hex digest of the
+    parts of it that a page index depends on, i.e. the page structure and
+    the table processing (office mapping, row transformers and filters).
+    Row transformers and filters are identified by their class.
+    """
+    relevant: Dict[str, Union[Dict, List]] = \
+        {section: configuration.get(section) for section in INDEXED_SECTIONS}
+    text: str = json.dumps(relevant, sort_keys=True, default=lambda value: (
+        f'{type(value).__module__}.{type(value).__qualname__}'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def build_page_index(plan: ConversionPlan,
+                     data_source: DataSource) -> List[Dict[str, Union[int, str, List]]]:
+    """
+    Given a ConversionPlan and a DataSource, parse every page and provide,
+    for each page, its page number, precinct, and the offices it reports.
+    """
+    page_index: List[Dict[str, Union[int, str, List]]] = []
+    with data_source.get_file_like_object() as f_obj:
+        for page in PDFPageIterator(f_obj=f_obj):
+            page_parser: PageParser = PageParser(plan, page)
+            offices: Dict[str, None] = dict.fromkeys(row['office'] for row in page_parser)
+            page_index.append({'page': page.get_page_number(),
+                               'precinct': page_parser.get_precinct(),
+                               'offices': list(offices)})
+    return page_index
+
+
+def load_page_index(configuration: Dict[str, Union[Dict, List]],
+                    data_source: DataSource,
+                    plan: ConversionPlan = None) -> List[Dict[str, Union[int, str, List]]]:
+    """
+    Given a configuration dictionary and one of its data sources, provide
+    the page index of the data source, reading it from the sidecar index
+    file keyed by the PDF's hash and the configuration's hash (see
+    hash_configuration) if there is one and building and saving it
+    otherwise. The sidecar directory is the configuration's index_directory
+    entry, or .electionware_index by default.
+    """
+    index_directory: str = configuration.get('index_directory', DEFAULT_INDEX_DIRECTORY)
+    pdf_hash: str = hash_data_source(data_source)
+    configuration_hash: str = hash_configuration(configuration)
+    index_path: str = os.path.join(index_directory, f'{pdf_hash}-{configuration_hash}.json')
+    if os.path.exists(index_path):
+        with open(index_path) as f_in:
+            return json.load(f_in)['pages']
+    page_index: List[Dict[str, Union[int, str, List]]] = build_page_index(
+        plan or compile_configuration(configuration), data_source)
+    os.makedirs(index_directory, exist_ok=True)
+    temporary_path: str = f'{index_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as f_out:
+        json.dump({'sha256': pdf_hash, 'configuration_sha256': configuration_hash,
+                   'pages': page_index}, f_out)
+    os.replace(temporary_path, index_path)
+    return page_index
+
+
+def build_index(configuration: Dict[str, Union[Dict, List]]) -> None:
+    """
+    Given a configuration dictionary, make sure that every data source has
+    a sidecar page index.
+    """
+    plan: ConversionPlan = compile_configuration(configuration)
+    for data_source in configuration['data_source']:
+        load_page_index(configuration, data_source, plan)
+
+
+def parse_precincts(configuration: Dict[str, Union[Dict, List]],
+                    precincts: Collection[str],
+                    row_observers: Sequence[RowObserver] = ()) -> Iterator[Dict[str, str]]:
+    """
+    Given a configuration dictionary and a collection of precinct names,
+    provide the rows of those precincts only. Only the pages that the
+    sidecar index maps to the precincts are rendered and parsed; the index
+    is built on first use. Row observers, if given, see every parsed row.
+    """
+    plan: ConversionPlan = compile_configuration(configuration)
+    precincts = set(precincts)
+    for data_source in configuration['data_source']:
+        page_numbers: List[int] = [
+            entry['page'] for entry in load_page_index(configuration, data_source, plan)
+            if entry['precinct'] in precincts]
+        if not page_numbers:
+            continue
+        with data_source.get_file_like_object() as f_obj:
+            for page in PDFPageIterator(f_obj=f_obj, page_numbers=page_numbers):
+                yield from PageParser(plan, page, row_observers)
@@ -0,0 +1,314 @@
+import csv
+import os
+import socket
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pdfreader import SimplePDFViewer
+
+from electionware.configuration import ConversionPlan, compile_configuration, \
+    load_configuration
+from electionware.csv import get_output_file_path, get_output_header
+from electionware.data_source import DataSource
+from electionware.parser import PageParser
+from electionware.pdf import PDFPageIterator, get_page_count
+
+DEFAULT_PAGES_PER_TASK: int = 25
+DEFAULT_LEASE_SECONDS: float = 300.0
+DEFAULT_MAX_ATTEMPTS: int = 3
+DEFAULT_POLL_INTERVAL: float = 5.0
+PARTS_SUFFIX: str = '.parts'
+
+SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY,
+    data_source INTEGER NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+'''
+
+
+class JobQueueError(RuntimeError):
+    """
+    Raised when a job queue cannot be used as asked, e.g. when stitching
+    a queue whose tasks are not all done.
+    """
+
+
+class Task(NamedTuple):
+    """
+    A range of pages (1-based, inclusive) of one of a configuration's
+    data sources, given by its index in the data_source list.
+    """
+    task_id: int
+    data_source: int
+    first_page: int
+    last_page: int
+
+    def get_page_numbers(self) -> range:
+        return range(self.first_page, self.last_page + 1)
+
+
+class JobQueue:
+    """
+    A queue of page-range tasks stored in a SQLite file, so that workers
+    on any machine that can open the file (e.g. on a shared file system
+    with working locks) can take part in a conversion without any
+    external service.
+
+    A worker claims a task by leasing it for lease_seconds, renews the
+    lease while it works, and marks the task done once its partial csv
+    has been written. If a worker crashes, its lease expires and the
+    task is leased to the next worker that asks; a task whose lease has
+    expired max_attempts times is marked failed.
+    """
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self._connection: sqlite3.Connection = \
+            sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.executescript(SCHEMA)
+        self._lease_seconds: float = lease_seconds
+        self._max_attempts: int = max_attempts
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def get_setting(self, name: str) -> str:
+        row: Optional[Tuple[str]] = self._connection.execute(
+            'SELECT value FROM settings WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise JobQueueError(f'the job queue has no {name} setting; '
+                                f'has the configuration been enqueued?')
+        return row[0]
+
+    def add_tasks(self, settings: Dict[str, str],
+                  tasks: List[Tuple[int, int, int]]) -> None:
+        """
+        Given the queue's settings and a list of (data source index, first
+        page, last page) tuples, add a pending task for each tuple.
+        """
+        with self._transaction():
+            if self._connection.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]:
+                raise JobQueueError('the job queue already has tasks')
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)',
+                settings.items())
+            self._connection.executemany(
+                'INSERT INTO tasks (data_source, first_page, last_page) VALUES (?, ?, ?)',
+                tasks)
+
+    def claim(self, worker: str) -> Optional[Task]:
+        """
+        Lease the first task that is pending or whose lease has expired to
+        the given worker, or provide None if there is none.
+        """
+        now: float = time.time()
+        with self._transaction():
+            self._connection.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired ' || attempts || ' times' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self._max_attempts))
+            row: Optional[Tuple[int, int, int, int]] = self._connection.execute(
+                'SELECT task_id, data_source, first_page, last_page FROM tasks '
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                'ORDER BY task_id LIMIT 1', (now,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                'attempts = attempts + 1 WHERE task_id = ?',
+                (worker, now + self._lease_seconds, row[0]))
+        return Task(*row)
+
+    def renew(self, task: Task, worker: str) -> bool:
+        """
+        Extend the worker's lease on the task; provides False if the
+        lease has been lost to another worker.
+        """
+        return self._update_leased(task, worker, 'lease_expires = ?',
+                                   time.time() + self._lease_seconds)
+
+    def complete(self, task: Task, worker: str) -> bool:
+        return self._update_leased(task, worker, "status = 'done'")
+
+    def fail(self, task: Task, worker: str, error: str) -> bool:
+        return self._update_leased(task, worker, "status = 'failed', error = ?", error)
+
+    def get_status_counts(self) -> Dict[str, int]:
+        return dict(self._connection.execute(
+            'SELECT status, COUNT(*) FROM tasks GROUP BY status'))
+
+    def get_failures(self) -> List[Tuple[Task, str]]:
+        return [(Task(*row[:4]), row[4]) for row in self._connection.execute(
+            'SELECT task_id, data_source, first_page, last_page, error FROM tasks '
+            "WHERE status = 'failed' ORDER BY task_id")]
+
+    def get_tasks(self) -> List[Task]:
+        return [Task(*row) for row in self._connection.execute(
+            'SELECT task_id, data_source, first_page, last_page FROM tasks ORDER BY task_id')]
+
+    def get_part_path(self, task: Task) -> str:
+        return os.path.join(self.get_setting('parts_directory'),
+                            f'task-{task.task_id:06d}.csv')
+
+    def _update_leased(self, task: Task, worker: str, assignment: str, *values: object) -> bool:
+        with self._transaction():
+            cursor: sqlite3.Cursor = self._connection.execute(
+                f'UPDATE tasks SET {assignment} '
+                "WHERE task_id = ? AND status = 'leased' AND worker = ?",
+                (*values, task.task_id, worker))
+        return cursor.rowcount == 1
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+
+def enqueue(queue_path: str, configuration_path: str,
+            pages_per_task: int = DEFAULT_PAGES_PER_TASK) -> int:
+    """
+    Given a job queue path and the path to a configuration file, split
+    each of the configuration's data sources into tasks of up to
+    pages_per_task consecutive pages and add them to the queue. Workers
+    load the configuration from the same path, so it must be reachable
+    from every node. Provides the number of tasks added.
+    """
+    configuration_path = os.path.abspath(configuration_path)
+    configuration: Dict[str, Union[Dict, List]] = load_configuration(configuration_path)
+    compile_configuration(configuration)
+    tasks: List[Tuple[int, int, int]] = []
+    for i, data_source in enumerate(configuration['data_source']):
+        with data_source.get_file_like_object() as f_obj:
+            page_count: int = get_page_count(SimplePDFViewer(f_obj))
+        for first_page in range(1, page_count + 1, pages_per_task):
+            tasks.append((i, first_page, min(first_page + pages_per_task - 1, page_count)))
+    job_queue: JobQueue = JobQueue(queue_path)
+    try:
+        job_queue.add_tasks({'configuration_path': configuration_path,
+                             'parts_directory': os.path.abspath(queue_path) + PARTS_SUFFIX},
+                            tasks)
+    finally:
+        job_queue.close()
+    return len(tasks)
+
+
+def run_worker(queue_path: str, worker: str = None,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               poll_interval: float = DEFAULT_POLL_INTERVAL) -> int:
+    """
+    Given a job queue path, claim and run tasks until none are left,
+    writing each task's rows to a partial csv in the queue's parts
+    directory. While other workers still hold leases, the worker polls
+    every poll_interval seconds in case one of them crashes. A task that
+    raises an error is marked failed with the error message. Provides
+    the number of tasks this worker completed.
+    """
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    job_queue: JobQueue = JobQueue(queue_path, lease_seconds)
+    try:
+        configuration: Dict[str, Union[Dict, List]] = \
+            load_configuration(job_queue.get_setting('configuration_path'))
+        plan: ConversionPlan = compile_configuration(configuration)
+        output_header: List[str] = get_output_header(configuration['table_processing'])
+        os.makedirs(job_queue.get_setting('parts_directory'), exist_ok=True)
+        completed: int = 0
+        while True:
+            task: Optional[Task] = job_queue.claim(worker)
+            if task is None:
+                if not job_queue.get_status_counts().get('leased'):
+                    return completed
+                time.sleep(poll_interval)
+                continue
+            data_source: DataSource = configuration['data_source'][task.data_source]
+            try:
+                if _run_task(job_queue, task, worker, plan, data_source, output_header,
+                             lease_seconds / 3):
+                    completed += 1
+            except Exception as e:
+                job_queue.fail(task, worker, f'{type(e).__name__}: {e}')
+    finally:
+        job_queue.close()
+
+
+def stitch(queue_path: str, output_file_path: str = None) -> str:
+    """
+    Given the path of a job queue whose tasks are all done, concatenate
+    the partial csvs in data source and page order into a single csv, at
+    output_file_path or at the path derived from the configuration's
+    election_description. The configuration's output_order is not
+    applied. Provides the path written.
+    """
+    job_queue: JobQueue = JobQueue(queue_path)
+    try:
+        unfinished: Dict[str, int] = {status: count for status, count
+                                      in job_queue.get_status_counts().items()
+                                      if status != 'done'}
+        if unfinished:
+            failures: List[str] = [f'pages {task.first_page}-{task.last_page} of data source '
+                                   f'{task.data_source}: {error}'
+                                   for task, error in job_queue.get_failures()]
+            raise JobQueueError('cannot stitch, tasks are not done: ' + ', '.join(
+                f'{count} {status}' for status, count in sorted(unfinished.items())) +
+                ''.join(f'\n{failure}' for failure in failures))
+        configuration: Dict[str, Union[Dict, List]] = \
+            load_configuration(job_queue.get_setting('configuration_path'))
+        output_header: List[str] = get_output_header(configuration['table_processing'])
+        output_file_path = output_file_path or \
+            get_output_file_path(configuration['election_description'])
+        with open(output_file_path, 'w', newline='') as f_out:
+            csv_writer = csv.writer(f_out)
+            csv_writer.writerow(output_header)
+            for task in job_queue.get_tasks():
+                with open(job_queue.get_part_path(task), newline='') as f_in:
+                    csv_reader = csv.reader(f_in)
+                    if next(csv_reader) != output_header:
+                        raise JobQueueError(f'unexpected header in {f_in.name}')
+                    csv_writer.writerows(csv_reader)
+    finally:
+        job_queue.close()
+    return output_file_path
+
+
+def _run_task(job_queue: JobQueue, task: Task, worker: str, plan: ConversionPlan,
+              data_source: DataSource, output_header: List[str],
+              renew_interval: float) -> bool:
+    part_path: str = job_queue.get_part_path(task)
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        suffix='.tmp', dir=os.path.dirname(part_path))
+    try:
+        renewed_at: float = time.time()
+        with data_source.get_file_like_object() as f_obj, \
+                open(file_descriptor, 'w', newline='') as f_out:
+            csv_writer: csv.DictWriter = csv.DictWriter(f_out, output_header)
+            csv_writer.writeheader()
+            for page in PDFPageIterator(f_obj=f_obj, page_numbers=task.get_page_numbers()):
+                print(f'processing page {page.get_page_number()} of {f_obj.name}')
+                csv_writer.writerows(PageParser(plan, page))
+                if time.time() - renewed_at > renew_interval:
+                    if not job_queue.renew(task, worker):
+                        return False
+                    renewed_at = time.time()
+        os.replace(temporary_path, part_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return job_queue.complete(task, worker)
@@ -1,13 +1,31 @@
-from typing import Dict, Iterable, Iterator, List, Union, Tuple
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Union, Tuple
 
+from pdfreader import SimplePDFViewer
+
+from electionware.configuration import ConversionPlan, compile_configuration
 from electionware.data_source import DataSource
-from electionware.pdf import PDFPageIterator, PDFStrings, PDFStringsIterator
-from electionware.row_filters import RowFilter, DEFAULT_ROW_FILTERS
-from electionware.row_transformers import RowTransformer, DefaultRowTransformer
+from electionware.pdf import PDFPageIterator, PDFStrings, PDFStringsIterator, get_page_count
+from electionware.profiling import PageProfiler
+from electionware.row_observers import RowObserver
+from electionware.watchdog import RenderWatchdog, RenderedPage
 
 INSTRUCTION_ROW_PREFIX: str = 'Vote For'
 
 
+class PageStructureError(AssertionError):
+    """
+    Raised when the strings of a PDF page do not match the configured
+    page_structure, e.g. because of a wrong expected_header or
+    table_headers. Records what was expected and what was actually read
+    so that misconfigurations can be diagnosed without a debugger.
+    """
+    def __init__(self, description: str, expected: object, actual: object):
+        super().__init__(f'{description}: expected {expected!r}, got {actual!r}')
+        self.description: str = description
+        self.expected: object = expected
+        self.actual: object = actual
+
+
 class ElectionwareStringIterator(PDFStringsIterator):
     """
     Given a list of Electionware strings, this class provides basic
@@ -23,9 +41,9 @@ class ElectionwareStringIterator(PDFStringsIterator):
     ELECTIONWARE_FOOTER: str = 'Report generated with Electionware'
     BALLOTS_CAST_PREFIX: str = 'Ballots Cast'
 
-    def __init__(self, page_structure: Dict[str, str], strings: List[str]):
+    def __init__(self, expected_footer: str, strings: List[str]):
         super().__init__(strings)
-        self._expected_footer: str = page_structure['expected_footer']
+        self._expected_footer: str = expected_footer
 
     def page_is_done(self) -> bool:
         s: str = self.peek()
@@ -50,19 +68,81 @@ class DataSourceParser(Iterable[Dict[str, str]]):
     OpenElections CSV file.
     The ElectionwarePDFs are extracted from a configuration dictionary.
     In most cases the data source is in the form of a single PDF file.
+    The configuration is compiled into a ConversionPlan up front, so
+    configuration errors surface before any PDF is read. Row observers,
+    if given, see every row, including those that are filtered out.
+    If the configuration has a profiling entry, pages are profiled as
+    described in profiling.PageProfiler. If it has a render_watchdog
+    entry, pages are rendered under a time and memory budget as
+    described in watchdog.RenderWatchdog; a page whose fallback
+    extraction cannot be parsed either is skipped and reported. The
+    watchdog renders pages before they are profiled, so with both
+    entries the profiles' render stage is empty.
     """
-    def __init__(self, configuration: Dict[str, Union[Dict, List]]):
+    def __init__(self, configuration: Dict[str, Union[Dict, List]],
+                 row_observers: Sequence[RowObserver] = ()):
         self._configuration: Dict[str, Union[str, List]] = configuration
+        self._plan: ConversionPlan = compile_configuration(configuration)
+        self._row_observers: Tuple[RowObserver, ...] = tuple(row_observers)
+        self._profiler: PageProfiler = PageProfiler(configuration['profiling']) \
+            if configuration.get('profiling') else None
+        self._watchdog: RenderWatchdog = RenderWatchdog(configuration['render_watchdog']) \
+            if configuration.get('render_watchdog') else None
 
     def __iter__(self) -> Iterator[Dict[str, str]]:
-        for data_source in self._configuration['data_source']:
-            yield from self._parse(data_source)
+        try:
+            for data_source in self._configuration['data_source']:
+                yield from self._parse(data_source)
+        finally:
+            if self._watchdog:
+                self._watchdog.close()
+            if self._profiler:
+                self._profiler.close()
 
     def _parse(self, data_source: DataSource) -> Iterator[Dict[str, str]]:
         with data_source.get_file_like_object() as f_obj:
+            for page in self._iterate_pages(data_source, f_obj):
+                if self._profiler:
+                    yield from self._profiler.profile_page(
+                        f_obj.name, page, self._parse_page)
+                else:
+                    yield from self._parse_page(page)
+
+    def _iterate_pages(self, data_source: DataSource, f_obj: IO) -> Iterator[PDFStrings]:
+        if not self._watchdog:
             for page in PDFPageIterator(f_obj=f_obj):
                 print(f'processing page {page.get_page_number()} of {f_obj.name}')
-                yield from PageParser(self._configuration, page)
+                yield page
+            return
+        # with a watchdog, pages are navigated to (which decodes their
+        # content streams) and rendered in its worker process only
+        page_count: int = get_page_count(SimplePDFViewer(f_obj))
+        for page_number in range(1, page_count + 1):
+            print(f'processing page {page_number} of {f_obj.name}')
+            page: Optional[RenderedPage] = \
+                self._watchdog.render(f_obj.name, data_source, page_number)
+            if page is not None and self._fallback_page_parses(page):
+                yield page
+
+    def _parse_page(self, page: PDFStrings) -> Iterator[Dict[str, str]]:
+        return iter(PageParser(self._plan, page, self._row_observers))
+
+    def _fallback_page_parses(self, page: RenderedPage) -> bool:
+        # a fallback extraction is parsed once without row observers, so
+        # that a page that cannot be parsed is skipped as a whole
+        if page.failure is None:
+            return True
+        try:
+            copy: RenderedPage = RenderedPage(page.get_page_number(), list(page.get_strings()),
+                                              page.get_content_stream())
+            for _ in PageParser(self._plan, copy):
+                pass
+        except Exception as e:
+            self._watchdog.record(page.failure._replace(
+                fallback='failed', detail=f'{page.failure.detail}; {type(e).__name__}: {e}'))
+            return False
+        self._watchdog.record(page.failure)
+        return True
 
 
 class PageParser(Iterable[Dict[str, str]]):
@@ -70,27 +150,30 @@ class PageParser(Iterable[Dict[str, str]]):
     Given the strings extracted from a PDF, verifies that the header
     matches the expected page header, extracts the precinct from the
     sub-header, and then iterates over each table found on the PDF
-    page.
+    page. Row observers, if given, are passed on to every TableParser.
     """
-    def __init__(self, configuration: Dict[str, Union[Dict, List]],
-                 page: PDFStrings):
-        self._configuration: Dict[str, Union[Dict, List]] = configuration
-        page_structure: Dict[str, Union[List, str, bool]] = \
-            configuration['page_structure']
+    def __init__(self, plan: ConversionPlan, page: PDFStrings,
+                 row_observers: Sequence[RowObserver] = ()):
+        self._plan: ConversionPlan = plan
+        self._row_observers: Sequence[RowObserver] = row_observers
         self._string_iterator: ElectionwareStringIterator = \
-            ElectionwareStringIterator(page_structure, page.get_strings())
-        self._verify_header(page_structure['expected_header'])
+            ElectionwareStringIterator(plan.expected_footer, page.get_strings())
+        self._verify_header(list(plan.expected_header))
         self._precinct: str = self._read_precinct()
 
     def __iter__(self) -> Iterator[Dict[str, str]]:
         while not self._string_iterator.page_is_done():
-            yield from TableParser(self._configuration, self._precinct,
-                                   self._string_iterator)
+            yield from TableParser(self._plan, self._precinct,
+                                   self._string_iterator, self._row_observers)
+
+    def get_precinct(self) -> str:
+        return self._precinct
 
     def _verify_header(self, expected_header: List[str]) -> None:
         header: List[str] = [next(self._string_iterator)
                              for _ in range(len(expected_header))]
-        assert header == expected_header
+        if header != expected_header:
+            raise PageStructureError('page header mismatch', expected_header, header)
 
     def _read_precinct(self) -> str:
         return next(self._string_iterator)
@@ -104,35 +187,18 @@ class TableParser(Iterable[Dict[str, str]]):
     sub-header, and then iterates over each table found on the PDF
     page.
     """
-    PARTIES: List[str] = ['DEM', 'REP']
+    PARTIES: Tuple[str, ...] = ('DEM', 'REP')
     STATISTICS_OFFICE_HEADER: str = 'STATISTICS'
-    SINGLE_COLUMN_OFFICES: List[str] = ['Registered Voters', 'Voter Turnout']
+    SINGLE_COLUMN_OFFICES: Tuple[str, ...] = ('Registered Voters', 'Voter Turnout')
     VOTE_PERCENT_COLUMN_HEADER: str = 'VOTE %'
 
-    def __init__(self, configuration: Dict[str, object], precinct: str,
-                 string_iterator: ElectionwareStringIterator):
+    def __init__(self, plan: ConversionPlan, precinct: str,
+                 string_iterator: ElectionwareStringIterator,
+                 row_observers: Sequence[RowObserver] = ()):
+        self._plan: ConversionPlan = plan
+        self._row_observers: Sequence[RowObserver] = row_observers
         self._string_iterator: ElectionwareStringIterator = string_iterator
         self._precinct: str = precinct
-        # configuration installation
-        election_description: Dict[str, str] = \
-            configuration['election_description']
-        self._county: str = election_description['county']
-        page_structure: Dict[str, str] = configuration['page_structure']
-        table_headers: List[str] = page_structure['table_headers']
-        self._has_vote_percent_column: bool = \
-            page_structure['has_vote_percent_column']
-        self._expected_table_headers: List[str] = \
-            [' '.join(header) for header in table_headers]
-        table_processing: Dict[str, Union[Dict, List, str]] = \
-            configuration['table_processing']
-        default_row_transformer: RowTransformer = DefaultRowTransformer(
-            table_processing['raw_office_to_office_and_district'])
-        self._openelections_mapped_header: List[str] = \
-            table_processing['openelections_mapped_header']
-        self._row_transformers: List[RowTransformer] = \
-            [default_row_transformer] + table_processing['extra_row_transformers']
-        self._row_filters: List[RowFilter] = \
-            DEFAULT_ROW_FILTERS +  table_processing['extra_row_filters']
         # header processing
         self._skip_instruction_row()
         self._office: str = self._read_office()
@@ -141,17 +207,23 @@ class TableParser(Iterable[Dict[str, str]]):
         self._verify_and_skip_table_header()
 
     def __iter__(self) -> Iterator[Dict[str, str]]:
-        while True:
+        while not self._table_is_done():
             row: Dict[str, str] = self._get_next_row()
-            if not any(row_filter.filter(row) for row_filter in self._row_filters):
+            filtered: bool = any(row_filter.filter(row)
+                                 for row_filter in self._plan.row_filters)
+            for row_observer in self._row_observers:
+                row_observer.observe(row, filtered)
+            if not filtered:
                 yield row
 
     def _read_office(self) -> str:
         return next(self._string_iterator)
 
+    def _table_is_done(self) -> bool:
+        return self._string_iterator.page_is_done() or \
+            self._string_iterator.table_is_done()
+
     def _get_next_row(self) -> Dict[str, str]:
-        if self._string_iterator.page_is_done() or self._string_iterator.table_is_done():
-            raise StopIteration
         self._string_iterator.swap_any_bad_ballots_cast_fields()
         row: Dict[str, str] = self._create_next_row()
         self._skip_vote_percent_field()
@@ -160,18 +232,18 @@ class TableParser(Iterable[Dict[str, str]]):
     def _create_next_row(self) -> Dict[str, str]:
         candidate: str = next(self._string_iterator)
         row: Dict[str, str] = self._create_row_shell_for_candidate(candidate)
-        for row_transformer in self._row_transformers:
+        for row_transformer in self._plan.row_transformers:
             row = row_transformer.transform(row)
         self._populate_row_votes(row)
         return row
 
     def _create_row_shell_for_candidate(self, candidate: str) -> Dict[str, str]:
-        return {'county': self._county, 'precinct': self._precinct,
+        return {'county': self._plan.county, 'precinct': self._precinct,
                 'office': self._office, 'party': self._party, 'district': '',
                 'candidate': candidate.strip()}
 
     def _populate_row_votes(self, row: Dict[str, str]) -> None:
-        for header in self._openelections_mapped_header:
+        for header in self._plan.openelections_mapped_header:
             votes: str = next(self._string_iterator)
             if '%' not in votes:
                 row[header] = int(votes.replace(',', ''))
@@ -181,22 +253,28 @@ class TableParser(Iterable[Dict[str, str]]):
     def _verify_and_skip_table_header(self) -> None:
         self._skip_vote_percent_column_header()
         actual_header: str = ''
-        while len(actual_header) < len(self._expected_table_headers[0]):
+        while len(actual_header) < self._plan.expected_table_header_length:
             actual_header += next(self._string_iterator) + ' '
-        assert actual_header.strip() in self._expected_table_headers
+        if actual_header.strip() not in self._plan.expected_table_headers:
+            raise PageStructureError(
+                f'table header mismatch for {self._office!r}',
+                list(self._plan.expected_table_headers), actual_header.strip())
 
     def _skip_instruction_row(self) -> None:
         if self._string_iterator.peek().startswith(INSTRUCTION_ROW_PREFIX):
             next(self._string_iterator)
 
     def _skip_vote_percent_column_header(self) -> None:
-        if self._has_vote_percent_column:
+        if self._plan.has_vote_percent_column:
             if self._office != self.STATISTICS_OFFICE_HEADER:
                 vote_percent_header = next(self._string_iterator)
-                assert vote_percent_header == self.VOTE_PERCENT_COLUMN_HEADER
+                if vote_percent_header != self.VOTE_PERCENT_COLUMN_HEADER:
+                    raise PageStructureError(
+                        f'vote percent column header mismatch for {self._office!r}',
+                        self.VOTE_PERCENT_COLUMN_HEADER, vote_percent_header)
 
     def _skip_vote_percent_field(self) -> None:
-        if self._has_vote_percent_column:
+        if self._plan.has_vote_percent_column:
             if '%' in self._string_iterator.peek():
                 next(self._string_iterator)
 
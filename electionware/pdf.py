@@ -1,4 +1,4 @@
-from typing import IO, Iterator, List
+from typing import IO, Iterable, Iterator, List
 
 from pdfreader import SimplePDFViewer, PageDoesNotExist
 
@@ -49,6 +49,12 @@ class PDFStrings:
     def get_page_number(self) -> int:
         return self._pdf_viewer.current_page_number
 
+    def get_content_stream(self) -> bytes:
+        """
+        The page's decoded content stream, available without rendering.
+        """
+        return self._pdf_viewer.stream
+
     def get_strings(self) -> List[str]:
         if not self._rendered:
             self._pdf_viewer.render()
@@ -61,17 +67,29 @@ class PDFPageIterator(Iterator[PDFStrings]):
     Given an IO object, the PDFPageIterator loads it as a PDF,
     then iterates over each page of the PDF and provides the
     associated string representation of the current PDF page.
+    If page_numbers (1-based) are given, only those pages are
+    visited, in the given order.
     """
-    def __init__(self, f_obj: IO=None, pdf_viewer: SimplePDFViewer=None):
+    def __init__(self, f_obj: IO=None, pdf_viewer: SimplePDFViewer=None,
+                 page_numbers: Iterable[int]=None):
         self._pdf_viewer = pdf_viewer or SimplePDFViewer(f_obj)
         self._pdf_viewer.current_page_number = 0
+        self._page_numbers: Iterator[int] = \
+            iter(page_numbers) if page_numbers is not None else None
 
     def __iter__(self) -> Iterator[PDFStrings]:
         return self
 
     def __next__(self) -> PDFStrings:
         try:
-            self._pdf_viewer.next()
+            if self._page_numbers is None:
+                self._pdf_viewer.next()
+            else:
+                self._pdf_viewer.navigate(next(self._page_numbers))
             return PDFStrings(self._pdf_viewer)
         except PageDoesNotExist as e:
             raise StopIteration(e)
+
+
+def get_page_count(pdf_viewer: SimplePDFViewer) -> int:
+    return int(pdf_viewer.doc.root.Pages.Count)
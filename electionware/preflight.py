@@ -0,0 +1,137 @@
+import os
+import random
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Sequence, Union
+
+from pdfreader import SimplePDFViewer
+
+from electionware.configuration import ConversionPlan, compile_configuration
+from electionware.data_source import DataSource
+from electionware.parser import ElectionwareStringIterator, PageParser, PageStructureError
+from electionware.pdf import PDFPageIterator, PDFStrings, get_page_count
+
+DEFAULT_SAMPLE_SIZE: int = 10
+
+
+class PreflightMismatch(NamedTuple):
+    """
+    A page whose strings do not match the configured page_structure.
+    """
+    data_source: str
+    page_number: int
+    description: str
+    expected: object
+    actual: object
+
+    def __str__(self) -> str:
+        return f'{self.data_source} page {self.page_number}: {self.description}: ' \
+               f'expected {self.expected!r}, got {self.actual!r}'
+
+
+class PreflightError(ValueError):
+    """
+    Raised by verify_configuration when sampled pages do not match the
+    configuration; carries every mismatch that was found.
+    """
+    def __init__(self, mismatches: List[PreflightMismatch]):
+        super().__init__('\n'.join(str(mismatch) for mismatch in mismatches))
+        self.mismatches: List[PreflightMismatch] = mismatches
+
+
+def sample_page_numbers(page_count: int, sample_size: int,
+                        rng: random.Random = None) -> List[int]:
+    """
+    Given the number of pages in a PDF, provide a stratified sample of
+    (1-based) page numbers: always the first and last page, plus one random
+    page from each of sample_size - 2 equally sized runs of the pages
+    in between.
+    """
+    if page_count <= sample_size:
+        return list(range(1, page_count + 1))
+    rng = rng or random.Random()
+    middle_count: int = page_count - 2
+    strata: int = max(sample_size - 2, 0)
+    page_numbers: List[int] = [1]
+    for stratum in range(strata):
+        first: int = 2 + stratum * middle_count // strata
+        last: int = 1 + (stratum + 1) * middle_count // strata
+        page_numbers.append(rng.randint(first, last))
+    return page_numbers + [page_count]
+
+
+def check_page(plan: ConversionPlan, page: PDFStrings) -> List[PageStructureError]:
+    """
+    Given a rendered page, run the header, footer, and table header checks
+    that the parser performs and provide every mismatch found. Parsing stops
+    at the first mismatch on a page, so later tables on it go unchecked.
+    """
+    strings: List[str] = page.get_strings()
+    errors: List[PageStructureError] = []
+    footer_iterator: ElectionwareStringIterator = \
+        ElectionwareStringIterator(plan.expected_footer, strings)
+    while footer_iterator.has_next() and not footer_iterator.page_is_done():
+        next(footer_iterator)
+    if not footer_iterator.has_next():
+        errors.append(PageStructureError(
+            'page footer not found', plan.expected_footer,
+            strings[-1:]))
+        return errors
+    try:
+        for _ in PageParser(plan, page):
+            pass
+    except PageStructureError as e:
+        errors.append(e)
+    except (IndexError, KeyError, ValueError, RuntimeError, StopIteration) as e:
+        # running out of strings raises StopIteration, or RuntimeError where
+        # that happens inside the parsers' generators
+        errors.append(PageStructureError(
+            f'page could not be parsed ({type(e).__name__})', None, str(e)))
+    return errors
+
+
+def preflight(configuration: Dict[str, Union[Dict, List]],
+              sample_size: int = DEFAULT_SAMPLE_SIZE, workers: int = None,
+              seed: int = None) -> List[PreflightMismatch]:
+    """
+    Given a configuration dictionary, render a stratified sample of pages
+    from each data source in parallel worker processes and provide every
+    page_structure mismatch found, so that a misconfigured run can be
+    rejected before the full conversion starts.
+    """
+    plan: ConversionPlan = compile_configuration(configuration)
+    rng: random.Random = random.Random(seed)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as executor:
+        futures: List[Future] = []
+        for data_source in configuration['data_source']:
+            with data_source.get_file_like_object() as f_obj:
+                page_count: int = get_page_count(SimplePDFViewer(f_obj))
+            page_numbers: List[int] = \
+                sample_page_numbers(page_count, sample_size, rng)
+            for i in range(min(workers, len(page_numbers))):
+                futures.append(executor.submit(
+                    _check_pages, plan, data_source, page_numbers[i::workers]))
+        mismatches: List[PreflightMismatch] = \
+            [mismatch for future in futures for mismatch in future.result()]
+    return sorted(mismatches, key=lambda mismatch: mismatch[:2])
+
+
+def verify_configuration(configuration: Dict[str, Union[Dict, List]],
+                         sample_size: int = DEFAULT_SAMPLE_SIZE,
+                         workers: int = None) -> None:
+    mismatches: List[PreflightMismatch] = preflight(configuration, sample_size, workers)
+    if mismatches:
+        raise PreflightError(mismatches)
+
+
+def _check_pages(plan: ConversionPlan, data_source: DataSource,
+                 page_numbers: Sequence[int]) -> List[PreflightMismatch]:
+    mismatches: List[PreflightMismatch] = []
+    with data_source.get_file_like_object() as f_obj:
+        name: str = getattr(f_obj, 'name', repr(data_source))
+        for page in PDFPageIterator(f_obj=f_obj, page_numbers=page_numbers):
+            mismatches += [
+                PreflightMismatch(name, page.get_page_number(), error.description,
+                                  error.expected, error.actual)
+                for error in check_page(plan, page)]
+    return mismatches
@@ -0,0 +1,366 @@
+import heapq
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from types import FrameType
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from electionware.configuration import DETERMINISTIC_MODE, SAMPLING_MODE, ConfigurationError
+from electionware.pdf import PDFStrings
+
+DEFAULT_SAMPLING_INTERVAL: float = 0.001
+MAX_STACK_DEPTH: int = 64
+TRACEMALLOC_FRAMES: int = 32
+TOP_ALLOCATIONS: int = 10
+ELECTIONWARE_DIRECTORY: str = os.path.dirname(os.path.abspath(__file__))
+PROFILING_MODULE: str = os.path.basename(__file__)
+
+RENDER_STAGE: str = 'render'
+PARSE_STAGE: str = 'parse'
+WRITE_STAGE: str = 'write'
+
+
+class StackCollector(ABC):
+    """
+    Accumulates collapsed stacks ("stage;outer frame;...;inner frame") with
+    a weight each, in the format read by flamegraph.pl and speedscope.
+    The stage that is currently running is set by the PageProfiler, which
+    also pauses collection while it does its own bookkeeping.
+    """
+    def __init__(self):
+        self.stage: str = RENDER_STAGE
+        self.stacks: Dict[str, float] = {}
+
+    @abstractmethod
+    def start(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def pause(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def resume(self) -> None:
+        raise NotImplementedError
+
+    def collapsed_lines(self) -> List[str]:
+        return [f'{stack} {round(weight)}' for stack, weight in
+                sorted(self.stacks.items(), key=lambda item: -item[1]) if round(weight)]
+
+    def _add(self, stack: str, weight: float) -> None:
+        stack = f'{self.stage};{stack}'
+        self.stacks[stack] = self.stacks.get(stack, 0) + weight
+
+
+class DeterministicCollector(StackCollector):
+    """
+    Records every Python and C call in the profiled thread via
+    sys.setprofile, weighting each stack by the microseconds spent in it.
+    Exact, but slows the profiled pages down considerably.
+    """
+    def __init__(self):
+        super().__init__()
+        self._stack: Optional[str] = None
+        self._last_time: float = 0.0
+        # collapsed stack of each frame that is currently executing, keyed by
+        # id(frame) and holding the frame itself to guard against id reuse
+        self._frame_stacks: Dict[int, Tuple[FrameType, str]] = {}
+        self._labels: Dict[object, str] = {}
+
+    def start(self) -> None:
+        self.resume()
+
+    def stop(self) -> None:
+        self.pause()
+        self._frame_stacks = {}
+
+    def pause(self) -> None:
+        sys.setprofile(None)
+        self._flush(time.perf_counter())
+        self._stack = None
+
+    def resume(self) -> None:
+        self._last_time = time.perf_counter()
+        sys.setprofile(self._on_event)
+
+    def _on_event(self, frame: FrameType, event: str, arg: object) -> None:
+        self._flush(time.perf_counter())
+        if event == 'call':
+            self._stack = self._frame_stack(frame)
+        elif event == 'return':
+            self._frame_stacks.pop(id(frame), None)
+            self._stack = self._frame_stack(frame.f_back) if frame.f_back else None
+        elif event == 'c_call':
+            self._stack = f'{self._frame_stack(frame)};' \
+                          f'{getattr(arg, "__qualname__", repr(arg))}'
+        else:
+            self._stack = self._frame_stack(frame)
+        self._last_time = time.perf_counter()
+
+    def _flush(self, now: float) -> None:
+        if self._stack is not None:
+            self._add(self._stack, (now - self._last_time) * 1e6)
+
+    def _frame_stack(self, frame: FrameType) -> str:
+        cached: Optional[Tuple[FrameType, str]] = self._frame_stacks.get(id(frame))
+        if cached is not None and cached[0] is frame:
+            return cached[1]
+        label: Optional[str] = self._labels.get(frame.f_code)
+        if label is None:
+            label = self._labels[frame.f_code] = _frame_label(frame)
+        stack: str = f'{self._frame_stack(frame.f_back)};{label}' \
+            if frame.f_back is not None else label
+        self._frame_stacks[id(frame)] = (frame, stack)
+        return stack
+
+
+class SamplingCollector(StackCollector):
+    """
+    Samples the profiled thread's stack from a background thread at a fixed
+    interval, weighting each stack by its number of samples. Cheap enough
+    to leave on for whole runs.
+    """
+    def __init__(self, interval: float = DEFAULT_SAMPLING_INTERVAL):
+        super().__init__()
+        self._interval: float = interval
+        self._thread_id: int = threading.get_ident()
+        self._stopped: threading.Event = threading.Event()
+        self._paused: bool = False
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def pause(self) -> None:
+        self._paused = True
+
+    def resume(self) -> None:
+        self._paused = False
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame: Optional[FrameType] = sys._current_frames().get(self._thread_id)
+            if frame is not None and not self._paused:
+                self._add(_collapsed_stack(frame), 1)
+
+
+class PageProfile:
+    """
+    The result of profiling a single page: time per stage, peak traced
+    memory per stage, the electionware source lines responsible for the
+    largest allocations that are still alive at the end of each stage,
+    and the collapsed stacks.
+    """
+    def __init__(self, data_source: str, page_number: int, collector: StackCollector):
+        self.data_source: str = data_source
+        self.page_number: int = page_number
+        self.collector: StackCollector = collector
+        self.stage_times: Dict[str, float] = {RENDER_STAGE: 0.0, PARSE_STAGE: 0.0,
+                                              WRITE_STAGE: 0.0}
+        self.stage_peaks: Dict[str, int] = {}
+        self.allocations: Dict[str, List[Tuple[str, int, int]]] = {}
+
+    def total_time(self) -> float:
+        return sum(self.stage_times.values())
+
+    def write(self, output_directory: str) -> None:
+        name: str = f'{_safe_name(self.data_source)}-page-{self.page_number:05d}'
+        with open(os.path.join(output_directory, f'{name}.collapsed'), 'w') as f_out:
+            f_out.writelines(line + '\n' for line in self.collector.collapsed_lines())
+        with open(os.path.join(output_directory, f'{name}.txt'), 'w') as f_out:
+            f_out.write(f'{self.data_source} page {self.page_number}: '
+                        f'{self.total_time() * 1000:.1f} ms\n')
+            for stage, stage_time in self.stage_times.items():
+                f_out.write(f'  {stage}: {stage_time * 1000:.1f} ms\n')
+            for stage, allocations in self.allocations.items():
+                f_out.write(f'\n{stage} allocations (peak '
+                            f'{self.stage_peaks.get(stage, 0) / 1024:.1f} KiB):\n')
+                for location, size, count in allocations:
+                    f_out.write(f'  {size / 1024:10.1f} KiB {count:8d} blocks  {location}\n')
+
+
+class PageProfiler:
+    """
+    Profiles pages of a conversion as configured by the configuration's
+    profiling entry:
+
+        'profiling': {
+            'output_directory': 'profiles',
+            'mode': 'sampling',        # or 'deterministic' (the default)
+            'pages': [10, 20],         # first and last page to profile, or
+            'slowest': 5,              # profile every page, keep the 5 slowest
+        }
+
+    For each selected page, a .collapsed file (one "stack weight" line per
+    stack, with the render, parse and write stages as root frames) and a
+    .txt summary of time and tracemalloc allocations per stage are written
+    to output_directory. The write stage is the time the consumer of the
+    rows (e.g. the csv writer) spends between rows; its allocations are
+    included in the parse stage. Allocation tracing slows profiled pages
+    down severalfold and can be turned off with 'tracemalloc': False.
+    """
+    def __init__(self, settings: Dict[str, Union[str, int, List[int]]]):
+        self._output_directory: str = settings.get('output_directory', 'profiles')
+        self._mode: str = settings.get('mode', DETERMINISTIC_MODE)
+        if self._mode not in (DETERMINISTIC_MODE, SAMPLING_MODE):
+            raise ConfigurationError(f'unknown profiling mode: {self._mode}')
+        self._sampling_interval: float = \
+            settings.get('sampling_interval', DEFAULT_SAMPLING_INTERVAL)
+        self._pages: Optional[Tuple[int, int]] = \
+            tuple(settings['pages']) if 'pages' in settings else None
+        self._slowest: Optional[int] = settings.get('slowest')
+        self._tracemalloc: bool = settings.get('tracemalloc', True)
+        self._slowest_profiles: List[Tuple[float, int, PageProfile]] = []
+        self._profile_count: int = 0
+        # the tracemalloc snapshot taken at the start of the current stage
+        self._stage_snapshot: Optional[tracemalloc.Snapshot] = None
+        os.makedirs(self._output_directory, exist_ok=True)
+
+    def profile_page(self, data_source: str, page: PDFStrings,
+                     parse: Callable[[PDFStrings], Iterator[Dict[str, str]]]
+                     ) -> Iterator[Dict[str, str]]:
+        """
+        Given a page and the function that parses it, provide the parsed
+        rows, profiling the page if it is selected.
+        """
+        if not self._is_selected(page.get_page_number()):
+            yield from parse(page)
+            return
+        collector: StackCollector = SamplingCollector(self._sampling_interval) \
+            if self._mode == SAMPLING_MODE else DeterministicCollector()
+        profile: PageProfile = PageProfile(data_source, page.get_page_number(), collector)
+        started_tracemalloc: bool = self._tracemalloc and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        collector.start()
+        try:
+            self._start_stage(profile, RENDER_STAGE)
+            stage_start: float = time.perf_counter()
+            page.get_strings()
+            stage_start = self._end_stage(profile, RENDER_STAGE, stage_start)
+            self._start_stage(profile, PARSE_STAGE)
+            rows: Iterator[Dict[str, str]] = parse(page)
+            while True:
+                collector.stage = PARSE_STAGE
+                try:
+                    row: Dict[str, str] = next(rows)
+                except StopIteration:
+                    break
+                now: float = time.perf_counter()
+                profile.stage_times[PARSE_STAGE] += now - stage_start
+                collector.stage = WRITE_STAGE
+                yield row
+                stage_start = time.perf_counter()
+                profile.stage_times[WRITE_STAGE] += stage_start - now
+            self._end_stage(profile, PARSE_STAGE, stage_start)
+        finally:
+            collector.stop()
+            if started_tracemalloc:
+                tracemalloc.stop()
+        self._record(profile)
+
+    def close(self) -> None:
+        """
+        Write the profiles of the slowest pages, if profiling was configured
+        to keep only those.
+        """
+        for _, _, profile in sorted(self._slowest_profiles, reverse=True):
+            profile.write(self._output_directory)
+        self._slowest_profiles = []
+
+    def _is_selected(self, page_number: int) -> bool:
+        if self._pages is None:
+            return True
+        first, last = self._pages
+        return first <= page_number <= last
+
+    def _record(self, profile: PageProfile) -> None:
+        if not self._slowest:
+            profile.write(self._output_directory)
+            return
+        self._profile_count += 1
+        entry: Tuple[float, int, PageProfile] = \
+            (profile.total_time(), self._profile_count, profile)
+        if len(self._slowest_profiles) < self._slowest:
+            heapq.heappush(self._slowest_profiles, entry)
+        else:
+            heapq.heappushpop(self._slowest_profiles, entry)
+
+    def _start_stage(self, profile: PageProfile, stage: str) -> None:
+        profile.collector.stage = stage
+        if not tracemalloc.is_tracing():
+            return
+        profile.collector.pause()
+        self._stage_snapshot = tracemalloc.take_snapshot()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        profile.collector.resume()
+
+    def _end_stage(self, profile: PageProfile, stage: str, stage_start: float) -> float:
+        now: float = time.perf_counter()
+        profile.stage_times[stage] += now - stage_start
+        if not tracemalloc.is_tracing():
+            return time.perf_counter()
+        profile.collector.pause()
+        profile.stage_peaks[stage] = tracemalloc.get_traced_memory()[1]
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+        profile.allocations[stage] = _electionware_allocations(
+            snapshot.compare_to(self._stage_snapshot, 'traceback'))
+        profile.collector.resume()
+        return time.perf_counter()
+
+
+def _electionware_allocations(differences: List[tracemalloc.StatisticDiff]
+                              ) -> List[Tuple[str, int, int]]:
+    # attribute each allocation to the innermost electionware source line
+    # in its traceback, so that allocations made inside pdfreader or the
+    # standard library are charged to the electionware code that caused them;
+    # allocations made by the profiler itself are left out
+    totals: Dict[str, List[int]] = {}
+    for difference in differences:
+        if difference.size_diff <= 0:
+            continue
+        location: str = 'outside electionware'
+        for frame in reversed(difference.traceback):
+            if frame.filename.startswith(ELECTIONWARE_DIRECTORY):
+                source: str = linecache.getline(frame.filename, frame.lineno).strip()
+                location = f'{os.path.basename(frame.filename)}:{frame.lineno} {source}'
+                break
+        if location.startswith(PROFILING_MODULE):
+            continue
+        total: List[int] = totals.setdefault(location, [0, 0])
+        total[0] += difference.size_diff
+        total[1] += difference.count_diff
+    return sorted(((location, size, count) for location, (size, count) in totals.items()),
+                  key=lambda allocation: -allocation[1])[:TOP_ALLOCATIONS]
+
+
+def _collapsed_stack(frame: Optional[FrameType]) -> str:
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _safe_name(name: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in os.path.basename(name))
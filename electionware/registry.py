@@ -0,0 +1,51 @@
+from typing import Dict, Type
+
+from electionware.configuration import ConfigurationError
+from electionware.row_filters import RowFilter, BlankPartyFilter, CommitteeOfficeFilter, \
+    DelegateOfficeFilter, InvalidCandidateFilter, SpecificWriteInCandidatesFilter, \
+    VoterTurnoutOfficeFilter
+from electionware.row_transformers import RowTransformer, CandidateTitleCaseTransformer, \
+    OfficeTitleCaseTransformer, StatisticsTransformer, StripWriteInPrefixTransformer, \
+    WriteInTotalsTransformer
+
+ROW_TRANSFORMERS: Dict[str, Type[RowTransformer]] = {
+    cls.__name__: cls for cls in (
+        CandidateTitleCaseTransformer,
+        OfficeTitleCaseTransformer,
+        StatisticsTransformer,
+        StripWriteInPrefixTransformer,
+        WriteInTotalsTransformer,
+    )
+}
+
+ROW_FILTERS: Dict[str, Type[RowFilter]] = {
+    cls.__name__: cls for cls in (
+        BlankPartyFilter,
+        CommitteeOfficeFilter,
+        DelegateOfficeFilter,
+        InvalidCandidateFilter,
+        SpecificWriteInCandidatesFilter,
+        VoterTurnoutOfficeFilter,
+    )
+}
+
+
+def get_row_transformer(name: str) -> RowTransformer:
+    """
+    Given the class name of a RowTransformer that can be constructed without
+    arguments, provide a new instance of it. Used when configurations are
+    read from JSON or YAML files rather than built in Python.
+    """
+    if name not in ROW_TRANSFORMERS:
+        raise ConfigurationError(f'unknown row transformer: {name}')
+    return ROW_TRANSFORMERS[name]()
+
+
+def get_row_filter(name: str) -> RowFilter:
+    """
+    Given the class name of a RowFilter that can be constructed without
+    arguments, provide a new instance of it.
+    """
+    if name not in ROW_FILTERS:
+        raise ConfigurationError(f'unknown row filter: {name}')
+    return ROW_FILTERS[name]()
@@ -0,0 +1,155 @@
+from array import array
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from electionware.csv import BASE_OUTPUT_HEADER, get_output_header, parse_rows, \
+    write_rows_to_csv
+
+MISSING_VOTES: int = -1
+
+
+class _ColumnStore:
+    """
+    Columnar storage of rows: the descriptive fields (county, precinct,
+    office, district, party, candidate) are dictionary-encoded into arrays
+    of integer codes, vote fields are stored in arrays of integers, and the
+    precinct and office fields have hash indexes from code to row ids.
+    """
+    INDEXED_FIELDS: Tuple[str, ...] = ('precinct', 'office')
+
+    def __init__(self, vote_fields: Sequence[str]):
+        self.vote_fields: Tuple[str, ...] = tuple(vote_fields)
+        self.values: Dict[str, List[Hashable]] = {field: [] for field in BASE_OUTPUT_HEADER}
+        self.codes: Dict[str, Dict[Hashable, int]] = {field: {} for field in BASE_OUTPUT_HEADER}
+        self.columns: Dict[str, array] = {field: array('I') for field in BASE_OUTPUT_HEADER}
+        self.votes: Dict[str, array] = {field: array('q') for field in self.vote_fields}
+        self.indexes: Dict[str, Dict[int, array]] = {field: {} for field in self.INDEXED_FIELDS}
+        self.length: int = 0
+
+    def append(self, row: Dict[str, str]) -> None:
+        row_id: int = self.length
+        for field in BASE_OUTPUT_HEADER:
+            code: int = self.encode(field, row[field])
+            self.columns[field].append(code)
+            if field in self.indexes:
+                self.indexes[field].setdefault(code, array('I')).append(row_id)
+        for field in self.vote_fields:
+            self.votes[field].append(row.get(field, MISSING_VOTES))
+        self.length += 1
+
+    def encode(self, field: str, value: Hashable) -> int:
+        codes: Dict[Hashable, int] = self.codes[field]
+        code: Optional[int] = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values[field])
+            self.values[field].append(value)
+        return code
+
+    def row(self, row_id: int) -> Dict[str, str]:
+        row: Dict[str, str] = {field: self.values[field][self.columns[field][row_id]]
+                               for field in BASE_OUTPUT_HEADER}
+        for field in self.vote_fields:
+            votes: int = self.votes[field][row_id]
+            if votes != MISSING_VOTES:
+                row[field] = votes
+        return row
+
+
+class ResultSet(Iterable[Dict[str, str]]):
+    """
+    An in-memory, queryable collection of rows, e.g. those of a
+    configuration as from csv.parse_rows (see from_configuration). Rows are stored column by column with the highly
+    repetitive descriptive fields dictionary-encoded, and precinct and
+    office lookups use hash indexes. filter() provides a ResultSet over a
+    subset of the rows that shares the same storage; group_by() and sum()
+    aggregate vote fields; to_csv() writes the standard OpenElections csv.
+    """
+    def __init__(self, vote_fields: Sequence[str], rows: Iterable[Dict[str, str]] = ()):
+        self._store: _ColumnStore = _ColumnStore(vote_fields)
+        self._row_ids: Optional[Sequence[int]] = None
+        for row in rows:
+            self._store.append(row)
+
+    @classmethod
+    def from_configuration(cls, configuration: Dict[str, Union[Dict, List]]) -> 'ResultSet':
+        vote_fields: List[str] = configuration['table_processing']['openelections_mapped_header']
+        return cls(vote_fields, parse_rows(configuration))
+
+    def __len__(self) -> int:
+        return self._store.length if self._row_ids is None else len(self._row_ids)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for row_id in self._iter_row_ids():
+            yield self._store.row(row_id)
+
+    def filter(self, **criteria: Hashable) -> 'ResultSet':
+        """
+        Provide the rows whose fields equal the given values, e.g.
+        result_set.filter(precinct='Amwell Twp 1', party='DEM').
+        """
+        store: _ColumnStore = self._store
+        codes: Dict[str, int] = {}
+        for field, value in criteria.items():
+            if field not in store.codes:
+                raise KeyError(f'cannot filter on {field!r}')
+            code: Optional[int] = store.codes[field].get(value)
+            if code is None:
+                return self._view(array('I'))
+            codes[field] = code
+        indexed_fields: List[str] = [field for field in store.INDEXED_FIELDS if field in codes]
+        if indexed_fields:
+            candidate_ids: Iterable[int] = min(
+                (store.indexes[field].get(codes[field], ()) for field in indexed_fields),
+                key=len)
+            if self._row_ids is not None:
+                selected_ids: set = set(self._row_ids)
+                candidate_ids = [row_id for row_id in candidate_ids if row_id in selected_ids]
+        else:
+            candidate_ids = self._iter_row_ids()
+        columns: List[Tuple[array, int]] = \
+            [(store.columns[field], code) for field, code in codes.items()]
+        return self._view(array('I', (
+            row_id for row_id in candidate_ids
+            if all(column[row_id] == code for column, code in columns))))
+
+    def sum(self, vote_field: str = 'votes') -> int:
+        votes: array = self._store.votes[vote_field]
+        return sum(votes[row_id] for row_id in self._iter_row_ids()
+                   if votes[row_id] != MISSING_VOTES)
+
+    def group_by(self, *fields: str, vote_field: str = 'votes') -> Dict[Tuple, int]:
+        """
+        Provide the sum of vote_field for each distinct combination of the
+        given fields, e.g. result_set.group_by('office', 'candidate').
+        """
+        store: _ColumnStore = self._store
+        columns: List[array] = [store.columns[field] for field in fields]
+        votes: array = store.votes[vote_field]
+        sums: Dict[Tuple[int, ...], int] = {}
+        for row_id in self._iter_row_ids():
+            row_votes: int = votes[row_id]
+            if row_votes == MISSING_VOTES:
+                continue
+            key: Tuple[int, ...] = tuple(column[row_id] for column in columns)
+            sums[key] = sums.get(key, 0) + row_votes
+        values: List[List[Hashable]] = [store.values[field] for field in fields]
+        return {tuple(field_values[code] for field_values, code in zip(values, key)): total
+                for key, total in sums.items()}
+
+    def distinct(self, field: str) -> List[Hashable]:
+        column: array = self._store.columns[field]
+        codes: Dict[int, None] = dict.fromkeys(column[row_id] for row_id in self._iter_row_ids())
+        return [self._store.values[field][code] for code in codes]
+
+    def to_csv(self, output_file_path: str) -> None:
+        output_header: List[str] = get_output_header(
+            {'openelections_mapped_header': list(self._store.vote_fields)})
+        write_rows_to_csv(output_file_path, output_header, self)
+
+    def _iter_row_ids(self) -> Iterable[int]:
+        return range(self._store.length) if self._row_ids is None else self._row_ids
+
+    def _view(self, row_ids: Sequence[int]) -> 'ResultSet':
+        result_set: ResultSet = ResultSet.__new__(ResultSet)
+        result_set._store = self._store
+        result_set._row_ids = row_ids
+        return result_set
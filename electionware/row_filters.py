@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Dict, List
+from typing import Dict, Tuple
 
 
 class RowFilter:
@@ -72,7 +72,7 @@ class SpecificWriteInCandidatesFilter(RowFilter):
         return row['candidate'].startswith('Write-In: ')
 
 
-DEFAULT_ROW_FILTERS: List[RowFilter] = [InvalidCandidateFilter(),
-                                        DelegateOfficeFilter(),
-                                        VoterTurnoutOfficeFilter(),
-                                        BlankPartyFilter()]
+DEFAULT_ROW_FILTERS: Tuple[RowFilter, ...] = (InvalidCandidateFilter(),
+                                              DelegateOfficeFilter(),
+                                              VoterTurnoutOfficeFilter(),
+                                              BlankPartyFilter())
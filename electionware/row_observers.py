@@ -0,0 +1,194 @@
+from abc import abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class RowObserver:
+    """
+    In this context, a row is a dictionary that is written to the
+    output file via a csv.DictWriter. This row is created in the
+    Electionware TableParser class.
+
+    All registered RowObservers are called in the TableParser for
+    every row, after the row filters have run and including the rows
+    that were filtered out, so that statistics can be gathered in the
+    same pass that produces the precinct-level output.
+
+    The observe command must not modify the row.
+    """
+    @abstractmethod
+    def observe(self, row: Dict[str, str], filtered: bool) -> None:
+        raise NotImplementedError
+
+
+class CountyTotalsObserver(RowObserver):
+    """
+    Keeps running per-(office, district, party, candidate) sums of the
+    vote columns of every row that is written, which provide the
+    county-level totals without a second read of the precinct data.
+    """
+    KEY_FIELDS: Tuple[str, ...] = ('office', 'district', 'party', 'candidate')
+
+    def __init__(self, vote_fields: Sequence[str]):
+        self._vote_fields: Tuple[str, ...] = tuple(vote_fields)
+        self._totals: Dict[Tuple, List[Optional[int]]] = {}
+        self._county: str = ''
+
+    def observe(self, row: Dict[str, str], filtered: bool) -> None:
+        if filtered:
+            return
+        self._county = row['county']
+        key: Tuple = tuple(row[field] for field in self.KEY_FIELDS)
+        totals: Optional[List[Optional[int]]] = self._totals.get(key)
+        if totals is None:
+            totals = self._totals[key] = [None] * len(self._vote_fields)
+        for i, field in enumerate(self._vote_fields):
+            votes: Optional[int] = row.get(field)
+            if votes is not None:
+                totals[i] = votes if totals[i] is None else totals[i] + votes
+
+    def rows(self) -> List[Dict[str, str]]:
+        """
+        Provide the county-level rows in the order their keys were first
+        seen, in the same format as the precinct-level rows (without the
+        precinct field).
+        """
+        rows: List[Dict[str, str]] = []
+        for key, totals in self._totals.items():
+            row: Dict[str, str] = {'county': self._county}
+            row.update(zip(self.KEY_FIELDS, key))
+            row.update((field, votes) for field, votes in zip(self._vote_fields, totals)
+                       if votes is not None)
+            rows.append(row)
+        return rows
+
+
+class VoteDiscrepancy(NamedTuple):
+    precinct: str
+    office: str
+    district: str
+    party: str
+    candidate: str
+    field: str
+    expected: int
+    actual: int
+
+    def __str__(self) -> str:
+        location: str = ' / '.join(str(x) for x in (
+            self.precinct, self.office, self.district, self.party, self.candidate) if x)
+        return f'{location}: {self.field} expected {self.expected}, got {self.actual}'
+
+
+class VoteReconciliationObserver(RowObserver):
+    """
+    Checks the rows of the PDF against the totals that it states for them:
+
+    - for each row, the vote-type columns must add up to the votes column;
+    - for each precinct and contest, the candidate rows must add up to the
+      contest's Total Votes Cast row;
+    - the Total Votes Cast row (or, without one, the candidate rows) plus
+      the Overvotes, Undervotes and Not Assigned rows must add up to the
+      contest's Contest Totals row.
+
+    Candidate rows are counted whether or not they are filtered out of the
+    output, so that row filters do not show up as discrepancies. Write-In:
+    rows are only counted when the contest has no Write-in (Write-In
+    Totals) row, of which they are a breakdown.
+
+    Rows arrive in page order, so the rows of a contest are consecutive; a
+    contest is checked as soon as a row of another contest arrives, and
+    only the sums of the current contest are kept.
+    """
+    TOTAL_CANDIDATE: str = 'Total Votes Cast'
+    CONTEST_TOTAL_CANDIDATE: str = 'Contest Totals'
+    UNCAST_CANDIDATES: Tuple[str, ...] = ('Not Assigned', 'Overvotes', 'Undervotes')
+    WRITE_IN_TOTAL_CANDIDATE: str = 'Write-in'
+    WRITE_IN_PREFIX: str = 'Write-In: '
+    # the keys that a contest's votes are summed under, next to the
+    # stated totals, which are kept under their candidate names
+    CANDIDATES: str = 'candidates'
+    UNCAST: str = 'uncast'
+    WRITE_INS: str = 'write-ins'
+
+    def __init__(self, vote_fields: Sequence[str]):
+        self._vote_fields: Tuple[str, ...] = tuple(vote_fields)
+        self._vote_type_fields: Tuple[str, ...] = \
+            tuple(field for field in vote_fields if field != 'votes')
+        self._contest: Optional[Tuple] = None
+        self._contest_sums: Dict[str, Dict[str, int]] = {}
+        self._discrepancies: List[VoteDiscrepancy] = []
+
+    def observe(self, row: Dict[str, str], filtered: bool) -> None:
+        candidate: str = row['candidate']
+        if not candidate:
+            return
+        self._check_vote_types(row)
+        contest: Tuple = (row['precinct'], row['office'], row['district'], row['party'])
+        if contest != self._contest:
+            self._discrepancies += self._check_contest()
+            self._contest, self._contest_sums = contest, {}
+        sums: Dict[str, Dict[str, int]] = self._contest_sums
+        votes: Dict[str, int] = self._votes(row)
+        if candidate in (self.TOTAL_CANDIDATE, self.CONTEST_TOTAL_CANDIDATE):
+            self._add_votes(sums.setdefault(candidate, {}), votes)
+        elif candidate in self.UNCAST_CANDIDATES:
+            self._add_votes(sums.setdefault(self.UNCAST, {}), votes)
+        elif candidate.startswith(self.WRITE_IN_PREFIX):
+            self._add_votes(sums.setdefault(self.WRITE_INS, {}), votes)
+        else:
+            if candidate == self.WRITE_IN_TOTAL_CANDIDATE:
+                self._add_votes(sums.setdefault(candidate, {}), votes)
+            self._add_votes(sums.setdefault(self.CANDIDATES, {}), votes)
+
+    def discrepancies(self) -> List[VoteDiscrepancy]:
+        """
+        Provide every discrepancy found so far, including those of the
+        contest whose rows are being observed.
+        """
+        return self._discrepancies + self._check_contest()
+
+    def _check_contest(self) -> List[VoteDiscrepancy]:
+        contest: Optional[Tuple] = self._contest
+        sums: Dict[str, Dict[str, int]] = self._contest_sums
+        discrepancies: List[VoteDiscrepancy] = []
+        candidate_votes: Dict[str, int] = dict(sums.get(self.CANDIDATES, {}))
+        if self.WRITE_IN_TOTAL_CANDIDATE not in sums:
+            self._add_votes(candidate_votes, sums.get(self.WRITE_INS, {}))
+        cast_votes: Dict[str, int] = candidate_votes
+        if self.TOTAL_CANDIDATE in sums:
+            if self.CANDIDATES in sums or self.WRITE_INS in sums:
+                discrepancies += self._compare(
+                    contest, self.TOTAL_CANDIDATE, sums[self.TOTAL_CANDIDATE],
+                    candidate_votes)
+            cast_votes = sums[self.TOTAL_CANDIDATE]
+        if self.CONTEST_TOTAL_CANDIDATE in sums:
+            contest_votes: Dict[str, int] = dict(cast_votes)
+            self._add_votes(contest_votes, sums.get(self.UNCAST, {}))
+            discrepancies += self._compare(
+                contest, self.CONTEST_TOTAL_CANDIDATE,
+                sums[self.CONTEST_TOTAL_CANDIDATE], contest_votes)
+        return discrepancies
+
+    def _check_vote_types(self, row: Dict[str, str]) -> None:
+        if not self._vote_type_fields or 'votes' not in row or \
+                any(field not in row for field in self._vote_type_fields):
+            return
+        vote_type_sum: int = sum(row[field] for field in self._vote_type_fields)
+        if vote_type_sum != row['votes']:
+            self._discrepancies.append(VoteDiscrepancy(
+                row['precinct'], row['office'], row['district'], row['party'],
+                row['candidate'], 'votes', row['votes'], vote_type_sum))
+
+    def _votes(self, row: Dict[str, str]) -> Dict[str, int]:
+        return {field: row[field] for field in self._vote_fields if field in row}
+
+    @staticmethod
+    def _add_votes(totals: Dict[str, int], votes: Dict[str, int]) -> None:
+        for field, field_votes in votes.items():
+            totals[field] = totals.get(field, 0) + field_votes
+
+    @staticmethod
+    def _compare(contest: Tuple, candidate: str, stated_votes: Dict[str, int],
+                 votes: Dict[str, int]) -> List[VoteDiscrepancy]:
+        return [VoteDiscrepancy(*contest, candidate, field, expected, votes.get(field, 0))
+                for field, expected in stated_votes.items()
+                if votes.get(field, 0) != expected]
@@ -1,5 +1,8 @@
+import re
+import threading
 from abc import abstractmethod
-from typing import Dict, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Pattern, Sequence, Tuple, Union
 
 
 class RowTransformer:
@@ -32,7 +35,7 @@ class StatisticsTransformer(RowTransformer):
     party to the associated values, clearing out the candidate
     value.
     """
-    PARTY_ABBREVIATIONS: Dict[str, str] = {
+    PARTY_ABBREVIATIONS: Mapping[str, str] = MappingProxyType({
         'Total': '',
         'Blank': 'Blank',
         'Democratic Party': 'DEM',
@@ -42,7 +45,7 @@ class StatisticsTransformer(RowTransformer):
         'DEMOCRATIC': 'DEM',
         'REPUBLICAN': 'REP',
         'NONPARTISAN': 'NPA',
-    }
+    })
     OFFICE_NAME: str = 'STATISTICS'
 
     def _transform(self, row: Dict[str, str]) -> Dict[str, str]:
@@ -53,21 +56,154 @@ class StatisticsTransformer(RowTransformer):
         return row
 
 
+class OfficePatternMatcher:
+    """
+    Resolves raw office names to an (office, district) pair by a list of
+    rules, each a dictionary with an office entry and either a pattern
+    entry (a regular expression that must match the whole raw office) or
+    a prefix entry. The district is the rule's district entry, or, if the
+    pattern has a group named district that took part in the match, the
+    captured text (as an int if it is all digits), e.g.
+
+        {'pattern': r'REPRESENTATIVE IN THE GENERAL ASSEMBLY (?P<district>\\d+)(ST|ND|RD|TH) DISTRICT',
+         'office': 'General Assembly'}
+        {'prefix': 'JUDGE OF ELECTION ', 'office': 'Judge of Election'}
+
+    The first matching rule wins. Rules are indexed by the literal text
+    their matches start with (the prefix, or the pattern up to its first
+    special character), so a raw office is only tested against the few
+    rules whose literal start it shares; resolved raw offices are cached,
+    so each distinct raw office is matched once. The cache is only
+    changed under a lock, so a matcher can be shared between threads.
+    """
+    MAX_CACHED_OFFICES: int = 1 << 16
+    SPECIAL_CHARACTERS: str = '.^$*+?{}[]\\|()'
+    OPTIONAL_QUANTIFIERS: str = '*?{'
+
+    def __init__(self, rules: Sequence[Dict[str, Union[str, int]]]):
+        self._rules: List[Tuple[Optional[Pattern], str, Union[str, int]]] = []
+        self._rules_by_prefix: Dict[str, List[int]] = {}
+        for i, rule in enumerate(rules):
+            if 'office' not in rule:
+                raise ValueError(f'office pattern rule {i} has no office: {rule!r}')
+            if 'pattern' in rule:
+                try:
+                    pattern: Optional[Pattern] = re.compile(rule['pattern'], re.DOTALL)
+                except re.error as e:
+                    raise ValueError(f'invalid pattern in office pattern rule {i}: {e}')
+                prefix: str = self._literal_prefix(rule['pattern'])
+            elif 'prefix' in rule:
+                pattern, prefix = None, rule['prefix']
+            else:
+                raise ValueError(f'office pattern rule {i} has no pattern or prefix: {rule!r}')
+            self._rules.append((pattern, rule['office'], rule.get('district', '')))
+            self._rules_by_prefix.setdefault(prefix, []).append(i)
+        self._prefix_lengths: Tuple[int, ...] = \
+            tuple(sorted({len(prefix) for prefix in self._rules_by_prefix}))
+        self._cache: Dict[str, Optional[Tuple[str, Union[str, int]]]] = {}
+        self._cache_lock: threading.Lock = threading.Lock()
+
+    def resolve(self, raw_office: str) -> Optional[Tuple[str, Union[str, int]]]:
+        """
+        Provide the (office, district) pair of the first rule matching the
+        raw office, or None if no rule matches.
+        """
+        try:
+            return self._cache[raw_office]
+        except KeyError:
+            pass
+        office_and_district: Optional[Tuple[str, Union[str, int]]] = None
+        for i in self._candidate_rules(raw_office):
+            pattern, office, district = self._rules[i]
+            if pattern is not None:
+                match = pattern.fullmatch(raw_office)
+                if match is None:
+                    continue
+                captured: Optional[str] = match.group('district') \
+                    if 'district' in pattern.groupindex else None
+                if captured is not None:
+                    district = int(captured) if captured.isdigit() else captured
+            office_and_district = office, district
+            break
+        with self._cache_lock:
+            if len(self._cache) >= self.MAX_CACHED_OFFICES:
+                self._cache.clear()
+            self._cache[raw_office] = office_and_district
+        return office_and_district
+
+    def _candidate_rules(self, raw_office: str) -> List[int]:
+        # the rules whose literal start the raw office shares, in rule order
+        candidates: List[int] = []
+        for length in self._prefix_lengths:
+            if length > len(raw_office):
+                break
+            candidates.extend(self._rules_by_prefix.get(raw_office[:length], ()))
+        return sorted(candidates)
+
+    def __getstate__(self) -> Dict[str, object]:
+        state: Dict[str, object] = dict(self.__dict__)
+        state['_cache'] = {}
+        del state['_cache_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def _literal_prefix(cls, pattern: str) -> str:
+        # the literal text that every match of the pattern starts with, or
+        # less; an alternation outside of any group makes it empty
+        depth: int = 0
+        escaped: bool = False
+        in_class: bool = False
+        for c in pattern:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif in_class:
+                in_class = c != ']'
+            elif c == '[':
+                in_class = True
+            elif c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+            elif c == '|' and depth == 0:
+                return ''
+        prefix: List[str] = []
+        for i, c in enumerate(pattern):
+            if c in cls.SPECIAL_CHARACTERS or \
+                    pattern[i + 1:i + 2] and pattern[i + 1] in cls.OPTIONAL_QUANTIFIERS:
+                break
+            prefix.append(c)
+        return ''.join(prefix)
+
+
 class OfficeToOfficeAndDistrictTransformer(RowTransformer):
     """
     Most counties have a standard mapping of offices to their
     associated districts. This transformer is initialized with this
-    mapping and performs these office and district updates.
+    mapping and performs these office and district updates. Offices
+    that are not in the mapping are resolved by the office_patterns
+    rules, if any (see OfficePatternMatcher).
     """
-    def __init__(self, raw_office_to_office_and_district: Dict[str, Tuple[str, str]]):
+    def __init__(self, raw_office_to_office_and_district: Dict[str, Tuple[str, str]],
+                 office_patterns: Sequence[Dict[str, Union[str, int]]] = ()):
         self._raw_office_to_office_and_district: Dict[str, Tuple[str, str]] = \
-            raw_office_to_office_and_district
+            dict(raw_office_to_office_and_district)
+        self._office_pattern_matcher: Optional[OfficePatternMatcher] = \
+            OfficePatternMatcher(office_patterns) if office_patterns else None
 
     def _transform(self, row: Dict[str, str]) -> Dict[str, str]:
         office: str = row['office']
-        if office in self._raw_office_to_office_and_district:
-            row['office'], row['district'] = \
-                self._raw_office_to_office_and_district[office]
+        office_and_district: Optional[Tuple[str, str]] = \
+            self._raw_office_to_office_and_district.get(office)
+        if office_and_district is None and self._office_pattern_matcher is not None:
+            office_and_district = self._office_pattern_matcher.resolve(office)
+        if office_and_district is not None:
+            row['office'], row['district'] = office_and_district
         return row
 
 
@@ -122,11 +258,13 @@ class DefaultRowTransformer(RowTransformer):
     row. This transformer rolls together these three transformers
     for ease of re-use.
     """
-    def __init__(self, raw_office_to_office_and_district: Dict[str, Tuple[str, str]]):
-        self._row_transformers: list = [
+    def __init__(self, raw_office_to_office_and_district: Dict[str, Tuple[str, str]],
+                 office_patterns: Sequence[Dict[str, Union[str, int]]] = ()):
+        self._row_transformers: Tuple[RowTransformer, ...] = (
             StatisticsTransformer(),
-            OfficeToOfficeAndDistrictTransformer(raw_office_to_office_and_district),
-            WriteInTotalsTransformer()]
+            OfficeToOfficeAndDistrictTransformer(raw_office_to_office_and_district,
+                                                 office_patterns),
+            WriteInTotalsTransformer())
 
     def _transform(self, row: Dict[str, str]) -> Dict[str, str]:
         for row_transformer in self._row_transformers:
@@ -0,0 +1,323 @@
+import collections
+import itertools
+import json
+import multiprocessing
+import queue
+import socketserver
+import threading
+from typing import Deque, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+ROW_BATCH_SIZE: int = 500
+MONITOR_INTERVAL: float = 1.0
+
+
+class WorkerPool:
+    """
+    A fixed number of long-lived worker processes that convert Electionware
+    PDFs. Each worker imports the parser (and pdfreader) once at startup, so
+    jobs do not pay interpreter startup or import costs. Jobs are submitted
+    as (configuration, data source path, output path) and their progress is
+    reported through a per-job queue of (status, payload) messages, where
+    status is one of 'started', 'rows', 'done' or 'error'.
+
+    The pool holds submitted jobs itself and hands each one to an idle
+    worker through that worker's own queue, so it always knows which job a
+    worker has, whether or not the worker got to report it as started.
+
+    memory_limit, in bytes, caps the total address space of all workers; it
+    is split evenly between them and enforced with RLIMIT_AS, so a job that
+    exceeds its share fails with a MemoryError instead of taking the host
+    down. Workers that die are replaced and their job is reported as failed.
+    Jobs still waiting when the pool is closed are reported as failed too.
+    """
+    def __init__(self, workers: int = None, memory_limit: int = None):
+        self._workers: int = workers or multiprocessing.cpu_count()
+        self._memory_limit_per_worker: Optional[int] = \
+            memory_limit // self._workers if memory_limit else None
+        self._result_queue: multiprocessing.Queue = multiprocessing.Queue()
+        self._job_ids: Iterator[int] = itertools.count(1)
+        self._jobs: Dict[int, queue.Queue] = {}
+        self._pending_jobs: Deque[Tuple] = collections.deque()
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._job_queues: Dict[int, multiprocessing.Queue] = {}
+        self._jobs_by_pid: Dict[int, int] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._closed: threading.Event = threading.Event()
+        with self._lock:
+            for _ in range(self._workers):
+                self._start_worker()
+        self._dispatcher: threading.Thread = \
+            threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        self._monitor: threading.Thread = \
+            threading.Thread(target=self._monitor_workers, daemon=True)
+        self._monitor.start()
+
+    def submit(self, configuration: Union[str, Dict], data_source: str,
+               output_path: str = None) -> Tuple[int, queue.Queue]:
+        """
+        Queue a conversion job. configuration is either the path to a JSON or
+        YAML configuration file or the equivalent dictionary; its data_source
+        entry is replaced by the given PDF path. If output_path is given the
+        rows are written there as csv, otherwise they are streamed back in
+        'rows' messages.
+        """
+        job_id: int = next(self._job_ids)
+        messages: queue.Queue = queue.Queue()
+        with self._lock:
+            self._jobs[job_id] = messages
+            self._pending_jobs.append((job_id, configuration, data_source, output_path))
+            self._assign_jobs()
+        return job_id, messages
+
+    def is_pending(self, job_id: int) -> bool:
+        """
+        Whether the job has yet to be answered with 'done' or 'error'. If it
+        has been, that final message is already in the job's queue.
+        """
+        with self._lock:
+            return job_id in self._jobs
+
+    def close(self) -> None:
+        self._closed.set()
+        self._monitor.join()
+        with self._lock:
+            processes: List[multiprocessing.Process] = list(self._processes.values())
+            for job_queue in self._job_queues.values():
+                job_queue.put(None)
+        for process in processes:
+            process.join()
+        self._result_queue.put(None)
+        self._dispatcher.join()
+        with self._lock:
+            for messages in self._jobs.values():
+                messages.put(('error', 'worker pool closed'))
+            self._jobs.clear()
+            self._pending_jobs.clear()
+
+    def _start_worker(self) -> None:
+        # called with the lock held
+        job_queue: multiprocessing.Queue = multiprocessing.Queue()
+        process: multiprocessing.Process = multiprocessing.Process(
+            target=_worker_loop, daemon=True,
+            args=(job_queue, self._result_queue, self._memory_limit_per_worker))
+        process.start()
+        self._processes[process.pid] = process
+        self._job_queues[process.pid] = job_queue
+
+    def _assign_jobs(self) -> None:
+        # called with the lock held; gives each idle worker a pending job
+        if self._closed.is_set():
+            return
+        for pid, job_queue in self._job_queues.items():
+            if not self._pending_jobs:
+                return
+            if pid not in self._jobs_by_pid:
+                job: Tuple = self._pending_jobs.popleft()
+                self._jobs_by_pid[pid] = job[0]
+                job_queue.put(job)
+
+    def _dispatch(self) -> None:
+        while True:
+            message: Optional[Tuple] = self._result_queue.get()
+            if message is None:
+                return
+            job_id, pid, status, payload = message
+            with self._lock:
+                if status in ('done', 'error'):
+                    if self._jobs_by_pid.get(pid) == job_id:
+                        del self._jobs_by_pid[pid]
+                    messages: Optional[queue.Queue] = self._jobs.pop(job_id, None)
+                    self._assign_jobs()
+                else:
+                    messages = self._jobs.get(job_id)
+                if messages is not None:
+                    messages.put((status, payload))
+
+    def _monitor_workers(self) -> None:
+        while not self._closed.wait(MONITOR_INTERVAL):
+            with self._lock:
+                for pid, process in list(self._processes.items()):
+                    if process.is_alive():
+                        continue
+                    del self._processes[pid]
+                    job_queue: multiprocessing.Queue = self._job_queues.pop(pid)
+                    job_queue.cancel_join_thread()
+                    job_queue.close()
+                    job_id: Optional[int] = self._jobs_by_pid.pop(pid, None)
+                    messages: Optional[queue.Queue] = self._jobs.pop(job_id, None)
+                    if messages is not None:
+                        messages.put(('error', f'worker exited with code {process.exitcode}'))
+                    self._start_worker()
+                self._assign_jobs()
+
+
+def _worker_loop(job_queue: multiprocessing.Queue,
+                 result_queue: multiprocessing.Queue,
+                 memory_limit: Optional[int]) -> None:
+    import os
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    # imported up front so that every job runs against warm modules
+    from electionware.csv import get_output_header, parse_rows, write_rows_to_csv
+    pid: int = os.getpid()
+    while True:
+        job: Optional[Tuple] = job_queue.get()
+        if job is None:
+            return
+        job_id, configuration, data_source, output_path = job
+        result_queue.put((job_id, pid, 'started', None))
+        try:
+            configuration = _build_job_configuration(configuration, data_source)
+            # rows as a conversion would write them, so that the job's
+            # threads and output_order entries are honoured
+            rows: Iterable[Dict[str, str]] = parse_rows(configuration)
+            if output_path:
+                output_header: List[str] = \
+                    get_output_header(configuration['table_processing'])
+                write_rows_to_csv(output_path, output_header, rows)
+                result_queue.put((job_id, pid, 'done', {'output': output_path}))
+            else:
+                row_count: int = 0
+                for batch in _batches(rows, ROW_BATCH_SIZE):
+                    row_count += len(batch)
+                    result_queue.put((job_id, pid, 'rows', batch))
+                result_queue.put((job_id, pid, 'done', {'rows': row_count}))
+        except Exception as e:
+            result_queue.put((job_id, pid, 'error', f'{type(e).__name__}: {e}'))
+
+
+def _build_job_configuration(configuration: Union[str, Dict],
+                             data_source: str) -> Dict[str, Union[Dict, List]]:
+    from electionware.configuration import build_configuration, load_configuration
+    from electionware.data_source import FileSource
+    if isinstance(configuration, str):
+        configuration = load_configuration(configuration)
+    else:
+        configuration = build_configuration(dict(configuration, data_source=[]))
+    configuration['data_source'] = [FileSource(data_source)]
+    return configuration
+
+
+def _batches(rows: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ConversionRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one connection to the conversion server. Each line sent by the
+    client is a JSON job:
+
+        {"configuration": "county.json" or {...},
+         "data_source": "county.pdf", "output": "county.csv" (optional)}
+
+    Each job is answered with JSON lines: {"job": id, "status": "started"},
+    zero or more {"job": id, "status": "rows", "rows": [...]} when no output
+    path was given, and finally {"job": id, "status": "done", ...} or
+    {"job": id, "status": "error", "error": "..."}. Jobs sent on one
+    connection run one at a time; concurrent jobs use separate connections.
+    """
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request: Dict = self._parse_request(line)
+            except ValueError as e:
+                self._respond({'job': None, 'status': 'error',
+                               'error': f'bad request: {e}'})
+                continue
+            job_id, messages = self.server.worker_pool.submit(
+                request['configuration'], request['data_source'], request.get('output'))
+            self._stream_job(job_id, messages)
+
+    @staticmethod
+    def _parse_request(line: bytes) -> Dict:
+        request: object = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError(f'expected a JSON object, got {type(request).__name__}')
+        for key, types, required in (('configuration', (str, dict), True),
+                                     ('data_source', (str,), True),
+                                     ('output', (str, type(None)), False)):
+            if key not in request:
+                if required:
+                    raise ValueError(f'missing {key!r}')
+            elif not isinstance(request[key], types):
+                raise ValueError(f'{key!r} has the wrong type: {request[key]!r}')
+        return request
+
+    def _stream_job(self, job_id: int, messages: queue.Queue) -> None:
+        while True:
+            try:
+                status, payload = messages.get(timeout=MONITOR_INTERVAL)
+            except queue.Empty:
+                if self.server.worker_pool.is_pending(job_id) or not messages.empty():
+                    continue
+                status, payload = 'error', 'job was lost by the worker pool'
+            response: Dict = {'job': job_id, 'status': status}
+            if status == 'rows':
+                response['rows'] = payload
+            elif status == 'error':
+                response['error'] = payload
+            elif payload:
+                response.update(payload)
+            self._respond(response)
+            if status in ('done', 'error'):
+                return
+
+    def _respond(self, response: Dict) -> None:
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+        self.wfile.flush()
+
+
+class ThreadingUnixConversionServer(socketserver.ThreadingMixIn,
+                                    socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPConversionServer(socketserver.ThreadingMixIn,
+                                   socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(worker_pool: WorkerPool, socket_path: str = None,
+                  port: int = None) -> socketserver.BaseServer:
+    """
+    Given a WorkerPool, provide a threaded server that accepts conversion
+    jobs on either a Unix socket or a localhost TCP port.
+    """
+    if socket_path:
+        server: socketserver.BaseServer = ThreadingUnixConversionServer(
+            socket_path, ConversionRequestHandler)
+    else:
+        server = ThreadingTCPConversionServer(
+            ('127.0.0.1', port or 0), ConversionRequestHandler)
+    server.worker_pool = worker_pool
+    return server
+
+
+def request_conversion(f_socket: IO, configuration: Union[str, Dict],
+                       data_source: str, output_path: str = None) -> Iterator[Dict]:
+    """
+    Client helper: given a file-like object wrapping a connected socket
+    (socket.makefile('rwb')), send a single job and yield each response.
+    """
+    request: Dict = {'configuration': configuration, 'data_source': data_source}
+    if output_path:
+        request['output'] = output_path
+    f_socket.write(json.dumps(request).encode() + b'\n')
+    f_socket.flush()
+    for line in f_socket:
+        response: Dict = json.loads(line)
+        yield response
+        if response['status'] in ('done', 'error'):
+            return
@@ -0,0 +1,98 @@
+import heapq
+import marshal
+import tempfile
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+DEFAULT_MAX_ROWS_IN_MEMORY: int = 100000
+DEFAULT_MAX_MERGE_WIDTH: int = 64
+
+Record = Tuple
+
+
+class ExternalRowSorter:
+    """
+    Sorts rows on the given fields with bounded memory use. Rows are
+    buffered up to max_rows_in_memory; each full buffer is sorted and
+    spilled to a temporary file as a run of marshalled tuples (one value
+    per header field), and the runs are then k-way merged back into rows.
+    At most max_merge_width runs are open at once; beyond that, runs are
+    merged into longer runs first. The sort is stable, so rows that compare
+    equal keep the order in which they were parsed.
+    """
+    def __init__(self, header: Sequence[str], sort_fields: Sequence[str],
+                 max_rows_in_memory: int = DEFAULT_MAX_ROWS_IN_MEMORY,
+                 max_merge_width: int = DEFAULT_MAX_MERGE_WIDTH,
+                 temporary_directory: str = None):
+        unknown_fields: List[str] = [field for field in sort_fields if field not in header]
+        if unknown_fields:
+            raise ValueError(f'cannot sort on unknown fields: {", ".join(unknown_fields)}')
+        self._header: Tuple[str, ...] = tuple(header)
+        key_indexes: Tuple[int, ...] = tuple(self._header.index(field) for field in sort_fields)
+        self._key: Callable[[Record], Tuple] = \
+            lambda record: tuple(_sort_value(record[i]) for i in key_indexes)
+        self._max_rows_in_memory: int = max_rows_in_memory
+        self._max_merge_width: int = max(max_merge_width, 2)
+        self._temporary_directory: str = temporary_directory
+
+    def sort(self, rows: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+        runs: List[IO] = []
+        buffer: List[Record] = []
+        try:
+            for row in rows:
+                buffer.append(tuple(row.get(field) for field in self._header))
+                if len(buffer) >= self._max_rows_in_memory:
+                    runs.append(self._spill(buffer))
+                    buffer = []
+            buffer.sort(key=self._key)
+            if not runs:
+                records: Iterable[Record] = buffer
+            else:
+                if buffer:
+                    runs.append(self._spill(buffer))
+                    buffer = []
+                while len(runs) > self._max_merge_width:
+                    runs = self._merge_runs(runs)
+                records = heapq.merge(*(self._read_run(run) for run in runs), key=self._key)
+            for record in records:
+                yield {field: value for field, value in zip(self._header, record)
+                       if value is not None}
+        finally:
+            for run in runs:
+                run.close()
+
+    def _spill(self, records: List[Record]) -> IO:
+        records.sort(key=self._key)
+        return self._write_run(records)
+
+    def _merge_runs(self, runs: List[IO]) -> List[IO]:
+        merged_runs: List[IO] = []
+        for i in range(0, len(runs), self._max_merge_width):
+            group: List[IO] = runs[i:i + self._max_merge_width]
+            merged_runs.append(self._write_run(heapq.merge(
+                *(self._read_run(run) for run in group), key=self._key)))
+            for run in group:
+                run.close()
+        return merged_runs
+
+    def _write_run(self, records: Iterable[Record]) -> IO:
+        run: IO = tempfile.TemporaryFile(dir=self._temporary_directory)
+        for record in records:
+            marshal.dump(record, run)
+        run.seek(0)
+        return run
+
+    @staticmethod
+    def _read_run(run: IO) -> Iterator[Record]:
+        while True:
+            try:
+                yield marshal.load(run)
+            except EOFError:
+                return
+
+
+def _sort_value(value: object) -> Tuple[bool, object]:
+    # district values mix ints and strings, and missing values are None;
+    # numbers sort before strings and None sorts as an empty string
+    if value is None:
+        return True, ''
+    return isinstance(value, str), value
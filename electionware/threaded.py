@@ -0,0 +1,101 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+from pdfreader import SimplePDFViewer
+
+from electionware.configuration import ConversionPlan, compile_configuration, \
+    validate_threaded_configuration
+from electionware.data_source import DataSource
+from electionware.parser import PageParser
+from electionware.pdf import PDFPageIterator, get_page_count
+from electionware.row_observers import RowObserver
+
+DEFAULT_PAGES_PER_TASK: int = 16
+
+Observation = Tuple[Dict[str, str], bool]
+
+
+class _ObservationRecorder(RowObserver):
+    """
+    Records every row a worker thread parses, with whether it was
+    filtered out, so that the real row observers can see the rows on the
+    consuming thread in page order.
+    """
+    def __init__(self):
+        self.observations: List[Observation] = []
+
+    def observe(self, row: Dict[str, str], filtered: bool) -> None:
+        self.observations.append((row, filtered))
+
+
+class ThreadedDataSourceParser(Iterable[Dict[str, str]]):
+    """
+    As DataSourceParser, but pages are parsed by a pool of threads. On a
+    free-threaded (no-GIL) CPython build this parses pages in parallel
+    without the pickling and memory duplication of worker processes; on
+    a standard build it is safe but no faster than DataSourceParser.
+
+    Each data source is split into tasks of pages_per_task consecutive
+    pages. Every task opens its own file object and SimplePDFViewer, so
+    no viewer (and no current page number) is shared between threads.
+    Everything else a worker touches (the ConversionPlan, the row
+    transformers and filters, and their class-level constants) is
+    immutable, except for the office pattern cache, which is only
+    changed under a lock. Rows are provided in the same order as
+    DataSourceParser, and row observers are called on the consuming
+    thread, in that same order, so they need not be thread-safe. At most
+    twice as many tasks as workers are parsed ahead of the consumer.
+
+    The profiling and render_watchdog entries are not supported in this
+    mode; a configuration with either raises ConfigurationError.
+    """
+    def __init__(self, configuration: Dict[str, Union[Dict, List]],
+                 row_observers: Sequence[RowObserver] = (),
+                 workers: int = None, pages_per_task: int = DEFAULT_PAGES_PER_TASK):
+        validate_threaded_configuration(configuration)
+        self._configuration: Dict[str, Union[Dict, List]] = configuration
+        self._plan: ConversionPlan = compile_configuration(configuration)
+        self._row_observers: Tuple[RowObserver, ...] = tuple(row_observers)
+        self._workers: int = workers or os.cpu_count() or 1
+        self._pages_per_task: int = max(pages_per_task, 1)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        pending: Deque[Future] = deque()
+        with ThreadPoolExecutor(self._workers) as executor:
+            try:
+                for data_source, page_numbers in self._tasks():
+                    pending.append(executor.submit(self._parse_pages, data_source, page_numbers))
+                    if len(pending) >= 2 * self._workers:
+                        yield from self._replay(pending.popleft().result())
+                while pending:
+                    yield from self._replay(pending.popleft().result())
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _tasks(self) -> Iterator[Tuple[DataSource, range]]:
+        for data_source in self._configuration['data_source']:
+            with data_source.get_file_like_object() as f_obj:
+                page_count: int = get_page_count(SimplePDFViewer(f_obj))
+            for first_page in range(1, page_count + 1, self._pages_per_task):
+                yield data_source, range(
+                    first_page, min(first_page + self._pages_per_task, page_count + 1))
+
+    def _parse_pages(self, data_source: DataSource,
+                     page_numbers: range) -> List[Observation]:
+        recorder: _ObservationRecorder = _ObservationRecorder()
+        with data_source.get_file_like_object() as f_obj:
+            for page in PDFPageIterator(f_obj=f_obj, page_numbers=page_numbers):
+                print(f'processing page {page.get_page_number()} of {f_obj.name}')
+                for _ in PageParser(self._plan, page, (recorder,)):
+                    pass
+        return recorder.observations
+
+    def _replay(self, observations: List[Observation]) -> Iterator[Dict[str, str]]:
+        for row, filtered in observations:
+            for row_observer in self._row_observers:
+                row_observer.observe(row, filtered)
+            if not filtered:
+                yield row
@@ -0,0 +1,309 @@
+import json
+import multiprocessing
+import re
+import time
+from itertools import islice
+from multiprocessing.connection import Connection
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple, Union
+
+from pdfreader import SimplePDFViewer
+
+from electionware.data_source import DataSource
+from electionware.pdf import PDFStrings
+
+DEFAULT_TIMEOUT: float = 60.0
+TEXT_SHOWING_OPERATORS: Tuple[bytes, ...] = (b'Tj', b"'", b'"', b'TJ')
+LITERAL_ESCAPES: Dict[bytes, bytes] = {
+    b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f',
+    b'(': b'(', b')': b')', b'\\': b'\\'}
+CONTENT_TOKEN: Pattern = re.compile(
+    rb'(?P<space>\s+)|(?P<comment>%[^\r\n]*)|(?P<open>\()|(?P<hex><[0-9A-Fa-f\s]*>)|'
+    rb'(?P<dictionary><<|>>)|(?P<array>[\[\]])|(?P<other>[^\s()<>\[\]{}/%]+|/[^\s()<>\[\]{}/%]*|.)',
+    re.DOTALL)
+OCTAL_DIGITS: bytes = b'01234567'
+INLINE_IMAGE_END: Pattern = re.compile(rb'\sEI(?=\s|$)')
+
+
+class RenderFailure(NamedTuple):
+    """
+    A page that could not be rendered within the watchdog's budget.
+    reason is one of timeout, memory, crashed, or error; fallback is
+    used if the page was parsed from its fallback extraction instead,
+    failed if that extraction could not be parsed either, unavailable
+    if the page's content stream could not be decoded within the budget
+    either, or disabled.
+    """
+    data_source: str
+    page_number: int
+    reason: str
+    detail: str
+    fallback: str
+    seconds: float
+
+    def __str__(self) -> str:
+        return f'{self.data_source} page {self.page_number}: render {self.reason} ' \
+               f'after {self.seconds:.1f} s ({self.detail}); fallback {self.fallback}'
+
+
+class RenderedPage(PDFStrings):
+    """
+    A page whose strings were extracted by the RenderWatchdog, either by
+    rendering it in the worker process or, if that failed (see failure),
+    by the fallback extraction. The page's content stream was decoded in
+    the worker process too.
+    """
+    def __init__(self, page_number: int, strings: List[str], content_stream: bytes,
+                 failure: Optional[RenderFailure] = None):
+        super().__init__(None)
+        self._page_number: int = page_number
+        self._strings: List[str] = strings
+        self._content_stream: bytes = content_stream
+        self.failure: Optional[RenderFailure] = failure
+
+    def get_page_number(self) -> int:
+        return self._page_number
+
+    def get_content_stream(self) -> bytes:
+        return self._content_stream
+
+    def get_strings(self) -> List[str]:
+        return self._strings
+
+
+class RenderWatchdog:
+    """
+    Navigates to, decodes, and renders pages in a separate worker process
+    under a time budget (timeout, in seconds) and optionally an address
+    space budget (memory_limit, in MB), so that a single malformed or
+    unusually complex page, including one whose content stream is a
+    decompression bomb, cannot stall a whole run. A worker that exceeds
+    the budget is killed and replaced for the next page. The budget of a
+    page starts once the worker has loaded the PDF, so that a replaced
+    worker's start-up does not count against the page after a failure;
+    start-up has a budget of the same length of its own.
+
+    When a page fails, its strings are extracted from the content stream
+    the worker decoded before rendering (see extract_content_strings),
+    unless fallback is False or the stream could not be decoded within
+    the budget either. Failures are kept in failures and, if report is
+    given, appended to that file as JSON lines.
+    """
+    def __init__(self, settings: Dict[str, Union[str, int, float, bool]]):
+        self._timeout: float = settings.get('timeout', DEFAULT_TIMEOUT)
+        memory_limit: Optional[int] = settings.get('memory_limit')
+        self._memory_limit: Optional[int] = memory_limit * 1024 * 1024 if memory_limit else None
+        self._fallback: bool = settings.get('fallback', True)
+        self._report_path: Optional[str] = settings.get('report')
+        self.failures: List[RenderFailure] = []
+        self._data_source: Optional[DataSource] = None
+        self._process: Optional[multiprocessing.Process] = None
+        self._connection: Optional[Connection] = None
+
+    def render(self, data_source_name: str, data_source: DataSource,
+               page_number: int) -> Optional[RenderedPage]:
+        """
+        Given a page number of the data source, provide the page's rendered
+        strings. If rendering fails, provide the fallback extraction
+        instead, with its failure set and not yet recorded, so that the
+        caller can record whether the extraction could be parsed; if there
+        is no fallback extraction, the failure is recorded and None is
+        provided.
+        """
+        start_time: float = time.perf_counter()
+        reason, result, content_stream = self._render_in_worker(data_source, page_number)
+        if reason == 'ok':
+            return RenderedPage(page_number, result, content_stream)
+        if not self._fallback:
+            fallback: str = 'disabled'
+        elif content_stream is None:
+            fallback = 'unavailable'
+        else:
+            fallback = 'used'
+        failure: RenderFailure = RenderFailure(
+            data_source_name, page_number, reason, result, fallback,
+            time.perf_counter() - start_time)
+        if fallback != 'used':
+            self.record(failure)
+            return None
+        strings: List[str] = extract_content_strings(content_stream)
+        return RenderedPage(page_number, strings, content_stream, failure)
+
+    def record(self, failure: RenderFailure) -> None:
+        print(f'render failure: {failure}')
+        self.failures.append(failure)
+        if self._report_path:
+            with open(self._report_path, 'a') as f_out:
+                f_out.write(json.dumps(failure._asdict()) + '\n')
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._connection.close()
+            self._process.join(1)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        self._data_source = self._process = self._connection = None
+
+    def _render_in_worker(self, data_source: DataSource, page_number: int
+                          ) -> Tuple[str, Union[str, List[str]], Optional[bytes]]:
+        if data_source is not self._data_source:
+            self.close()
+        if self._process is None:
+            self._start_worker(data_source, page_number)
+            status, detail = self._receive('worker not ready')
+            if status != 'ready':
+                return status, detail, None
+        self._connection.send(page_number)
+        content_stream: Optional[bytes] = None
+        deadline: float = time.perf_counter() + self._timeout
+        while True:
+            status, result = self._receive('no result', deadline)
+            if status != 'content':
+                return status, result, content_stream
+            content_stream = result
+
+    def _receive(self, timeout_detail: str,
+                 deadline: Optional[float] = None) -> Tuple[str, object]:
+        # the worker is killed unless it is still usable afterwards
+        timeout: float = self._timeout if deadline is None \
+            else max(deadline - time.perf_counter(), 0.0)
+        if not self._connection.poll(timeout):
+            self._kill_worker()
+            return 'timeout', f'{timeout_detail} within {self._timeout:g} s'
+        try:
+            status, result = self._connection.recv()
+        except EOFError:
+            self._process.join()
+            exit_code: int = self._process.exitcode
+            self._kill_worker()
+            return 'crashed', f'worker exited with code {exit_code}'
+        if status == 'memory':
+            self._kill_worker()
+        return status, result
+
+    def _start_worker(self, data_source: DataSource, page_number: int) -> None:
+        self._connection, worker_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_render_worker, daemon=True,
+            args=(data_source, self._memory_limit, page_number, worker_connection))
+        self._process.start()
+        worker_connection.close()
+        self._data_source = data_source
+
+    def _kill_worker(self) -> None:
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+        self._data_source = self._process = self._connection = None
+
+
+def _render_worker(data_source: DataSource, memory_limit: Optional[int],
+                   first_page_number: int, connection: Connection) -> None:
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    with data_source.get_file_like_object() as f_obj:
+        pdf_viewer: SimplePDFViewer = SimplePDFViewer(f_obj)
+        # loading the page tree up to the first page is part of start-up,
+        # not of that page's budget
+        for _ in islice(pdf_viewer.doc.pages(), first_page_number):
+            pass
+        connection.send(('ready', None))
+        while True:
+            try:
+                page_number: int = connection.recv()
+            except EOFError:
+                return
+            try:
+                pdf_viewer.navigate(page_number)
+                connection.send(('content', pdf_viewer.stream))
+                pdf_viewer.render()
+                connection.send(('ok', list(pdf_viewer.canvas.strings)))
+            except MemoryError:
+                connection.send(('memory', f'memory limit of {memory_limit >> 20} MB exceeded'
+                                 if memory_limit else 'out of memory'))
+            except Exception as e:
+                connection.send(('error', f'{type(e).__name__}: {e}'))
+
+
+def extract_content_strings(content: bytes) -> List[str]:
+    """
+    Given a page's decoded content stream, provide the strings shown by its
+    text operators (Tj, ', ", and each string of TJ), in order, without
+    interpreting fonts: string bytes are decoded as Latin-1. This matches
+    what rendering provides for the standard-encoded fonts Electionware
+    uses, and is linear in the size of the stream.
+    """
+    strings: List[str] = []
+    operands: List[Union[bytes, List[bytes]]] = []
+    array: Optional[List[bytes]] = None
+    position: int = 0
+    while position < len(content):
+        match = CONTENT_TOKEN.match(content, position)
+        position = match.end()
+        kind: str = match.lastgroup
+        if kind == 'open':
+            string, position = _read_literal_string(content, position)
+            (operands if array is None else array).append(string)
+        elif kind == 'hex':
+            digits: bytes = re.sub(rb'\s', b'', match.group()[1:-1])
+            string = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode())
+            (operands if array is None else array).append(string)
+        elif kind == 'array':
+            if match.group() == b'[':
+                array = []
+            elif array is not None:
+                operands.append(array)
+                array = None
+        elif kind == 'other' and array is None:
+            token: bytes = match.group()
+            if token[:1].isdigit() or token[:1] in b'+-./':
+                operands.append(token)
+                continue
+            if token in TEXT_SHOWING_OPERATORS and operands:
+                operand: Union[bytes, List[bytes]] = operands[-1]
+                if isinstance(operand, list):
+                    strings.extend(s.decode('latin-1') for s in operand)
+                else:
+                    strings.append(operand.decode('latin-1'))
+            elif token == b'ID':
+                end = INLINE_IMAGE_END.search(content, position)
+                position = end.end() if end else len(content)
+            operands = []
+    return strings
+
+
+def _read_literal_string(content: bytes, position: int) -> Tuple[bytes, int]:
+    # position is just after the opening parenthesis; parentheses nest
+    # unless escaped
+    string: bytearray = bytearray()
+    depth: int = 1
+    while position < len(content):
+        c: bytes = content[position:position + 1]
+        position += 1
+        if c == b'\\':
+            escape: bytes = content[position:position + 1]
+            position += 1
+            if escape in LITERAL_ESCAPES:
+                string += LITERAL_ESCAPES[escape]
+            elif escape and escape in OCTAL_DIGITS:
+                digits: bytes = escape
+                while len(digits) < 3 and content[position:position + 1] and \
+                        content[position:position + 1] in OCTAL_DIGITS:
+                    digits += content[position:position + 1]
+                    position += 1
+                string.append(int(digits, 8) & 0xFF)
+            elif escape == b'\r':
+                if content[position:position + 1] == b'\n':
+                    position += 1
+            elif escape != b'\n':
+                string += escape
+            continue
+        if c == b'(':
+            depth += 1
+        elif c == b')':
+            depth -= 1
+            if depth == 0:
+                break
+        string += c
+    return bytes(string), position
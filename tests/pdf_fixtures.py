@@ -0,0 +1,109 @@
+import io
+from typing import Dict, List, Sequence, Tuple
+
+EXPECTED_HEADER: List[str] = ['Summary Results Report', 'OFFICIAL RESULTS']
+EXPECTED_FOOTER: str = 'Precinct Summary - 01/01/2021'
+TABLE_HEADER: List[str] = ['TOTAL', 'Election Day', 'Absentee']
+
+RAW_CONFIGURATION: Dict = {
+    'data_source': [],
+    'election_description': {
+        'county': 'Test', 'state_abbrev': 'AA', 'yyyymmdd': '20001231',
+        'type': 'test',
+    },
+    'page_structure': {
+        'expected_header': EXPECTED_HEADER,
+        'expected_footer': EXPECTED_FOOTER,
+        'table_headers': [TABLE_HEADER],
+        'has_vote_percent_column': False,
+    },
+    'table_processing': {
+        'extra_row_transformers': [],
+        'extra_row_filters': [],
+        'raw_office_to_office_and_district': {
+            'PRESIDENT OF THE UNITED STATES': ('President', ''),
+            'REPRESENTATIVE IN CONGRESS': ('U.S. House', 1),
+        },
+        'openelections_mapped_header': ['votes', 'election_day', 'absentee'],
+    },
+}
+
+Contest = Tuple[str, Sequence[Tuple[str, int, int]]]
+
+
+def build_page_strings(precinct: str, contests: Sequence[Contest]) -> List[str]:
+    """
+    Given a precinct and a list of (office, [(candidate, election day votes,
+    absentee votes)]) contests, provide the strings of an Electionware page
+    matching RAW_CONFIGURATION, including a filtered Total Votes Cast row.
+    """
+    strings: List[str] = EXPECTED_HEADER + [precinct]
+    for office, candidates in contests:
+        strings += ['Vote For 1', office] + TABLE_HEADER
+        for candidate, election_day, absentee in candidates:
+            strings += [candidate, f'{election_day + absentee:,}',
+                        f'{election_day:,}', f'{absentee:,}']
+        election_day_total: int = sum(c[1] for c in candidates)
+        absentee_total: int = sum(c[2] for c in candidates)
+        strings += ['Total Votes Cast', f'{election_day_total + absentee_total:,}',
+                    f'{election_day_total:,}', f'{absentee_total:,}']
+    return strings + [EXPECTED_FOOTER]
+
+
+def build_sample_pages(page_count: int) -> List[List[str]]:
+    pages: List[List[str]] = []
+    for i in range(page_count):
+        pages.append(build_page_strings(f'Precinct {i + 1}', [
+            ('DEM PRESIDENT OF THE UNITED STATES',
+             [('JOHN DOE', 10 + i, 3), ('JANE ROE', 1000 + i, i)]),
+            ('REP REPRESENTATIVE IN CONGRESS', [('JIM POE', 5, 2 * i)]),
+        ]))
+    return pages
+
+
+def build_pdf(pages: Sequence[Sequence[str]]) -> bytes:
+    """
+    Given the strings of each page, provide a minimal uncompressed PDF whose
+    pages render (via pdfreader's SimplePDFViewer) to exactly those strings.
+    """
+    objects: List[bytes] = [b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+                            b'']
+    font_id, pages_id = 1, 2
+    kids: List[int] = []
+    for strings in pages:
+        content: bytes = b'BT /F1 10 Tf ' + b' '.join(
+            b'(' + _escape(s) + b') Tj' for s in strings) + b' ET'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) +
+                       content + b'\nendstream')
+        objects.append(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (pages_id, font_id, len(objects)))
+        kids.append(len(objects))
+    objects[pages_id - 1] = b'<< /Type /Pages /Kids [' + \
+        b' '.join(b'%d 0 R' % kid for kid in kids) + b'] /Count %d >>' % len(kids)
+    objects.append(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+    pdf: io.BytesIO = io.BytesIO()
+    pdf.write(b'%PDF-1.4\n')
+    offsets: List[int] = []
+    for object_id, body in enumerate(objects, 1):
+        offsets.append(pdf.tell())
+        pdf.write(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+    xref_offset: int = pdf.tell()
+    pdf.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        pdf.write(b'%010d 00000 n \n' % offset)
+    pdf.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+              % (len(objects) + 1, len(objects), xref_offset))
+    return pdf.getvalue()
+
+
+def write_pdf(path: str, pages: Sequence[Sequence[str]]) -> str:
+    with open(path, 'wb') as f_out:
+        f_out.write(build_pdf(pages))
+    return path
+
+
+def _escape(s: str) -> bytes:
+    return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') \
+        .encode('latin-1')
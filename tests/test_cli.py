@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from electionware.cli import main
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+
+class TestCLI(TestCase):
+    def test__main(self):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=['county.pdf'])
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(raw_configuration, f_out)
+            with patch('electionware.csv.write_rows_to_csv') as mock:
+                self.assertEqual(0, main([path, '--output', 'out.csv']))
+            self.assertEqual(mock.call_args[0][0], 'out.csv')
+            self.assertEqual(mock.call_args[0][1], [
+                'county', 'precinct', 'office', 'district', 'party',
+                'candidate', 'election_day', 'absentee', 'votes'])
+
+    def test__timing(self):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=['county.pdf'])
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(raw_configuration, f_out)
+            with patch('electionware.csv.write_rows_to_csv'), \
+                    redirect_stderr(StringIO()) as stderr:
+                self.assertEqual(0, main([path, '--output', 'out.csv', '--timing']))
+        phases = dict(phase.split(': ') for phase in stderr.getvalue().strip().split(', '))
+        self.assertLessEqual({'package import', 'configuration loading', 'parser import'},
+                             set(phases))
+        for duration in phases.values():
+            self.assertRegex(duration, r'^\d+\.\d ms$')
+
+    def test__invalid_configuration(self):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=['county.pdf'])
+        del raw_configuration['page_structure']
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(raw_configuration, f_out)
+            self.assertEqual(2, main([path]))
+
+    def test__unknown_row_filter(self):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=['county.pdf'],
+                                 table_processing=dict(RAW_CONFIGURATION['table_processing'],
+                                                       extra_row_filters=['NoSuchFilter']))
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(raw_configuration, f_out)
+            with redirect_stderr(StringIO()) as stderr:
+                self.assertEqual(2, main([path]))
+        self.assertIn('unknown row filter: NoSuchFilter', stderr.getvalue())
+
+    def test__missing_configuration_file(self):
+        with redirect_stderr(StringIO()):
+            self.assertEqual(2, main(['no_such_configuration.json']))
+
+    def test__invalid_profiling_mode(self):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=['county.pdf'],
+                                 profiling={'mode': 'bogus'})
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(raw_configuration, f_out)
+            with redirect_stderr(StringIO()) as stderr:
+                self.assertEqual(2, main([path]))
+        self.assertIn('unknown profiling mode: bogus', stderr.getvalue())
+
+    def test__output_requires_single_configuration(self):
+        self.assertEqual(2, main(['a.json', 'b.json', '--output', 'out.csv']))
+
+    def test__precinct_with_aggregate(self):
+        self.assertEqual(2, main(['a.json', '--precinct', 'Precinct 1', '--aggregate']))
+
+    def test__precinct_with_output_order(self):
+        with TemporaryDirectory() as directory:
+            pdf_path = write_pdf(os.path.join(directory, 'test.pdf'), build_sample_pages(3))
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(dict(RAW_CONFIGURATION, data_source=[pdf_path],
+                               index_directory=os.path.join(directory, 'index'),
+                               output_order=['candidate', 'precinct']), f_out)
+            output_path = os.path.join(directory, 'out.csv')
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                self.assertEqual(0, main([path, '--output', output_path, '--precinct',
+                                          'Precinct 3', '--precinct', 'Precinct 1']))
+            with open(output_path) as f_in:
+                rows = list(csv.DictReader(f_in))
+        self.assertEqual(sorted((row['candidate'], row['precinct']) for row in rows),
+                         [(row['candidate'], row['precinct']) for row in rows])
+        self.assertEqual({'Precinct 1', 'Precinct 3'}, {row['precinct'] for row in rows})
+
+    def test__no_pdfreader_import_at_startup(self):
+        code = ('import sys; import electionware.cli; '
+                'print("pdfreader" in sys.modules)')
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(b'False', output.strip())
+
+    def test__diff_with_configuration_per_pdf(self):
+        old_configuration = dict(RAW_CONFIGURATION, page_structure=dict(
+            RAW_CONFIGURATION['page_structure'],
+            expected_header=['Summary Results Report', 'UNOFFICIAL RESULTS']))
+        old_pages = [['UNOFFICIAL RESULTS' if s == 'OFFICIAL RESULTS' else s for s in page]
+                     for page in build_sample_pages(2)]
+        new_pages = build_sample_pages(2)
+        new_pages[1][new_pages[1].index('JIM POE') + 1] = '99'
+        with TemporaryDirectory() as directory:
+            paths = []
+            for name, configuration in (('old', old_configuration), ('new', RAW_CONFIGURATION)):
+                paths.append(os.path.join(directory, f'{name}.json'))
+                with open(paths[-1], 'w') as f_out:
+                    json.dump(configuration, f_out)
+            old_pdf = write_pdf(os.path.join(directory, 'old.pdf'), old_pages)
+            new_pdf = write_pdf(os.path.join(directory, 'new.pdf'), new_pages)
+            output_path = os.path.join(directory, 'diff.csv')
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                self.assertEqual(0, main(paths + ['--diff', old_pdf, new_pdf,
+                                                  '--output', output_path]))
+            with open(output_path) as f_in:
+                rows = list(csv.DictReader(f_in))
+        self.assertEqual([('changed', 'JIM POE', '99')],
+                         [(row['change'], row['candidate'], row['votes']) for row in rows])
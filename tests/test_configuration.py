@@ -0,0 +1,136 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.configuration import ConfigurationError, build_configuration, \
+    compile_configuration, load_configuration
+from electionware.row_filters import SpecificWriteInCandidatesFilter
+from electionware.row_transformers import DefaultRowTransformer, OfficeTitleCaseTransformer
+from pdf_fixtures import RAW_CONFIGURATION as SAMPLE_CONFIGURATION
+
+RAW_CONFIGURATION = {
+    'data_source': ['county.pdf'],
+    'election_description': {'county': 'test-county'},
+    'table_processing': {
+        'extra_row_transformers': ['OfficeTitleCaseTransformer'],
+        'extra_row_filters': ['SpecificWriteInCandidatesFilter'],
+        'raw_office_to_office_and_district': {
+            'office-12': ['test-office', 12],
+        },
+        'openelections_mapped_header': ['votes'],
+    },
+}
+
+
+class TestBuildConfiguration(TestCase):
+    def test__build_configuration(self):
+        configuration = build_configuration(RAW_CONFIGURATION, 'base')
+        self.assertEqual(configuration['data_source'][0]._filename,
+                         os.path.join('base', 'county.pdf'))
+        table_processing = configuration['table_processing']
+        self.assertIsInstance(table_processing['extra_row_transformers'][0],
+                              OfficeTitleCaseTransformer)
+        self.assertIsInstance(table_processing['extra_row_filters'][0],
+                              SpecificWriteInCandidatesFilter)
+        self.assertEqual(table_processing['raw_office_to_office_and_district'],
+                         {'office-12': ('test-office', 12)})
+        self.assertEqual(table_processing['openelections_mapped_header'], ['votes'])
+        self.assertEqual(RAW_CONFIGURATION['data_source'], ['county.pdf'])
+
+
+class TestLoadConfiguration(TestCase):
+    def test__load_json(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with open(path, 'w') as f_out:
+                json.dump(RAW_CONFIGURATION, f_out)
+            configuration = load_configuration(path)
+            self.assertEqual(configuration['data_source'][0]._filename,
+                             os.path.join(directory, 'county.pdf'))
+            self.assertEqual(configuration['election_description'],
+                             {'county': 'test-county'})
+
+
+class TestCompileConfiguration(TestCase):
+    def test__compile_configuration(self):
+        configuration = build_configuration(dict(
+            SAMPLE_CONFIGURATION, table_processing=dict(
+                SAMPLE_CONFIGURATION['table_processing'],
+                extra_row_transformers=['OfficeTitleCaseTransformer'])))
+        plan = compile_configuration(configuration)
+        self.assertEqual('Test', plan.county)
+        self.assertEqual(('TOTAL Election Day Absentee',), plan.expected_table_headers)
+        self.assertEqual(len('TOTAL Election Day Absentee'),
+                         plan.expected_table_header_length)
+        self.assertEqual(('votes', 'election_day', 'absentee'),
+                         plan.openelections_mapped_header)
+        self.assertIsInstance(plan.row_transformers[0], DefaultRowTransformer)
+        self.assertIsInstance(plan.row_transformers[1], OfficeTitleCaseTransformer)
+        self.assertEqual(4, len(plan.row_filters))
+
+    def test__missing_section(self):
+        configuration = dict(SAMPLE_CONFIGURATION)
+        del configuration['page_structure']
+        with self.assertRaises(ConfigurationError):
+            compile_configuration(configuration)
+
+    def test__missing_key(self):
+        configuration = dict(SAMPLE_CONFIGURATION, page_structure={'expected_header': []})
+        with self.assertRaises(ConfigurationError):
+            compile_configuration(configuration)
+
+    def test__row_filter_names_not_resolved(self):
+        configuration = dict(SAMPLE_CONFIGURATION, table_processing=dict(
+            SAMPLE_CONFIGURATION['table_processing'], extra_row_filters=['BlankPartyFilter']))
+        with self.assertRaises(ConfigurationError):
+            compile_configuration(configuration)
+
+    def test__invalid_office_pattern(self):
+        configuration = dict(SAMPLE_CONFIGURATION, table_processing=dict(
+            SAMPLE_CONFIGURATION['table_processing'],
+            office_patterns=[{'pattern': '(', 'office': 'x'}]))
+        with self.assertRaises(ConfigurationError):
+            compile_configuration(configuration)
+
+    def test__unknown_output_order_field(self):
+        configuration = dict(SAMPLE_CONFIGURATION, output_order=['precinct', 'ward'])
+        with self.assertRaisesRegex(ConfigurationError, 'ward'):
+            compile_configuration(configuration)
+
+    def test__missing_data_source(self):
+        raw_configuration = dict(SAMPLE_CONFIGURATION)
+        del raw_configuration['data_source']
+        with self.assertRaisesRegex(ConfigurationError, 'data_source'):
+            build_configuration(raw_configuration)
+
+    def test__unknown_row_filter_name(self):
+        raw_configuration = dict(SAMPLE_CONFIGURATION, data_source=[], table_processing=dict(
+            SAMPLE_CONFIGURATION['table_processing'], extra_row_filters=['NoSuchFilter']))
+        with self.assertRaisesRegex(ConfigurationError, 'NoSuchFilter'):
+            build_configuration(raw_configuration)
+
+    def test__missing_or_malformed_file(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'county.json')
+            with self.assertRaises(ConfigurationError):
+                load_configuration(path)
+            with open(path, 'w') as f_out:
+                f_out.write('{')
+            with self.assertRaises(ConfigurationError):
+                load_configuration(path)
+
+    def test__invalid_profiling_and_watchdog_settings(self):
+        for entry, settings in (('profiling', {'mode': 'bogus'}),
+                                ('profiling', {'pages': [5, 2]}),
+                                ('profiling', {'slowest': 0}),
+                                ('profiling', 'yes'),
+                                ('render_watchdog', {'timeout': '60'}),
+                                ('render_watchdog', {'timeout': True}),
+                                ('render_watchdog', {'memory_limit': -1}),
+                                ('render_watchdog', {'timout': 60})):
+            with self.assertRaises(ConfigurationError, msg=f'{entry}: {settings!r}'):
+                compile_configuration(dict(SAMPLE_CONFIGURATION, **{entry: settings}))
+        compile_configuration(dict(
+            SAMPLE_CONFIGURATION, profiling={'mode': 'sampling', 'pages': [2, 4]},
+            render_watchdog={'timeout': 0.5, 'memory_limit': 512, 'fallback': False}))
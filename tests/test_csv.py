@@ -1,9 +1,14 @@
+import csv
 import os
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import patch
 
-from electionware.csv import get_output_file_path, get_output_header, \
-    write_electionware_pdf_to_csv
+from electionware.configuration import build_configuration
+from electionware.csv import convert_electionware_pdf_to_csv, get_county_output_file_path, \
+    get_output_file_path, get_output_header, write_electionware_pdf_to_csv
+from electionware.row_filters import RowFilter
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
 
 
 class TestOutputFilePath(TestCase):
@@ -16,6 +21,15 @@ class TestOutputFilePath(TestCase):
         self.assertEqual(expected, actual)
 
 
+class TestCountyOutputFilePath(TestCase):
+    def test__county_output_file_path(self):
+        self.assertEqual(
+            os.path.join('..', '2000', '20001231__aa__test__county_name__county.csv'),
+            get_county_output_file_path(os.path.join(
+                '..', '2000', '20001231__aa__test__county_name__precinct.csv')))
+        self.assertEqual('out__county.csv', get_county_output_file_path('out.csv'))
+
+
 class TestOutputHeader(TestCase):
     def test__single_vote_type_header(self):
         expected = ['county', 'precinct', 'office', 'district', 'party',
@@ -35,12 +49,17 @@ class TestOutputHeader(TestCase):
 
 class TestCSV(TestCase):
     def test__pdf_to_csv(self):
-        with patch('electionware.csv._write_electionware_pdf_to_csv') as mock:
+        with patch('electionware.csv.write_rows_to_csv') as mock:
             configuration = {
                 'election_description': {
                     'yyyymmdd': '20001231', 'state_abbrev': 'AA',
                     'type': 'test', 'county': 'County Name'},
+                'page_structure': {
+                    'expected_header': [], 'expected_footer': 'DONE',
+                    'table_headers': [['votes']], 'has_vote_percent_column': False},
                 'table_processing': {
+                    'extra_row_transformers': [], 'extra_row_filters': [],
+                    'raw_office_to_office_and_district': {},
                     'openelections_mapped_header': ['votes']}
             }
             write_electionware_pdf_to_csv(configuration.copy())
@@ -51,3 +70,65 @@ class TestCSV(TestCase):
             self.assertEqual(mock.call_args[0][0], expected_filepath)
             self.assertEqual(mock.call_args[0][1], expected_header)
             self.assertEqual(mock.call_args[0][2]._configuration, configuration)
+
+    def test__pdf_to_csv_with_aggregation(self):
+        with TemporaryDirectory() as directory:
+            pages = build_sample_pages(3)
+            pages[1][pages[1].index('JIM POE') + 1] = '9'
+            pdf_path = write_pdf(os.path.join(directory, 'test.pdf'), pages)
+            configuration = build_configuration(
+                dict(RAW_CONFIGURATION, data_source=[pdf_path]))
+            output_file_path = os.path.join(directory, 'test__precinct.csv')
+            with patch('electionware.csv.get_output_file_path',
+                       return_value=output_file_path):
+                discrepancies = write_electionware_pdf_to_csv(
+                    configuration, aggregate=True)
+            with open(os.path.join(directory, 'test__county.csv')) as f_in:
+                rows = list(csv.DictReader(f_in))
+        self.assertEqual(3, len(rows))
+        self.assertEqual({'county': 'Test', 'office': 'President', 'district': '',
+                          'party': 'DEM', 'candidate': 'JANE ROE', 'election_day': '3003',
+                          'absentee': '3', 'votes': '3006'}, rows[1])
+        self.assertEqual(['JIM POE', 'Total Votes Cast'],
+                         [discrepancy.candidate for discrepancy in discrepancies])
+        self.assertEqual('Precinct 2', discrepancies[0].precinct)
+
+    def test__aggregation_with_candidate_filter(self):
+        class JimPoeFilter(RowFilter):
+            def filter(self, row):
+                return row['candidate'] == 'JIM POE'
+
+        with TemporaryDirectory() as directory:
+            pdf_path = write_pdf(os.path.join(directory, 'test.pdf'), build_sample_pages(2))
+            configuration = build_configuration(
+                dict(RAW_CONFIGURATION, data_source=[pdf_path]))
+            configuration['table_processing']['extra_row_filters'] = [JimPoeFilter()]
+            output_file_path = os.path.join(directory, 'test__precinct.csv')
+            with patch('electionware.csv.get_output_file_path',
+                       return_value=output_file_path):
+                discrepancies = write_electionware_pdf_to_csv(
+                    configuration, aggregate=True)
+            with open(os.path.join(directory, 'test__county.csv')) as f_in:
+                rows = list(csv.DictReader(f_in))
+        self.assertNotIn('JIM POE', [row['candidate'] for row in rows])
+        self.assertEqual([], discrepancies)
+
+    def test__pdf_to_csv_with_output_order(self):
+        with TemporaryDirectory() as directory:
+            first_pdf_path = write_pdf(os.path.join(directory, 'a.pdf'),
+                                       build_sample_pages(3)[1:])
+            second_pdf_path = write_pdf(os.path.join(directory, 'b.pdf'),
+                                        build_sample_pages(1))
+            configuration = build_configuration(dict(
+                RAW_CONFIGURATION, data_source=[first_pdf_path, second_pdf_path],
+                output_order=['precinct', 'office', 'candidate']))
+            output_file_path = os.path.join(directory, 'test__precinct.csv')
+            convert_electionware_pdf_to_csv(configuration, output_file_path)
+            with open(output_file_path) as f_in:
+                rows = list(csv.DictReader(f_in))
+        self.assertEqual([('Precinct 1', 'President', 'JANE ROE'),
+                          ('Precinct 1', 'President', 'JOHN DOE'),
+                          ('Precinct 1', 'U.S. House', 'JIM POE'),
+                          ('Precinct 2', 'President', 'JANE ROE')],
+                         [(row['precinct'], row['office'], row['candidate'])
+                          for row in rows[:4]])
@@ -0,0 +1,97 @@
+import io
+import os
+import pickle
+import threading
+from contextlib import redirect_stdout
+from unittest import TestCase
+from unittest.mock import patch
+
+from electionware.configuration import build_configuration
+from electionware.data_source import StreamSource
+from electionware.parser import DataSourceParser
+from pdf_fixtures import RAW_CONFIGURATION, build_pdf, build_sample_pages
+
+
+class FailingStream(io.RawIOBase):
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        raise OSError('connection reset')
+
+
+class TestStreamSource(TestCase):
+    def setUp(self):
+        self._pdf = build_pdf(build_sample_pages(3))
+
+    def _pipe(self):
+        read_descriptor, write_descriptor = os.pipe()
+
+        def write():
+            with open(write_descriptor, 'wb') as f_out:
+                f_out.write(self._pdf)
+
+        threading.Thread(target=write, daemon=True).start()
+        return open(read_descriptor, 'rb')
+
+    def test__in_memory(self):
+        with self._pipe() as stream:
+            data_source = StreamSource(stream, 'pipe', chunk_size=1000)
+            with data_source.get_file_like_object() as f_obj:
+                self.assertEqual('pipe', f_obj.name)
+                self.assertEqual(self._pdf, f_obj.read())
+        metrics = data_source.get_metrics()
+        self.assertEqual(len(self._pdf), metrics.bytes_read)
+        self.assertTrue(metrics.complete)
+        self.assertFalse(metrics.spooled_to_disk)
+        self.assertGreater(metrics.get_throughput(), 0)
+
+    def test__spooled_to_disk(self):
+        with self._pipe() as stream:
+            data_source = StreamSource(stream, chunk_size=1000, spool_threshold=2500,
+                                       prefetch=False)
+            self.assertFalse(data_source.get_metrics().complete)
+            for _ in range(2):
+                with data_source.get_file_like_object() as f_obj:
+                    self.assertEqual(self._pdf, f_obj.read())
+        self.assertTrue(data_source.get_metrics().spooled_to_disk)
+        spool_path = data_source._spool_path
+        copy = pickle.loads(pickle.dumps(data_source))
+        with copy.get_file_like_object() as f_obj:
+            self.assertEqual(self._pdf, f_obj.read())
+        copy.close()
+        self.assertTrue(os.path.exists(spool_path))
+        data_source.close()
+        self.assertFalse(os.path.exists(spool_path))
+
+    def test__parse(self):
+        with self._pipe() as stream:
+            configuration = build_configuration(dict(
+                RAW_CONFIGURATION, data_source=[StreamSource(stream, 'pipe')]))
+            with redirect_stdout(io.StringIO()):
+                rows = list(DataSourceParser(configuration))
+        self.assertEqual(9, len(rows))
+
+    def test__read_error(self):
+        data_source = StreamSource(io.BufferedReader(FailingStream()))
+        with self.assertRaisesRegex(OSError, 'connection reset'):
+            data_source.get_file_like_object()
+
+    def test__read_error_not_complete(self):
+        data_source = StreamSource(io.BufferedReader(FailingStream()))
+        with self.assertRaises(OSError):
+            data_source.get_file_like_object()
+        self.assertFalse(data_source.get_metrics().complete)
+
+    def test__stdin_read_lazily_once(self):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=['-'])
+        with self._pipe() as stream, \
+                patch('electionware.data_source._stdin_source', None), \
+                patch('sys.stdin', io.TextIOWrapper(stream)):
+            configurations = [build_configuration(raw_configuration) for _ in range(2)]
+            data_source = configurations[0]['data_source'][0]
+            self.assertIs(data_source, configurations[1]['data_source'][0])
+            self.assertEqual(0, data_source.get_metrics().bytes_read)
+            for configuration in configurations:
+                with redirect_stdout(io.StringIO()):
+                    self.assertEqual(9, len(list(DataSourceParser(configuration))))
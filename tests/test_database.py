@@ -0,0 +1,75 @@
+import os
+import sqlite3
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.configuration import build_configuration
+from electionware.database import convert_electionware_pdf_to_sqlite, get_table_name, \
+    _write_rows_to_sqlite
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+HEADER = ['county', 'precinct', 'office', 'district', 'party', 'candidate', 'votes']
+
+
+class TestDatabase(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        self._database_path = os.path.join(self._directory.name, 'results.sqlite')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _query(self, sql):
+        connection = sqlite3.connect(self._database_path)
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test__get_table_name(self):
+        self.assertEqual('20001231__aa__test__test__precinct',
+                         get_table_name(RAW_CONFIGURATION['election_description']))
+
+    def test__write_rows_to_sqlite(self):
+        rows = [{'county': 'Test', 'precinct': f'Precinct {i}', 'office': 'U.S. House',
+                 'district': i % 2 or 'At Large', 'party': '', 'candidate': 'JOHN DOE',
+                 'votes': i} for i in range(10)]
+        self.assertEqual(10, _write_rows_to_sqlite(
+            self._database_path, 'results', HEADER, rows, batch_size=3))
+        self.assertEqual([(45,)], self._query('SELECT SUM(votes) FROM results'))
+        self.assertEqual([(1,), ('At Large',)],
+                         self._query('SELECT DISTINCT district FROM results ORDER BY district'))
+        self.assertEqual(['results__office', 'results__precinct'], sorted(
+            name for name, in self._query("SELECT name FROM sqlite_master WHERE type = 'index'")))
+
+    def test__reload_replaces_table(self):
+        row = {'county': 'Test', 'precinct': 'Precinct 1', 'office': 'President',
+               'district': '', 'party': '', 'candidate': 'JOHN DOE'}
+        _write_rows_to_sqlite(self._database_path, 'results', HEADER, [dict(row, votes=1)] * 3)
+        _write_rows_to_sqlite(self._database_path, 'results', HEADER, [row])
+        self.assertEqual([(None,)], self._query('SELECT votes FROM results'))
+        self.assertEqual([('results',)], self._query(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+    def test__convert_electionware_pdf_to_sqlite(self):
+        pdf_path = write_pdf(os.path.join(self._directory.name, 'test.pdf'),
+                             build_sample_pages(3))
+        configuration = build_configuration(dict(RAW_CONFIGURATION, data_source=[pdf_path]))
+        with redirect_stdout(StringIO()):
+            row_count = convert_electionware_pdf_to_sqlite(
+                configuration, self._database_path, 'results')
+        self.assertEqual(row_count, self._query('SELECT COUNT(*) FROM results')[0][0])
+        self.assertEqual([(1000, 0)], self._query(
+            "SELECT election_day, absentee FROM results "
+            "WHERE precinct = 'Precinct 1' AND candidate = 'JANE ROE'"))
+
+    def test__wal_mode_kept(self):
+        connection = sqlite3.connect(self._database_path)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.close()
+        row = {'county': 'Test', 'precinct': 'Precinct 1', 'office': 'President',
+               'district': '', 'party': '', 'candidate': 'JOHN DOE', 'votes': 1}
+        _write_rows_to_sqlite(self._database_path, 'results', HEADER, [row])
+        self.assertEqual([('wal',)], self._query('PRAGMA journal_mode'))
@@ -0,0 +1,111 @@
+import csv
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from pdfreader import SimplePDFViewer
+
+from electionware.configuration import build_configuration
+from electionware.csv import get_output_header
+from electionware.data_source import FileSource
+from electionware.diff import diff_data_sources, write_row_changes_to_csv
+from electionware.parser import PageParser
+from pdf_fixtures import EXPECTED_FOOTER, EXPECTED_HEADER, RAW_CONFIGURATION, \
+    build_page_strings, build_sample_pages, write_pdf
+
+UNOFFICIAL_HEADER = ['Summary Results Report', 'UNOFFICIAL RESULTS']
+UNOFFICIAL_FOOTER = 'Precinct Summary - 11/04/2020'
+
+
+class TestDiff(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        old_pages = build_sample_pages(6)
+        new_pages = build_sample_pages(6)
+        new_pages[2][new_pages[2].index('JIM POE') + 1] = '99'
+        new_pages[4] = build_page_strings('Precinct 5', [
+            ('DEM PRESIDENT OF THE UNITED STATES', [('JOHN DOE', 14, 3), ('JANE ROE', 1004, 4),
+                                                    ('JOE BLOE', 1, 0)])])
+        self._old_source = FileSource(write_pdf(
+            os.path.join(self._directory.name, 'old.pdf'), old_pages))
+        self._new_source = FileSource(write_pdf(
+            os.path.join(self._directory.name, 'new.pdf'), new_pages))
+        self._configuration = build_configuration(RAW_CONFIGURATION)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test__diff(self):
+        with patch('electionware.diff.PageParser', wraps=PageParser) as mock:
+            changes = diff_data_sources(
+                self._configuration, self._old_source, self._new_source)
+        self.assertEqual(4, mock.call_count)
+        self.assertEqual([('changed', 'Precinct 3', 'JIM POE'),
+                          ('added', 'Precinct 5', 'JOE BLOE'),
+                          ('removed', 'Precinct 5', 'JIM POE')],
+                         [(change.change, change.key[0], change.key[4]) for change in changes])
+        self.assertEqual(9, changes[0].old_row['votes'])
+        self.assertEqual(99, changes[0].new_row['votes'])
+
+    def test__no_changes(self):
+        with patch('electionware.diff.PageParser') as mock:
+            changes = diff_data_sources(
+                self._configuration, self._old_source, self._old_source)
+        self.assertEqual([], changes)
+        self.assertFalse(mock.called)
+
+    def test__strings_fingerprint(self):
+        changes = diff_data_sources(self._configuration, self._old_source,
+                                    self._new_source, fingerprint='strings')
+        self.assertEqual(3, len(changes))
+
+    def test__write_row_changes_to_csv(self):
+        changes = diff_data_sources(self._configuration, self._old_source, self._new_source)
+        output_file_path = os.path.join(self._directory.name, 'diff.csv')
+        write_row_changes_to_csv(output_file_path, get_output_header(
+            RAW_CONFIGURATION['table_processing']), changes)
+        with open(output_file_path) as f_in:
+            rows = list(csv.DictReader(f_in))
+        self.assertEqual(3, len(rows))
+        self.assertEqual(('changed', '99', '9'),
+                         (rows[0]['change'], rows[0]['votes'], rows[0]['previous_votes']))
+        self.assertEqual(('added', ''), (rows[1]['change'], rows[1]['previous_votes']))
+
+    def test__different_headers(self):
+        old_pages = [[UNOFFICIAL_HEADER[1] if s == EXPECTED_HEADER[1] else
+                      UNOFFICIAL_FOOTER if s == EXPECTED_FOOTER else s for s in page]
+                     for page in build_sample_pages(6)]
+        old_source = FileSource(write_pdf(
+            os.path.join(self._directory.name, 'unofficial.pdf'), old_pages))
+        old_configuration = build_configuration(dict(RAW_CONFIGURATION, page_structure=dict(
+            RAW_CONFIGURATION['page_structure'], expected_header=UNOFFICIAL_HEADER,
+            expected_footer=UNOFFICIAL_FOOTER)))
+        with patch('electionware.diff.PageParser', wraps=PageParser) as mock, \
+                patch.object(SimplePDFViewer, 'render', side_effect=AssertionError):
+            changes = diff_data_sources(old_configuration, old_source, self._new_source,
+                                        fingerprint='strings',
+                                        new_configuration=self._configuration)
+        self.assertEqual(4, mock.call_count)
+        self.assertEqual(3, len(changes))
+        changes = diff_data_sources(old_configuration, old_source, self._new_source,
+                                    new_configuration=self._configuration)
+        self.assertEqual(3, len(changes))
+
+    def test__repeated_key(self):
+        old_pages = [build_page_strings('Precinct 1', [
+            ('DEM PRESIDENT OF THE UNITED STATES', [('JOHN DOE', 10, 3), ('JANE ROE', 1000, 0)])])]
+        new_pages = [build_page_strings('Precinct 1', [
+            ('DEM PRESIDENT OF THE UNITED STATES', [('JOHN DOE', 1, 0)])]),
+            build_page_strings('Precinct 1', [
+                ('DEM PRESIDENT OF THE UNITED STATES', [('JOHN DOE', 10, 3), ('JANE ROE', 1001, 0)])])]
+        continued_page = build_page_strings('Precinct 1', [
+            ('DEM PRESIDENT OF THE UNITED STATES', [('JOHN DOE', 5, 0)])])
+        old_source = FileSource(write_pdf(os.path.join(self._directory.name, 'old_repeated.pdf'),
+                                          old_pages + [continued_page]))
+        new_source = FileSource(write_pdf(os.path.join(self._directory.name, 'new_repeated.pdf'),
+                                          new_pages + [continued_page]))
+        changes = diff_data_sources(self._configuration, old_source, new_source)
+        self.assertEqual([('added', 'JOHN DOE', 1), ('changed', 'JANE ROE', 1001)],
+                         [(change.change, change.key[4], change.new_row['votes'])
+                          for change in changes])
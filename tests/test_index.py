@@ -0,0 +1,57 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from electionware.configuration import build_configuration
+from electionware.data_source import FileSource
+from electionware.index import build_index, hash_configuration, hash_data_source, \
+    load_page_index, parse_precincts
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+
+class TestIndex(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        self._pdf_path = write_pdf(os.path.join(self._directory.name, 'test.pdf'),
+                                   build_sample_pages(5))
+        self._configuration = build_configuration(dict(
+            RAW_CONFIGURATION, data_source=[self._pdf_path],
+            index_directory=os.path.join(self._directory.name, 'index')))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test__build_index(self):
+        build_index(self._configuration)
+        pdf_hash = hash_data_source(FileSource(self._pdf_path))
+        configuration_hash = hash_configuration(self._configuration)
+        self.assertTrue(os.path.exists(os.path.join(
+            self._directory.name, 'index', f'{pdf_hash}-{configuration_hash}.json')))
+        page_index = load_page_index(self._configuration, FileSource(self._pdf_path))
+        self.assertEqual(5, len(page_index))
+        self.assertEqual({'page': 2, 'precinct': 'Precinct 2',
+                          'offices': ['President', 'U.S. House']}, page_index[1])
+
+    def test__index_is_reused(self):
+        build_index(self._configuration)
+        with patch('electionware.index.build_page_index') as mock:
+            load_page_index(self._configuration, FileSource(self._pdf_path))
+        self.assertFalse(mock.called)
+
+    def test__index_is_rebuilt_for_other_configuration(self):
+        build_index(self._configuration)
+        table_processing = dict(self._configuration['table_processing'])
+        table_processing['raw_office_to_office_and_district'] = {'REPRESENTATIVE IN CONGRESS': ('Congress', 5)}
+        configuration = dict(self._configuration, table_processing=table_processing)
+        self.assertNotEqual(hash_configuration(self._configuration),
+                            hash_configuration(configuration))
+        page_index = load_page_index(configuration, FileSource(self._pdf_path))
+        self.assertEqual(['PRESIDENT OF THE UNITED STATES', 'Congress'],
+                         page_index[1]['offices'])
+
+    def test__parse_precincts(self):
+        rows = list(parse_precincts(self._configuration, ['Precinct 2', 'Precinct 4']))
+        self.assertEqual(6, len(rows))
+        self.assertEqual({'Precinct 2', 'Precinct 4'}, {row['precinct'] for row in rows})
+        self.assertEqual([], list(parse_precincts(self._configuration, ['Precinct 9'])))
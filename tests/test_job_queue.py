@@ -0,0 +1,87 @@
+import json
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.cli import main
+from electionware.configuration import load_configuration
+from electionware.csv import convert_electionware_pdf_to_csv
+from electionware.job_queue import JobQueue, JobQueueError, Task, enqueue, run_worker, stitch
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+
+class TestJobQueue(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        write_pdf(os.path.join(self._directory.name, 'test.pdf'), build_sample_pages(5))
+        self._configuration_path = os.path.join(self._directory.name, 'test.json')
+        with open(self._configuration_path, 'w') as f_out:
+            json.dump(dict(RAW_CONFIGURATION, data_source=['test.pdf', 'test.pdf']), f_out)
+        self._queue_path = os.path.join(self._directory.name, 'jobs.sqlite')
+        self._output_path = os.path.join(self._directory.name, 'out.csv')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _expected_output(self):
+        expected_path = os.path.join(self._directory.name, 'expected.csv')
+        with redirect_stdout(StringIO()):
+            convert_electionware_pdf_to_csv(
+                load_configuration(self._configuration_path), expected_path)
+        with open(expected_path) as f_in:
+            return f_in.read()
+
+    def _read_output(self):
+        with open(self._output_path) as f_in:
+            return f_in.read()
+
+    def test__enqueue_work_stitch(self):
+        self.assertEqual(6, enqueue(self._queue_path, self._configuration_path, 2))
+        job_queue = JobQueue(self._queue_path)
+        self.assertEqual([Task(1, 0, 1, 2), Task(2, 0, 3, 4), Task(3, 0, 5, 5)],
+                         job_queue.get_tasks()[:3])
+        job_queue.close()
+        with redirect_stdout(StringIO()):
+            self.assertEqual(6, run_worker(self._queue_path, 'worker'))
+        stitch(self._queue_path, self._output_path)
+        self.assertEqual(self._expected_output(), self._read_output())
+
+    def test__expired_lease_is_released(self):
+        enqueue(self._queue_path, self._configuration_path, 2)
+        job_queue = JobQueue(self._queue_path, lease_seconds=-1)
+        crashed_task = job_queue.claim('crashed')
+        job_queue.close()
+        with redirect_stdout(StringIO()):
+            self.assertEqual(6, run_worker(self._queue_path, 'worker'))
+        job_queue = JobQueue(self._queue_path)
+        self.assertFalse(job_queue.complete(crashed_task, 'crashed'))
+        self.assertEqual({'done': 6}, job_queue.get_status_counts())
+        job_queue.close()
+        stitch(self._queue_path, self._output_path)
+        self.assertEqual(self._expected_output(), self._read_output())
+
+    def test__repeatedly_expired_lease_fails(self):
+        enqueue(self._queue_path, self._configuration_path, 5)
+        job_queue = JobQueue(self._queue_path, lease_seconds=-1, max_attempts=2)
+        self.assertEqual(1, job_queue.claim('a').task_id)
+        self.assertEqual(1, job_queue.claim('b').task_id)
+        self.assertEqual(2, job_queue.claim('c').task_id)
+        self.assertEqual('lease expired 2 times', job_queue.get_failures()[0][1])
+        job_queue.close()
+        with self.assertRaisesRegex(JobQueueError, 'lease expired 2 times'):
+            stitch(self._queue_path, self._output_path)
+
+    def test__enqueue_twice(self):
+        enqueue(self._queue_path, self._configuration_path)
+        with self.assertRaises(JobQueueError):
+            enqueue(self._queue_path, self._configuration_path)
+
+    def test__cli(self):
+        with redirect_stdout(StringIO()):
+            self.assertEqual(0, main([self._configuration_path, '--queue', self._queue_path,
+                                      '--enqueue', '--pages-per-task', '3']))
+            self.assertEqual(0, main(['--queue', self._queue_path, '--work', '--stitch',
+                                      '--output', self._output_path]))
+        self.assertEqual(self._expected_output(), self._read_output())
@@ -1,28 +1,47 @@
 from unittest import TestCase
 from unittest.mock import patch
 
+from electionware.configuration import compile_configuration
 from electionware.parser import ElectionwareStringIterator, DataSourceParser, PageParser, TableParser
 from electionware.pdf import PDFStrings
 
 
+CONFIGURATION = {
+    'data_source': [None],
+    'election_description': {'county': 'test-county'},
+    'page_structure': {
+        'expected_header': ['a', 'ok'],
+        'expected_footer': 'DONE',
+        'table_headers': [['votes']],
+        'has_vote_percent_column': True
+    },
+    'table_processing': {
+        'extra_row_transformers': [],
+        'extra_row_filters': [],
+        'raw_office_to_office_and_district': {
+            'office-12': ('test-office', 12),
+        },
+        'openelections_mapped_header': ['votes'],
+    },
+}
+
+
 class TestElectionwareStringIterator(TestCase):
     def test__page_is_done(self):
-        page_structure = {'expected_footer': 'DONE'}
         string_iterator = ElectionwareStringIterator(
-            page_structure, ['ok', 'DONE'])
+            'DONE', ['ok', 'DONE'])
         self.assertFalse(string_iterator.page_is_done())
         self.assertEqual('ok', next(string_iterator))
         self.assertTrue(string_iterator.page_is_done())
         string_iterator = ElectionwareStringIterator(
-            page_structure, ['data', 'Report generated with Electionware'])
+            'DONE', ['data', 'Report generated with Electionware'])
         self.assertFalse(string_iterator.page_is_done())
         self.assertEqual('data', next(string_iterator))
         self.assertTrue(string_iterator.page_is_done())
 
     def test__table_is_done(self):
-        page_structure = {'expected_footer': 'DONE'}
         string_iterator = ElectionwareStringIterator(
-            page_structure, ['ok', 'Vote For', 'DONE'])
+            'DONE', ['ok', 'Vote For', 'DONE'])
         self.assertFalse(string_iterator.page_is_done())
         self.assertFalse(string_iterator.table_is_done())
         self.assertEqual('ok', next(string_iterator))
@@ -33,9 +52,8 @@ class TestElectionwareStringIterator(TestCase):
         self.assertTrue(string_iterator.page_is_done())
 
     def test__ballots_cast_swap(self):
-        page_structure = {'expected_footer': 'DONE'}
         string_iterator = ElectionwareStringIterator(
-            page_structure, ['ok', '100', 'Ballots Cast', 'DONE'])
+            'DONE', ['ok', '100', 'Ballots Cast', 'DONE'])
         string_iterator.swap_any_bad_ballots_cast_fields()
         self.assertFalse(string_iterator.page_is_done())
         self.assertFalse(string_iterator.table_is_done())
@@ -54,54 +72,31 @@ class TestElectionwareStringIterator(TestCase):
 
 class TestDataSourceParser(TestCase):
     def test__data_source_parser(self):
-        configuration = {'data_source': [None]}
-        data_source_parser = DataSourceParser(configuration)
+        data_source_parser = DataSourceParser(CONFIGURATION)
         data_source_parser._parse = lambda x: [1, 2, 3]
         self.assertEqual(3, len(list(data_source_parser)))
 
 
 class TestPageParser(TestCase):
     def test__page_parser(self):
-        configuration = {
-            'page_structure': {
-                'expected_header': ['1', 'a'],
-                'expected_footer': 'DONE'
-            }
-        }
+        plan = compile_configuration(CONFIGURATION)
         with patch('pdfreader.SimplePDFViewer') as mock:
             mock.current_page_number = 3
-            mock.canvas.strings = ['1', 'a', 'b', 'DONE']
+            mock.canvas.strings = ['a', 'ok', 'b', 'DONE']
             pdf_strings = PDFStrings(mock)
-            page_parser = PageParser(configuration, pdf_strings)
+            page_parser = PageParser(plan, pdf_strings)
             self.assertEqual(page_parser._precinct, 'b')
             self.assertEqual(0, len(list(page_parser)))
 
 
 class TestTableParser(TestCase):
     def test__table_parser(self):
-        configuration = {
-            'election_description': {'county': 'test-county'},
-            'page_structure': {
-                'expected_header': ['a', 'ok'],
-                'expected_footer': 'DONE',
-                'table_headers': [['votes']],
-                'has_vote_percent_column': True
-            },
-            'table_processing': {
-                'extra_row_transformers': [],
-                'extra_row_filters': [],
-                'raw_office_to_office_and_district': {
-                    'office-12': ('test-office', 12),
-                },
-                'openelections_mapped_header': ['votes'],
-            },
-        }
+        plan = compile_configuration(CONFIGURATION)
         strings = ['Vote For', 'REP office-12', 'VOTE %', 'votes',
                    'test-candidate', '2', '100%',
                    'Registered Voters', '2', 'DONE']
-        string_iterator = ElectionwareStringIterator(
-            configuration['page_structure'], strings)
-        parser = TableParser(configuration, 'test-precinct', string_iterator)
+        string_iterator = ElectionwareStringIterator(plan.expected_footer, strings)
+        parser = TableParser(plan, 'test-precinct', string_iterator)
         iterator = iter(parser)
         actual_row = next(iterator)
         expected_row = {'county': 'test-county', 'precinct': 'test-precinct',
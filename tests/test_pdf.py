@@ -66,3 +66,10 @@ class TestPDFPageIterator(TestCase):
             with self.assertRaises(StopIteration):
                 next(pdf_page_iterator)
             self.assertEqual(0, len([page for page in pdf_page_iterator]))
+
+    def test__pdf_page_iterator_page_numbers(self):
+        with patch('pdfreader.SimplePDFViewer') as mock:
+            pdf_page_iterator = PDFPageIterator(pdf_viewer=mock, page_numbers=[3, 1])
+            self.assertEqual(2, len([page for page in pdf_page_iterator]))
+            expected_calls = [call.__bool__(), call.navigate(3), call.navigate(1)]
+            self.assertEqual(mock.mock_calls, expected_calls)
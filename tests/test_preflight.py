@@ -0,0 +1,100 @@
+import os
+import random
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.configuration import build_configuration, compile_configuration
+from electionware.preflight import PreflightError, check_page, preflight, \
+    sample_page_numbers, verify_configuration
+from pdf_fixtures import EXPECTED_FOOTER, EXPECTED_HEADER, RAW_CONFIGURATION, \
+    build_sample_pages, write_pdf
+
+
+class TestSamplePageNumbers(TestCase):
+    def test__small_document(self):
+        self.assertEqual([1, 2, 3], sample_page_numbers(3, 10))
+
+    def test__stratified_sample(self):
+        page_numbers = sample_page_numbers(100, 6, random.Random(1))
+        self.assertEqual(6, len(page_numbers))
+        self.assertEqual(1, page_numbers[0])
+        self.assertEqual(100, page_numbers[-1])
+        for stratum, page_number in enumerate(page_numbers[1:-1]):
+            self.assertTrue(2 + stratum * 98 // 4 <= page_number <= 1 + (stratum + 1) * 98 // 4)
+
+
+class TestPreflight(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        pages = build_sample_pages(12)
+        pages[5][0] = 'Unofficial Results Report'
+        pages[8][-1] = 'Precinct Summary - 02/02/2021'
+        self._pdf_path = write_pdf(os.path.join(self._directory.name, 'test.pdf'), pages)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _configuration(self, **page_structure):
+        raw_configuration = dict(RAW_CONFIGURATION, data_source=[self._pdf_path])
+        raw_configuration['page_structure'] = \
+            dict(RAW_CONFIGURATION['page_structure'], **page_structure)
+        return build_configuration(raw_configuration)
+
+    def test__page_mismatches(self):
+        mismatches = preflight(self._configuration(), sample_size=20, workers=2)
+        self.assertEqual([6, 9], [mismatch.page_number for mismatch in mismatches])
+        self.assertEqual('page header mismatch', mismatches[0].description)
+        self.assertEqual(['Unofficial Results Report', 'OFFICIAL RESULTS'],
+                         mismatches[0].actual)
+        self.assertEqual('page footer not found', mismatches[1].description)
+        self.assertEqual(['Precinct Summary - 02/02/2021'], mismatches[1].actual)
+
+    def test__table_header_mismatch(self):
+        configuration = self._configuration(
+            table_headers=[['TOTAL', 'Election Day', 'Mail']])
+        with self.assertRaises(PreflightError) as context:
+            verify_configuration(configuration, sample_size=3, workers=2)
+        mismatches = context.exception.mismatches
+        self.assertEqual(3, len(mismatches))
+        self.assertEqual(1, mismatches[0].page_number)
+        self.assertEqual(12, mismatches[-1].page_number)
+        self.assertEqual('TOTAL Election Day Absentee', mismatches[-1].actual)
+
+    def test__truncated_page_reported(self):
+        pages = build_sample_pages(3)
+        pages[1] = [EXPECTED_FOOTER]
+        write_pdf(self._pdf_path, pages)
+        mismatches = preflight(self._configuration(), workers=2)
+        self.assertEqual([(2, 'page could not be parsed (StopIteration)')],
+                         [(mismatch.page_number, mismatch.description) for mismatch in mismatches])
+
+
+class StringsPage:
+    def __init__(self, strings):
+        self._strings = strings
+
+    def get_strings(self):
+        return list(self._strings)
+
+
+class TestCheckPage(TestCase):
+    def test__truncated_table(self):
+        # the table ends after its office; with a table header longer than
+        # the footer, reading the table header runs out of strings
+        raw_configuration = dict(RAW_CONFIGURATION)
+        raw_configuration['page_structure'] = dict(
+            RAW_CONFIGURATION['page_structure'],
+            table_headers=[['TOTAL', 'Election Day', 'Absentee', 'Provisional', 'Mail-In']])
+        plan = compile_configuration(build_configuration(raw_configuration))
+        page = StringsPage(EXPECTED_HEADER + ['Precinct 1', 'Vote For 1',
+                                              'DEM PRESIDENT OF THE UNITED STATES',
+                                              EXPECTED_FOOTER])
+        errors = check_page(plan, page)
+        self.assertEqual(['page could not be parsed (RuntimeError)'],
+                         [error.description for error in errors])
+
+    def test__truncated_page(self):
+        plan = compile_configuration(build_configuration(RAW_CONFIGURATION))
+        errors = check_page(plan, StringsPage([EXPECTED_FOOTER]))
+        self.assertEqual(['page could not be parsed (StopIteration)'],
+                         [error.description for error in errors])
@@ -0,0 +1,61 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.configuration import build_configuration
+from electionware.parser import DataSourceParser
+from electionware.profiling import StackCollector
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+
+class TestProfiling(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        self._pdf_path = write_pdf(os.path.join(self._directory.name, 'test.pdf'),
+                                   build_sample_pages(4))
+        self._output_directory = os.path.join(self._directory.name, 'profiles')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _parse(self, **profiling):
+        configuration = build_configuration(dict(
+            RAW_CONFIGURATION, data_source=[self._pdf_path],
+            profiling=dict(profiling, output_directory=self._output_directory)))
+        rows = list(DataSourceParser(configuration))
+        self.assertEqual(12, len(rows))
+        return sorted(os.listdir(self._output_directory))
+
+    def test__deterministic_page_range(self):
+        files = self._parse(pages=[2, 2])
+        self.assertEqual(['test.pdf-page-00002.collapsed', 'test.pdf-page-00002.txt'], files)
+        with open(os.path.join(self._output_directory, files[0])) as f_in:
+            stacks = [line.rsplit(' ', 1)[0].split(';') for line in f_in]
+        self.assertEqual({'render', 'parse', 'write'}, {stack[0] for stack in stacks})
+        self.assertTrue(any('get_strings (pdf.py' in frame
+                            for stack in stacks if stack[0] == 'render' for frame in stack))
+        self.assertTrue(any('_create_next_row (parser.py' in frame
+                            for stack in stacks if stack[0] == 'parse' for frame in stack))
+        with open(os.path.join(self._output_directory, files[1])) as f_in:
+            summary = f_in.read()
+        self.assertIn('render allocations', summary)
+        self.assertIn('parse allocations', summary)
+
+    def test__slowest_pages(self):
+        files = self._parse(slowest=1, mode='sampling', tracemalloc=False)
+        self.assertEqual(2, len(files))
+
+    def test__slowest_pages_written_when_stopped_early(self):
+        configuration = build_configuration(dict(
+            RAW_CONFIGURATION, data_source=[self._pdf_path],
+            profiling=dict(slowest=1, tracemalloc=False,
+                           output_directory=self._output_directory)))
+        rows = iter(DataSourceParser(configuration))
+        for _ in range(4):
+            next(rows)
+        rows.close()
+        self.assertEqual(2, len(os.listdir(self._output_directory)))
+
+    def test__stack_collector_is_abstract(self):
+        with self.assertRaises(TypeError):
+            StackCollector()
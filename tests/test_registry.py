@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from electionware.configuration import ConfigurationError
+from electionware.registry import get_row_filter, get_row_transformer
+from electionware.row_filters import SpecificWriteInCandidatesFilter
+from electionware.row_transformers import CandidateTitleCaseTransformer
+
+
+class TestRegistry(TestCase):
+    def test__row_transformer(self):
+        row_transformer = get_row_transformer('CandidateTitleCaseTransformer')
+        self.assertIsInstance(row_transformer, CandidateTitleCaseTransformer)
+
+    def test__row_filter(self):
+        row_filter = get_row_filter('SpecificWriteInCandidatesFilter')
+        self.assertIsInstance(row_filter, SpecificWriteInCandidatesFilter)
+
+    def test__unknown_names(self):
+        with self.assertRaises(ConfigurationError):
+            get_row_transformer('DefaultRowTransformer')
+        with self.assertRaises(ConfigurationError):
+            get_row_filter('RowFilter')
@@ -0,0 +1,75 @@
+import csv
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.configuration import build_configuration
+from electionware.result_set import ResultSet
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+VOTE_FIELDS = ['votes', 'election_day']
+ROWS = [
+    {'county': 'Test', 'precinct': '1', 'office': 'President', 'district': '',
+     'party': 'DEM', 'candidate': 'JOHN DOE', 'votes': 3, 'election_day': 1},
+    {'county': 'Test', 'precinct': '1', 'office': 'U.S. House', 'district': 12,
+     'party': 'DEM', 'candidate': 'JANE ROE', 'votes': 5, 'election_day': 5},
+    {'county': 'Test', 'precinct': '2', 'office': 'President', 'district': '',
+     'party': 'DEM', 'candidate': 'JOHN DOE', 'votes': 10, 'election_day': 4},
+    {'county': 'Test', 'precinct': '2', 'office': 'Registered Voters', 'district': '',
+     'party': '', 'candidate': '', 'votes': 100},
+]
+
+
+class TestResultSet(TestCase):
+    def setUp(self):
+        self._result_set = ResultSet(VOTE_FIELDS, ROWS)
+
+    def test__round_trip(self):
+        self.assertEqual(4, len(self._result_set))
+        self.assertEqual(ROWS, list(self._result_set))
+
+    def test__filter(self):
+        self.assertEqual([ROWS[0], ROWS[2]],
+                         list(self._result_set.filter(office='President')))
+        self.assertEqual([ROWS[2]], list(self._result_set.filter(
+            office='President', precinct='2')))
+        self.assertEqual([ROWS[1]], list(self._result_set.filter(district=12)))
+        self.assertEqual([ROWS[2]], list(
+            self._result_set.filter(party='DEM').filter(precinct='2')))
+        self.assertEqual(0, len(self._result_set.filter(candidate='NOBODY')))
+        with self.assertRaises(KeyError):
+            self._result_set.filter(ward='1')
+
+    def test__aggregation(self):
+        self.assertEqual(118, self._result_set.sum())
+        self.assertEqual(10, self._result_set.sum('election_day'))
+        self.assertEqual({('President', 'JOHN DOE'): 5, ('U.S. House', 'JANE ROE'): 5},
+                         self._result_set.group_by('office', 'candidate',
+                                                   vote_field='election_day'))
+        self.assertEqual({('1',): 8, ('2',): 110}, self._result_set.group_by('precinct'))
+        self.assertEqual(['1', '2'], self._result_set.distinct('precinct'))
+
+    def test__from_configuration_to_csv(self):
+        with TemporaryDirectory() as directory:
+            pdf_path = write_pdf(os.path.join(directory, 'test.pdf'), build_sample_pages(3))
+            result_set = ResultSet.from_configuration(build_configuration(
+                dict(RAW_CONFIGURATION, data_source=[pdf_path])))
+            output_file_path = os.path.join(directory, 'test.csv')
+            result_set.filter(office='U.S. House').to_csv(output_file_path)
+            with open(output_file_path) as f_in:
+                rows = list(csv.DictReader(f_in))
+        self.assertEqual(9, len(result_set))
+        self.assertEqual(3, len(rows))
+        self.assertEqual({'county': 'Test', 'precinct': 'Precinct 3', 'office': 'U.S. House',
+                          'district': '1', 'party': 'REP', 'candidate': 'JIM POE',
+                          'election_day': '5', 'absentee': '4', 'votes': '9'}, rows[2])
+
+    def test__from_configuration_output_order(self):
+        with TemporaryDirectory() as directory:
+            pdf_path = write_pdf(os.path.join(directory, 'test.pdf'), build_sample_pages(3))
+            result_set = ResultSet.from_configuration(build_configuration(
+                dict(RAW_CONFIGURATION, data_source=[pdf_path],
+                     output_order=['candidate', 'precinct'])))
+        keys = [(row['candidate'], row['precinct']) for row in result_set]
+        self.assertEqual(9, len(keys))
+        self.assertEqual(sorted(keys), keys)
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from electionware.row_observers import CountyTotalsObserver, VoteDiscrepancy, \
+    VoteReconciliationObserver
+
+VOTE_FIELDS = ['votes', 'election_day', 'absentee']
+
+
+def make_row(precinct, candidate, election_day, absentee, votes=None, office='President'):
+    return {'county': 'Test', 'precinct': precinct, 'office': office,
+            'district': '', 'party': 'DEM', 'candidate': candidate,
+            'votes': election_day + absentee if votes is None else votes,
+            'election_day': election_day, 'absentee': absentee}
+
+
+class TestCountyTotalsObserver(TestCase):
+    def test__county_totals(self):
+        observer = CountyTotalsObserver(VOTE_FIELDS)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2), False)
+        observer.observe(make_row('1', 'JANE ROE', 5, 0), False)
+        observer.observe(make_row('2', 'JOHN DOE', 10, 20), False)
+        observer.observe(make_row('2', 'Total Votes Cast', 10, 20), True)
+        observer.observe({'county': 'Test', 'precinct': '2', 'office': 'Registered Voters',
+                          'district': '', 'party': '', 'candidate': '', 'votes': 7}, False)
+        self.assertEqual([
+            {'county': 'Test', 'office': 'President', 'district': '', 'party': 'DEM',
+             'candidate': 'JOHN DOE', 'votes': 33, 'election_day': 11, 'absentee': 22},
+            {'county': 'Test', 'office': 'President', 'district': '', 'party': 'DEM',
+             'candidate': 'JANE ROE', 'votes': 5, 'election_day': 5, 'absentee': 0},
+            {'county': 'Test', 'office': 'Registered Voters', 'district': '', 'party': '',
+             'candidate': '', 'votes': 7},
+        ], observer.rows())
+
+
+class TestVoteReconciliationObserver(TestCase):
+    def test__no_discrepancies(self):
+        observer = VoteReconciliationObserver(VOTE_FIELDS)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2), False)
+        observer.observe(make_row('1', 'JANE ROE', 5, 0), False)
+        observer.observe(make_row('1', 'Write-In: JIM POE', 1, 0), False)
+        observer.observe(make_row('1', 'Total Votes Cast', 7, 2), True)
+        observer.observe(make_row('1', 'Overvotes', 3, 0), False)
+        observer.observe(make_row('1', 'Undervotes', 0, 1), False)
+        observer.observe(make_row('1', 'Contest Totals', 10, 3), True)
+        observer.observe(make_row('1', 'Total Votes Cast', 9, 9, office='Delegate'), True)
+        self.assertEqual([], observer.discrepancies())
+
+    def test__filtered_candidates_counted(self):
+        observer = VoteReconciliationObserver(VOTE_FIELDS)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2), False)
+        observer.observe(make_row('1', 'JANE ROE', 5, 0), True)
+        observer.observe(make_row('1', 'Total Votes Cast', 6, 2), True)
+        self.assertEqual([], observer.discrepancies())
+
+    def test__write_in_breakdown_not_counted_twice(self):
+        observer = VoteReconciliationObserver(VOTE_FIELDS)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2), False)
+        observer.observe(make_row('1', 'Write-in', 2, 0), False)
+        observer.observe(make_row('1', 'Write-In: JIM POE', 2, 0), True)
+        observer.observe(make_row('1', 'Total Votes Cast', 3, 2), True)
+        self.assertEqual([], observer.discrepancies())
+
+    def test__contest_totals(self):
+        observer = VoteReconciliationObserver(VOTE_FIELDS)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2), False)
+        observer.observe(make_row('1', 'Undervotes', 4, 0), False)
+        observer.observe(make_row('1', 'Contest Totals', 6, 2), True)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2, office='Governor'), False)
+        observer.observe(make_row('1', 'Total Votes Cast', 1, 2, office='Governor'), True)
+        observer.observe(make_row('1', 'Overvotes', 1, 0, office='Governor'), False)
+        observer.observe(make_row('1', 'Contest Totals', 2, 2, office='Governor'), True)
+        self.assertEqual([
+            VoteDiscrepancy('1', 'President', '', 'DEM', 'Contest Totals', 'votes', 8, 7),
+            VoteDiscrepancy('1', 'President', '', 'DEM', 'Contest Totals', 'election_day', 6, 5),
+        ], observer.discrepancies())
+
+    def test__discrepancies(self):
+        observer = VoteReconciliationObserver(VOTE_FIELDS)
+        observer.observe(make_row('1', 'JOHN DOE', 1, 2, votes=4), False)
+        observer.observe(make_row('1', 'Total Votes Cast', 1, 2), True)
+        self.assertEqual([
+            VoteDiscrepancy('1', 'President', '', 'DEM', 'JOHN DOE', 'votes', 4, 3),
+            VoteDiscrepancy('1', 'President', '', 'DEM', 'Total Votes Cast', 'votes', 3, 4),
+        ], observer.discrepancies())
+
+    def test__contests_checked_as_they_end(self):
+        observer = VoteReconciliationObserver(VOTE_FIELDS)
+        for precinct in range(1000):
+            observer.observe(make_row(str(precinct), 'JOHN DOE', 1, 2), False)
+            observer.observe(make_row(str(precinct), 'Total Votes Cast', 1, 2 + precinct % 2), True)
+        self.assertEqual(1000, len(observer.discrepancies()))
+        self.assertEqual(('999', 'President', '', 'DEM'), observer._contest)
+        self.assertEqual({'candidates', 'Total Votes Cast'}, set(observer._contest_sums))
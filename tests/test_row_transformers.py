@@ -1,7 +1,8 @@
 from unittest import TestCase
 
 from electionware.row_transformers import StatisticsTransformer, DefaultRowTransformer, \
-    OfficeTitleCaseTransformer, CandidateTitleCaseTransformer, StripWriteInPrefixTransformer
+    OfficeTitleCaseTransformer, CandidateTitleCaseTransformer, StripWriteInPrefixTransformer, \
+    OfficePatternMatcher, OfficeToOfficeAndDistrictTransformer
 
 
 class TestStatisticsTransformer(TestCase):
@@ -153,3 +154,91 @@ class TestStripWriteInPrefixTransformer(TestCase):
         row_actual = StripWriteInPrefixTransformer().transform(row_to_test)
         self.assertEqual(row_expected, row_actual)
         self.assertEqual(row_to_test_unmodified, row_to_test)
+
+
+class TestOfficePatternMatcher(TestCase):
+    RULES = [
+        {'pattern': r'REPRESENTATIVE IN THE GENERAL ASSEMBLY (?P<district>\d+)(ST|ND|RD|TH) DISTRICT',
+         'office': 'General Assembly'},
+        {'prefix': 'JUDGE OF ELECTION ', 'office': 'Judge of Election'},
+        {'pattern': r'JUDGE OF ELECTION (?P<district>.+) WARD', 'office': 'Ward Judge'},
+        {'pattern': r'(TAX|MUNICIPAL) COLLECTOR (?P<district>.+)', 'office': 'Tax Collector'},
+        {'pattern': r'MAYORS? OF .+', 'office': 'Mayor', 'district': 'City'},
+    ]
+
+    def test__resolve(self):
+        matcher = OfficePatternMatcher(self.RULES)
+        self.assertEqual(('General Assembly', 15), matcher.resolve(
+            'REPRESENTATIVE IN THE GENERAL ASSEMBLY 15TH DISTRICT'))
+        self.assertEqual(('Judge of Election', ''), matcher.resolve('JUDGE OF ELECTION FIRST WARD'))
+        self.assertEqual(('Tax Collector', 'AMWELL'), matcher.resolve('MUNICIPAL COLLECTOR AMWELL'))
+        self.assertEqual(('Mayor', 'City'), matcher.resolve('MAYOR OF ERIE'))
+        self.assertIsNone(matcher.resolve('REPRESENTATIVE IN THE GENERAL ASSEMBLY'))
+        self.assertIsNone(matcher.resolve('MAYOR'))
+
+    def test__literal_prefix(self):
+        self.assertEqual('JUDGE OF ELECTION ',
+                         OfficePatternMatcher._literal_prefix(self.RULES[2]['pattern']))
+        self.assertEqual('', OfficePatternMatcher._literal_prefix(self.RULES[3]['pattern']))
+        self.assertEqual('MAYOR', OfficePatternMatcher._literal_prefix(self.RULES[4]['pattern']))
+        self.assertEqual('', OfficePatternMatcher._literal_prefix(r'A(B)|C'))
+        self.assertEqual('A', OfficePatternMatcher._literal_prefix(r'A[|]B'))
+
+    def test__invalid_rules(self):
+        with self.assertRaisesRegex(ValueError, 'rule 1'):
+            OfficePatternMatcher([{'prefix': 'A', 'office': 'A'}, {'pattern': '(', 'office': 'B'}])
+        with self.assertRaisesRegex(ValueError, 'no office'):
+            OfficePatternMatcher([{'prefix': 'A'}])
+        with self.assertRaisesRegex(ValueError, 'no pattern or prefix'):
+            OfficePatternMatcher([{'office': 'A'}])
+
+    def test__exact_mapping_first(self):
+        transformer = OfficeToOfficeAndDistrictTransformer(
+            {'JUDGE OF ELECTION FIRST WARD': ('Judge of Election', 1)}, self.RULES)
+        self.assertEqual({'office': 'Judge of Election', 'district': 1},
+                         transformer.transform({'office': 'JUDGE OF ELECTION FIRST WARD'}))
+        self.assertEqual({'office': 'Judge of Election', 'district': ''},
+                         transformer.transform({'office': 'JUDGE OF ELECTION SECOND WARD'}))
+        self.assertEqual({'office': 'COUNCIL'}, transformer.transform({'office': 'COUNCIL'}))
+
+    def test__optional_district_group(self):
+        matcher = OfficePatternMatcher([
+            {'pattern': r'COUNTY COUNCIL(?: DISTRICT (?P<district>\d+))?',
+             'office': 'County Council', 'district': 'At Large'},
+            {'pattern': r'SCHOOL DIRECTOR(?: REGION (?P<district>\d+))?',
+             'office': 'School Director'}])
+        self.assertEqual(('County Council', 'At Large'), matcher.resolve('COUNTY COUNCIL'))
+        self.assertEqual(('County Council', 3), matcher.resolve('COUNTY COUNCIL DISTRICT 3'))
+        self.assertEqual(('School Director', ''), matcher.resolve('SCHOOL DIRECTOR'))
+
+    def test__large_rule_set(self):
+        # a statewide-sized mapping: 2,560 municipal prefix rules with 8
+        # offices each, plus legislative districts matched by patterns
+        rules = [
+            {'pattern': r'REPRESENTATIVE IN THE GENERAL ASSEMBLY (?P<district>\d+)(ST|ND|RD|TH) DISTRICT',
+             'office': 'General Assembly'},
+            {'pattern': r'SENATOR IN THE GENERAL ASSEMBLY (?P<district>\d+)(ST|ND|RD|TH) DISTRICT',
+             'office': 'State Senate'}]
+        mapping = {}
+        for district in range(1, 204):
+            mapping[f'REPRESENTATIVE IN THE GENERAL ASSEMBLY {district}TH DISTRICT'] = \
+                ('General Assembly', district)
+        for district in range(1, 51):
+            mapping[f'SENATOR IN THE GENERAL ASSEMBLY {district}TH DISTRICT'] = \
+                ('State Senate', district)
+        for municipality in range(2560):
+            rules.append({'prefix': f'MUNICIPALITY {municipality} ', 'office': 'Local Office',
+                          'district': f'Municipality {municipality}'})
+            for seat in ('AUDITOR', 'CONSTABLE', 'COUNCIL', 'INSPECTOR OF ELECTION',
+                         'JUDGE OF ELECTION', 'MAYOR', 'SUPERVISOR', 'TAX COLLECTOR'):
+                mapping[f'MUNICIPALITY {municipality} {seat}'] = \
+                    ('Local Office', f'Municipality {municipality}')
+        self.assertGreater(len(mapping), 20000)
+        matcher = OfficePatternMatcher(rules)
+        resolved = {raw_office: matcher.resolve(raw_office) for raw_office in mapping}
+        self.assertEqual(mapping, resolved)
+        self.assertIsNone(matcher.resolve('MUNICIPALITY 2560 MAYOR'))
+        # each raw office is only tested against the one rule sharing its start
+        self.assertEqual({1}, {len(matcher._candidate_rules(raw_office))
+                               for raw_office in mapping})
+        self.assertEqual([], matcher._candidate_rules('MUNICIPALITY 2560 MAYOR'))
@@ -0,0 +1,129 @@
+import json
+import os
+import signal
+import socket
+import threading
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from electionware.server import WorkerPool, create_server, request_conversion
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+
+class TestConversionServer(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._directory = TemporaryDirectory()
+        cls._pdf_path = write_pdf(os.path.join(cls._directory.name, 'test.pdf'),
+                                  build_sample_pages(3))
+        cls._worker_pool = WorkerPool(workers=2)
+        cls._server = create_server(cls._worker_pool)
+        threading.Thread(target=cls._server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._server.shutdown()
+        cls._server.server_close()
+        cls._worker_pool.close()
+        cls._directory.cleanup()
+
+    def _convert(self, data_source, output_path=None, configuration=RAW_CONFIGURATION):
+        with socket.create_connection(self._server.server_address) as connection:
+            with connection.makefile('rwb') as f_socket:
+                return list(request_conversion(
+                    f_socket, configuration, data_source, output_path))
+
+    def test__stream_rows(self):
+        responses = self._convert(self._pdf_path)
+        self.assertEqual(['started', 'rows', 'done'],
+                         [response['status'] for response in responses])
+        rows = responses[1]['rows']
+        self.assertEqual(9, len(rows))
+        self.assertEqual(responses[2]['rows'], 9)
+        self.assertEqual(rows[0]['precinct'], 'Precinct 1')
+        self.assertEqual(rows[0]['votes'], 13)
+
+    def test__output_order(self):
+        configuration = dict(RAW_CONFIGURATION, output_order=['candidate', 'precinct'])
+        rows = [row for response in self._convert(self._pdf_path, configuration=configuration)
+                if response['status'] == 'rows' for row in response['rows']]
+        keys = [(row['candidate'], row['precinct']) for row in rows]
+        self.assertEqual(9, len(keys))
+        self.assertEqual(sorted(keys), keys)
+
+    def test__write_csv(self):
+        output_path = os.path.join(self._directory.name, 'test.csv')
+        responses = self._convert(self._pdf_path, output_path)
+        self.assertEqual(responses[-1]['status'], 'done')
+        self.assertEqual(responses[-1]['output'], output_path)
+        with open(output_path) as f_in:
+            self.assertEqual(10, len(f_in.readlines()))
+
+    def test__concurrent_jobs(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self._convert(self._pdf_path))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4, len(results))
+        self.assertTrue(all(responses[-1]['rows'] == 9 for responses in results))
+
+    def test__job_error(self):
+        responses = self._convert(os.path.join(self._directory.name, 'missing.pdf'))
+        self.assertEqual(responses[-1]['status'], 'error')
+        self.assertIn('FileNotFoundError', responses[-1]['error'])
+
+    def test__bad_requests(self):
+        lines = [b'[1]', b'not json', b'{"configuration": {}}',
+                 b'{"configuration": 1, "data_source": "x.pdf"}',
+                 b'{"configuration": {}, "data_source": "x.pdf", "output": 2}']
+        with socket.create_connection(self._server.server_address) as connection:
+            with connection.makefile('rwb') as f_socket:
+                for line in lines:
+                    f_socket.write(line + b'\n')
+                    f_socket.flush()
+                    response = json.loads(f_socket.readline())
+                    self.assertEqual('error', response['status'])
+                    self.assertTrue(response['error'].startswith('bad request: '))
+        self.assertEqual('done', self._convert(self._pdf_path)[-1]['status'])
+
+
+class TestWorkerPool(TestCase):
+    def test__worker_dies_before_starting_job(self):
+        with TemporaryDirectory() as directory:
+            pdf_path = write_pdf(os.path.join(directory, 'test.pdf'), build_sample_pages(1))
+            worker_pool = WorkerPool(workers=1)
+            try:
+                process, = worker_pool._processes.values()
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+                _, messages = worker_pool.submit(RAW_CONFIGURATION, pdf_path)
+                status, payload = messages.get(timeout=10)
+                self.assertEqual('error', status)
+                self.assertIn('worker exited', payload)
+                _, messages = worker_pool.submit(RAW_CONFIGURATION, pdf_path)
+                statuses = []
+                while not statuses or statuses[-1] not in ('done', 'error'):
+                    statuses.append(messages.get(timeout=10)[0])
+                self.assertEqual(['started', 'rows', 'done'], statuses)
+            finally:
+                worker_pool.close()
+
+    def test__close_fails_waiting_jobs(self):
+        worker_pool = WorkerPool(workers=1)
+        process, = worker_pool._processes.values()
+        os.kill(process.pid, signal.SIGSTOP)
+        try:
+            submitted = [worker_pool.submit(RAW_CONFIGURATION, 'missing.pdf') for _ in range(2)]
+        finally:
+            os.kill(process.pid, signal.SIGCONT)
+        worker_pool.close()
+        for job_id, messages in submitted:
+            while True:
+                status, _ = messages.get(timeout=10)
+                if status in ('done', 'error'):
+                    break
+            self.assertEqual('error', status)
+            self.assertFalse(worker_pool.is_pending(job_id))
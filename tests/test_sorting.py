@@ -0,0 +1,52 @@
+import random
+from unittest import TestCase
+
+from electionware.sorting import ExternalRowSorter
+
+HEADER = ['precinct', 'office', 'district', 'candidate', 'votes']
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {'precinct': f'Precinct {rng.randint(1, 20)}',
+               'office': rng.choice(['President', 'U.S. House', 'Registered Voters']),
+               'district': rng.choice(['', 1, 12]),
+               'candidate': rng.choice(['', 'JOHN DOE', 'JANE ROE']), 'votes': i}
+        if row['office'] == 'Registered Voters':
+            del row['district']
+        rows.append(row)
+    return rows
+
+
+def expected_order(rows):
+    return sorted(rows, key=lambda row: (row['precinct'], row['office'], row['candidate']))
+
+
+class TestExternalRowSorter(TestCase):
+    def test__in_memory(self):
+        rows = make_rows(50)
+        sorter = ExternalRowSorter(HEADER, ['precinct', 'office', 'candidate'])
+        self.assertEqual(expected_order(rows), list(sorter.sort(rows)))
+
+    def test__spilled_runs(self):
+        rows = make_rows(1000)
+        sorter = ExternalRowSorter(HEADER, ['precinct', 'office', 'candidate'],
+                                   max_rows_in_memory=30, max_merge_width=4)
+        self.assertEqual(expected_order(rows), list(sorter.sort(rows)))
+
+    def test__mixed_type_field(self):
+        rows = make_rows(100)
+        sorter = ExternalRowSorter(HEADER, ['district'], max_rows_in_memory=7)
+        districts = [row.get('district') for row in sorter.sort(rows)]
+        self.assertEqual(districts, sorted(districts, key=lambda d: (
+            d is None or isinstance(d, str), '' if d is None else d)))
+
+    def test__empty(self):
+        sorter = ExternalRowSorter(HEADER, ['precinct'])
+        self.assertEqual([], list(sorter.sort([])))
+
+    def test__unknown_field(self):
+        with self.assertRaises(ValueError):
+            ExternalRowSorter(HEADER, ['ward'])
@@ -0,0 +1,85 @@
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+from types import MappingProxyType
+from unittest import TestCase
+
+from electionware.configuration import ConfigurationError, build_configuration, \
+    compile_configuration
+from electionware.parser import DataSourceParser, TableParser
+from electionware.row_filters import DEFAULT_ROW_FILTERS
+from electionware.row_observers import CountyTotalsObserver
+from electionware.row_transformers import OfficePatternMatcher, StatisticsTransformer
+from electionware.threaded import ThreadedDataSourceParser
+from pdf_fixtures import RAW_CONFIGURATION, build_sample_pages, write_pdf
+
+
+class TestThreadedDataSourceParser(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        pdf_path = write_pdf(os.path.join(self._directory.name, 'test.pdf'),
+                             build_sample_pages(9))
+        self._configuration = build_configuration(dict(
+            RAW_CONFIGURATION, data_source=[pdf_path, pdf_path]))
+        with redirect_stdout(StringIO()):
+            self._expected_rows = list(DataSourceParser(self._configuration))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test__same_rows_as_data_source_parser(self):
+        with redirect_stdout(StringIO()):
+            rows = list(ThreadedDataSourceParser(
+                self._configuration, workers=3, pages_per_task=2))
+        self.assertEqual(self._expected_rows, rows)
+
+    def test__row_observers(self):
+        vote_fields = RAW_CONFIGURATION['table_processing']['openelections_mapped_header']
+        expected_totals = CountyTotalsObserver(vote_fields)
+        totals = CountyTotalsObserver(vote_fields)
+        with redirect_stdout(StringIO()):
+            list(DataSourceParser(self._configuration, (expected_totals,)))
+            list(ThreadedDataSourceParser(self._configuration, (totals,), workers=4))
+        self.assertEqual(expected_totals.rows(), totals.rows())
+
+    def test__stress(self):
+        def parse(i):
+            return list(ThreadedDataSourceParser(
+                self._configuration, workers=4, pages_per_task=i % 4 + 1))
+
+        with redirect_stdout(StringIO()), ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(parse, range(16)))
+        for rows in results:
+            self.assertEqual(self._expected_rows, rows)
+
+    def test__shared_state_is_immutable(self):
+        self.assertIsInstance(DEFAULT_ROW_FILTERS, tuple)
+        self.assertIsInstance(TableParser.PARTIES, tuple)
+        self.assertIsInstance(StatisticsTransformer.PARTY_ABBREVIATIONS, MappingProxyType)
+
+    def test__office_pattern_cache_shared_between_threads(self):
+        matcher = OfficePatternMatcher([
+            {'pattern': r'DISTRICT (?P<district>\d+)', 'office': 'District'}])
+        matcher.MAX_CACHED_OFFICES = 8
+
+        def resolve(i):
+            return [matcher.resolve(f'DISTRICT {j}') for j in range(i, i + 64)]
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(resolve, range(16)))
+        for i, offices in enumerate(results):
+            self.assertEqual([('District', j) for j in range(i, i + 64)], offices)
+        copy = pickle.loads(pickle.dumps(matcher))
+        self.assertEqual(('District', 7), copy.resolve('DISTRICT 7'))
+
+    def test__unsupported_entries_rejected(self):
+        for entry, value in (('profiling', {'directory': 'profiles'}),
+                             ('render_watchdog', {'timeout': 1})):
+            configuration = dict(self._configuration, **{entry: value})
+            with self.assertRaises(ConfigurationError):
+                ThreadedDataSourceParser(configuration)
+            with self.assertRaises(ConfigurationError):
+                compile_configuration(dict(configuration, threads=2))
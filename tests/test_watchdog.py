@@ -0,0 +1,147 @@
+import io
+import json
+import multiprocessing
+import os
+import time
+from contextlib import redirect_stdout
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from pdfreader import SimplePDFViewer
+
+from electionware.configuration import build_configuration
+from electionware.parser import DataSourceParser
+from electionware.watchdog import extract_content_strings
+from pdf_fixtures import RAW_CONFIGURATION, build_pdf, build_sample_pages, write_pdf
+
+RENDER = SimplePDFViewer.render
+NAVIGATE = SimplePDFViewer.navigate
+LOAD = SimplePDFViewer.__init__
+# long enough that healthy pages and worker start-up fit it with a wide
+# margin on a loaded machine; hung pages sleep well past it
+TIMEOUT = 5.0
+
+
+def failing_render(failure):
+    def render(pdf_viewer):
+        if pdf_viewer.current_page_number == 2:
+            failure()
+        RENDER(pdf_viewer)
+    return render
+
+
+def first_page_render(delay):
+    def render(pdf_viewer):
+        if pdf_viewer.current_page_number == 1:
+            delay()
+        RENDER(pdf_viewer)
+    return render
+
+
+class TestExtractContentStrings(TestCase):
+    def test__matches_render(self):
+        pages = build_sample_pages(2) + [['a (b) c', 'x\\y', 'caf\xe9']]
+        pdf_viewer = SimplePDFViewer(io.BytesIO(build_pdf(pages)))
+        for page_number in range(1, 4):
+            pdf_viewer.navigate(page_number)
+            pdf_viewer.render()
+            self.assertEqual(pdf_viewer.canvas.strings, extract_content_strings(pdf_viewer.stream))
+
+    def test__operators(self):
+        content = (b'BT /F1 10 Tf [(A) -120 (B)] TJ 1 0 0 1 0 0 Tm <4142> Tj '
+                   b'(x\\101\\(y) \' % (comment) Tj\n0 0 (q) " ET '
+                   b'BI /W 1 ID \x00 (image) Tj EI (z) Tj')
+        self.assertEqual(['A', 'B', 'AB', 'xA(y', 'q', 'z'], extract_content_strings(content))
+
+
+@skipUnless(multiprocessing.get_start_method() == 'fork',
+            'render patches only reach fork-started workers')
+class TestRenderWatchdog(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        self._pdf_path = write_pdf(os.path.join(self._directory.name, 'test.pdf'),
+                                   build_sample_pages(3))
+        self._report_path = os.path.join(self._directory.name, 'failures.jsonl')
+        with redirect_stdout(io.StringIO()):
+            self._expected_rows = list(DataSourceParser(self._configuration()))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _configuration(self, **render_watchdog):
+        return build_configuration(dict(
+            RAW_CONFIGURATION, data_source=[self._pdf_path],
+            render_watchdog=dict(render_watchdog, report=self._report_path)
+            if render_watchdog else None))
+
+    def _parse(self, **render_watchdog):
+        with redirect_stdout(io.StringIO()):
+            rows = list(DataSourceParser(self._configuration(**render_watchdog)))
+        failures = []
+        if os.path.exists(self._report_path):
+            with open(self._report_path) as f_in:
+                failures = [json.loads(line) for line in f_in]
+        return rows, failures
+
+    def test__rendered(self):
+        rows, failures = self._parse(timeout=30)
+        self.assertEqual(self._expected_rows, rows)
+        self.assertEqual([], failures)
+
+    def test__timeout_falls_back(self):
+        with patch.object(SimplePDFViewer, 'render', failing_render(lambda: time.sleep(60))):
+            rows, failures = self._parse(timeout=TIMEOUT)
+        self.assertEqual(self._expected_rows, rows)
+        self.assertEqual([(2, 'timeout', 'used')],
+                         [(f['page_number'], f['reason'], f['fallback']) for f in failures])
+
+    def test__crash_without_fallback(self):
+        with patch.object(SimplePDFViewer, 'render', failing_render(lambda: os._exit(3))):
+            rows, failures = self._parse(timeout=30, fallback=False)
+        self.assertEqual([row for row in self._expected_rows if row['precinct'] != 'Precinct 2'],
+                         rows)
+        self.assertEqual(1, len(failures))
+        self.assertEqual(('crashed', 'worker exited with code 3', 'disabled'),
+                         (failures[0]['reason'], failures[0]['detail'], failures[0]['fallback']))
+
+    def test__memory_error_and_unparseable_fallback(self):
+        def memory_error():
+            raise MemoryError
+
+        with patch.object(SimplePDFViewer, 'render', failing_render(memory_error)), \
+                patch('electionware.watchdog.extract_content_strings', return_value=['garbage']):
+            rows, failures = self._parse(timeout=30, memory_limit=4096)
+        self.assertEqual(6, len(rows))
+        self.assertEqual([(2, 'memory', 'failed')],
+                         [(f['page_number'], f['reason'], f['fallback']) for f in failures])
+
+    def test__navigate_timeout_without_content(self):
+        def navigate(pdf_viewer, page_number):
+            if page_number == 2:
+                time.sleep(60)
+            NAVIGATE(pdf_viewer, page_number)
+
+        # the patch applies to this process too, so it would stall here if
+        # pages were still navigated to outside of the worker
+        with patch.object(SimplePDFViewer, 'navigate', navigate):
+            rows, failures = self._parse(timeout=TIMEOUT)
+        self.assertEqual([row for row in self._expected_rows if row['precinct'] != 'Precinct 2'],
+                         rows)
+        self.assertEqual([(2, 'timeout', 'unavailable')],
+                         [(f['page_number'], f['reason'], f['fallback']) for f in failures])
+
+    def test__worker_start_up_not_counted(self):
+        delay = TIMEOUT * 0.6
+
+        def load(pdf_viewer, f_obj):
+            time.sleep(delay)
+            LOAD(pdf_viewer, f_obj)
+
+        # start-up and the first page each fit the budget with time to
+        # spare, but not together
+        with patch.object(SimplePDFViewer, '__init__', load), \
+                patch.object(SimplePDFViewer, 'render', first_page_render(lambda: time.sleep(delay))):
+            rows, failures = self._parse(timeout=TIMEOUT)
+        self.assertEqual(self._expected_rows, rows)
+        self.assertEqual([], failures)